@@ -0,0 +1,300 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+from .cache import normalize_idea
+from .report_parser import DEFAULT_SOURCES
+
+# Placeholders execute_research fills in when a report has none; not indexed
+PLACEHOLDER_COMPETITORS = {"No competitors found"}
+PLACEHOLDER_SOURCES = set(DEFAULT_SOURCES)
+
+URL_RE = re.compile(r"https?://[^\s)\]>\"']+")
+# A search query: "quoted phrases" and bare words
+QUERY_PART_RE = re.compile(r'"([^"]*)"|(\S+)')
+WORD_RE = re.compile(r"\w+")
+
+# Larger than any report id, for the first page
+FIRST_PAGE = 1 << 62
+
+
+def competitor_key(name: str) -> str:
+    """Normalized competitor name, so "Rocket Money" and "rocket-money" match"""
+    return normalize_idea(name)
+
+
+def source_domain(source: str) -> Optional[str]:
+    """Host of the first URL in a source (without "www."), or None"""
+    match = URL_RE.search(source)
+    if match is None:
+        return None
+    host = (urlparse(match.group(0)).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host or None
+
+
+def domain_key(domain: str) -> str:
+    """Normalized domain for a query: "https://www.Statista.com/x" -> "statista.com" """
+    domain = domain.strip()
+    return source_domain(domain if "://" in domain else f"https://{domain}") or ""
+
+
+def match_query(text: str) -> Optional[str]:
+    """
+    FTS5 query for user search text: every word must appear, and "quoted
+    phrases" must appear together. Words are quoted, so operators and
+    punctuation in the text are never FTS5 syntax. None if there are no words.
+    """
+    terms = []
+    for phrase, word in QUERY_PART_RE.findall(text):
+        words = WORD_RE.findall(phrase or word)
+        if words:
+            terms.append('"' + " ".join(words) + '"')
+    return " ".join(terms) or None
+
+
+class ReportArchive:
+    """
+    SQLite archive of every research report the API produces, so past
+    reports can be listed and searched without rerunning crews.
+
+    Each report keeps its idea, summary, forecast, competitors and sources.
+    An FTS5 index over the idea, summary and competitor names answers free
+    text queries ("which reports mentioned Rocket Money?"), and two lookup
+    tables keyed on (normalized competitor name, report id) and (source
+    domain, report id) answer exact competitor and domain queries. Pages are
+    newest first and use the last report id as the cursor, so every page
+    is an index range scan however deep it is.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.writes = 0
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS reports ("
+                " id INTEGER PRIMARY KEY,"
+                " run_id TEXT UNIQUE,"
+                " idea TEXT NOT NULL,"
+                " mode TEXT NOT NULL,"
+                " summary TEXT NOT NULL,"
+                " competitors TEXT NOT NULL,"
+                " sources TEXT NOT NULL,"
+                " forecast TEXT NOT NULL,"
+                " degraded TEXT,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS report_competitors ("
+                " name TEXT NOT NULL,"
+                " report_id INTEGER NOT NULL,"
+                " PRIMARY KEY (name, report_id)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS report_domains ("
+                " domain TEXT NOT NULL,"
+                " report_id INTEGER NOT NULL,"
+                " PRIMARY KEY (domain, report_id)) WITHOUT ROWID"
+            )
+            # The full-text index reads its text from `reports` (external
+            # content), and triggers keep it in step
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5("
+                " idea, summary, competitors,"
+                " content='reports', content_rowid='id', tokenize='porter unicode61')"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS reports_fts_insert AFTER INSERT ON reports BEGIN"
+                " INSERT INTO reports_fts (rowid, idea, summary, competitors)"
+                " VALUES (new.id, new.idea, new.summary, new.competitors);"
+                " END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS reports_fts_delete AFTER DELETE ON reports BEGIN"
+                " INSERT INTO reports_fts (reports_fts, rowid, idea, summary, competitors)"
+                " VALUES ('delete', old.id, old.idea, old.summary, old.competitors);"
+                " DELETE FROM report_competitors WHERE report_id = old.id;"
+                " DELETE FROM report_domains WHERE report_id = old.id;"
+                " END"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, idea: str, result: dict) -> None:
+        """Archive a finished ResearchResponse (as a dict) for an idea"""
+        self.add_many([(idea, result, None)])
+
+    def add_many(self, reports: Iterable[Tuple[str, dict, Optional[float]]]) -> None:
+        """
+        Archive several reports in one transaction.
+
+        Args:
+            reports: (idea, ResearchResponse dict, created_at or None for now)
+                tuples; a report with the run_id of an archived one replaces it
+        """
+        with self._lock, self._connect() as conn:
+            for idea, result, created_at in reports:
+                run_id = result.get("run_id")
+                if run_id is not None:
+                    conn.execute("DELETE FROM reports WHERE run_id = ?", (run_id,))
+                competitors = [name for name in result["competitors"] if name not in PLACEHOLDER_COMPETITORS]
+                sources = [source for source in result["sources"] if source not in PLACEHOLDER_SOURCES]
+                cursor = conn.execute(
+                    "INSERT INTO reports (run_id, idea, mode, summary, competitors, sources, forecast, degraded, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (run_id, idea, result.get("mode", "deep"), result["summary"], json.dumps(competitors),
+                     json.dumps(sources), json.dumps(result["forecast"]), result.get("degraded"),
+                     created_at if created_at is not None else time.time()),
+                )
+                report_id = cursor.lastrowid
+                conn.executemany(
+                    "INSERT OR IGNORE INTO report_competitors (name, report_id) VALUES (?, ?)",
+                    [(key, report_id) for key in {competitor_key(name) for name in competitors} if key],
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO report_domains (domain, report_id) VALUES (?, ?)",
+                    [(domain, report_id) for domain in {source_domain(source) for source in sources} if domain],
+                )
+                self.writes += 1
+
+    def recent(self, limit: int = 20, before: Optional[int] = None) -> Tuple[list, Optional[int]]:
+        """
+        A page of archived reports, newest first, and the cursor for the next
+        page (None on the last page). Pass that cursor as `before`.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, run_id, idea, mode, competitors, degraded, created_at, NULL FROM reports"
+                " WHERE id < ? ORDER BY id DESC LIMIT ?",
+                (before or FIRST_PAGE, limit + 1),
+            ).fetchall()
+        return self._page(rows, limit)
+
+    def search(self, query: Optional[str] = None, competitor: Optional[str] = None, domain: Optional[str] = None,
+               limit: int = 20, before: Optional[int] = None) -> Tuple[list, Optional[int]]:
+        """
+        Like recent(), but only reports matching every given filter:
+
+        Args:
+            query: Words (or "quoted phrases") anywhere in the idea, summary or
+                competitor names; results then carry a summary snippet
+            competitor: A competitor the report lists (normalized name)
+            domain: A source domain the report cites, e.g. "statista.com"
+        """
+        # One index drives the scan backwards in id order (the full-text index,
+        # else a lookup table's (key, report id) range); the other filters
+        # are checked per candidate
+        lookups = []
+        if competitor is not None:
+            lookups.append(("report_competitors", "name", competitor_key(competitor)))
+        if domain is not None:
+            lookups.append(("report_domains", "domain", domain_key(domain)))
+        columns = "r.id, r.run_id, r.idea, r.mode, r.competitors, r.degraded, r.created_at"
+        if query is not None:
+            fts = match_query(query)
+            if fts is None:
+                # Query text without any words matches nothing
+                return [], None
+            sql = (
+                f"SELECT {columns}, snippet(reports_fts, 1, '**', '**', '…', 16)"
+                " FROM reports_fts JOIN reports r ON r.id = reports_fts.rowid"
+                " WHERE reports_fts MATCH ? AND reports_fts.rowid < ?"
+            )
+            params = [fts, before or FIRST_PAGE]
+            order = "reports_fts.rowid"
+        elif lookups:
+            table, column, value = lookups.pop(0)
+            sql = (
+                f"SELECT {columns}, NULL FROM {table} t JOIN reports r ON r.id = t.report_id"
+                f" WHERE t.{column} = ? AND t.report_id < ?"
+            )
+            params = [value, before or FIRST_PAGE]
+            order = "t.report_id"
+        else:
+            return [], None
+        for table, column, value in lookups:
+            # A primary key probe per candidate, rather than materializing
+            # every report id with that key
+            sql += f" AND EXISTS (SELECT 1 FROM {table} WHERE {column} = ? AND report_id = r.id)"
+            params.append(value)
+        with self._connect() as conn:
+            rows = conn.execute(f"{sql} ORDER BY {order} DESC LIMIT ?", params + [limit + 1]).fetchall()
+        return self._page(rows, limit)
+
+    @staticmethod
+    def _page(rows: list, limit: int) -> Tuple[list, Optional[int]]:
+        reports = [
+            {
+                "id": row[0],
+                "run_id": row[1],
+                "startup_idea": row[2],
+                "mode": row[3],
+                "competitors": json.loads(row[4]),
+                "degraded": row[5],
+                "created_at": row[6],
+                "snippet": row[7],
+            }
+            for row in rows[:limit]
+        ]
+        return reports, reports[-1]["id"] if len(rows) > limit else None
+
+    def get(self, report_id: int) -> Optional[dict]:
+        """An archived report: its idea, creation time and ResearchResponse fields"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, run_id, idea, mode, summary, competitors, sources, forecast, degraded, created_at"
+                " FROM reports WHERE id = ?",
+                (report_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "startup_idea": row[2],
+            "created_at": row[9],
+            "result": {
+                "run_id": row[1],
+                "mode": row[3],
+                "summary": row[4],
+                "competitors": json.loads(row[5]),
+                "sources": json.loads(row[6]),
+                "forecast": json.loads(row[7]),
+                "degraded": row[8],
+            },
+        }
+
+    def size(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    def metrics(self) -> dict:
+        return {"writes": self.writes, "size": self.size()}
+
+
+_report_archive: Optional[ReportArchive] = None
+_report_archive_lock = threading.Lock()
+
+
+def get_report_archive() -> Optional[ReportArchive]:
+    """Process-wide report archive from REPORT_ARCHIVE_PATH, or None when REPORT_ARCHIVE=off"""
+    global _report_archive
+    if os.getenv("REPORT_ARCHIVE", "on").lower() == "off":
+        return None
+    with _report_archive_lock:
+        if _report_archive is None:
+            _report_archive = ReportArchive(os.getenv("REPORT_ARCHIVE_PATH", "scout_reports.db"))
+        return _report_archive
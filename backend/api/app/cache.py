@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+
+
+def normalize_idea(text: str) -> str:
+    """
+    Normalize idea text so trivially different submissions share a cache entry
+    (case, punctuation, unicode forms and whitespace are ignored).
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r"[^\w]+", " ", text)
+    return " ".join(text.split())
+
+
+def result_cache_key(inputs: dict) -> str:
+    """Content-addressed key for a research run's inputs"""
+    material = {
+        "idea": normalize_idea(inputs.get("startup_idea", "")),
+        "start_year": str(inputs.get("start_year", "")),
+        "unit": str(inputs.get("unit", "")),
+        "mode": str(inputs.get("mode", "deep")),
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def compute_etag(result: dict) -> str:
+    """Strong ETag for a research result"""
+    digest = hashlib.sha256(json.dumps(result, sort_keys=True).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+class ResultCache:
+    """
+    Base class for the research result cache.
+
+    Entries expire `ttl` seconds after they are stored, and once more than
+    `max_entries` are held the least recently used ones are evicted. `get`
+    returns a dict with `result`, `etag` and `expires_at`, or None.
+    """
+
+    backend = "none"
+
+    def __init__(self, ttl: int = 21600, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def set(self, key: str, result: dict) -> dict:
+        entry = {
+            "result": result,
+            "etag": compute_etag(result),
+            "expires_at": time.time() + self.ttl,
+        }
+        self._set(key, entry)
+        return entry
+
+    def metrics(self) -> dict:
+        return {"backend": self.backend, "hits": self.hits, "misses": self.misses, "size": self.size()}
+
+    def _get(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def _set(self, key: str, entry: dict) -> None:
+        raise NotImplementedError
+
+    def size(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryResultCache(ResultCache):
+    """LRU result cache held in this process's memory"""
+
+    backend = "memory"
+
+    def __init__(self, ttl: int = 21600, max_entries: int = 256):
+        super().__init__(ttl, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["expires_at"] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _set(self, key: str, entry: dict) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class DiskResultCache(ResultCache):
+    """LRU result cache stored in a SQLite file, shared across restarts and processes"""
+
+    backend = "disk"
+
+    def __init__(self, path: str, ttl: int = 21600, max_entries: int = 256):
+        super().__init__(ttl, max_entries)
+        self.path = path
+        with self._connect() as conn:
+            # Readers in other workers are not blocked by a writer in WAL mode
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " result TEXT NOT NULL,"
+                " etag TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result, etag, expires_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[2] < now:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (now, key))
+        return {"result": json.loads(row[0]), "etag": row[1], "expires_at": row[2]}
+
+    def _set(self, key: str, entry: dict) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, result, etag, expires_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(entry["result"]), entry["etag"], entry["expires_at"], now),
+            )
+            conn.execute("DELETE FROM results WHERE expires_at < ?", (now,))
+            # Evict least recently used entries beyond the size limit
+            conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                " SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def size(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def result_cache_from_env() -> Optional[ResultCache]:
+    """
+    Build the result cache from RESULT_CACHE (memory, disk or off),
+    RESULT_CACHE_PATH, RESULT_CACHE_TTL and RESULT_CACHE_MAX_ENTRIES.
+    """
+    kind = os.getenv("RESULT_CACHE", "memory").lower()
+    ttl = int(os.getenv("RESULT_CACHE_TTL", "21600"))
+    max_entries = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256"))
+    if kind == "off":
+        return None
+    if kind == "disk":
+        return DiskResultCache(os.getenv("RESULT_CACHE_PATH", "scout_results.db"), ttl=ttl, max_entries=max_entries)
+    if kind == "memory":
+        return MemoryResultCache(ttl=ttl, max_entries=max_entries)
+    raise ValueError(f"Unknown result cache: {kind}")
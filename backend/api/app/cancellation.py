@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+class CancelRegistry:
+    """
+    Run ids whose cancellation has been requested.
+
+    The event loop requests a cancellation; the worker running the crew polls
+    is_cancelled() at every agent step and tool call (through RunBudget) and
+    stops the run. With a thread pool both sides share this object. Worker
+    processes cannot see the API process's memory, so with `path` set the
+    requests are also written to SQLite, which workers poll at most every
+    `poll_interval` seconds per run.
+
+    The API process also counts why cancellations were asked for and how
+    much worker time stopping runs early saved (see metrics()).
+    """
+
+    def __init__(self, path: Optional[str] = None, poll_interval: float = 0.5, ttl: int = 86400):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.ttl = ttl
+        self._cancelled = set()
+        self._polled = {}
+        self._lock = threading.Lock()
+        # Metrics (API process only)
+        self.requests = {"disconnect": 0, "delete": 0}
+        self.requested = 0
+        self.stopped = 0
+        self.seconds_reclaimed = 0.0
+        if path is not None:
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cancellations ("
+                    " run_id TEXT PRIMARY KEY,"
+                    " requested_at REAL NOT NULL)"
+                )
+                conn.execute("DELETE FROM cancellations WHERE requested_at < ?", (time.time() - ttl,))
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def request(self, run_id: str) -> None:
+        """Ask the worker running `run_id` to stop it"""
+        with self._lock:
+            self._cancelled.add(run_id)
+            self.requested += 1
+        if self.path is not None:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cancellations (run_id, requested_at) VALUES (?, ?)",
+                    (run_id, time.time()),
+                )
+
+    def is_cancelled(self, run_id: str) -> bool:
+        with self._lock:
+            if run_id in self._cancelled:
+                return True
+            if self.path is None:
+                return False
+            now = time.monotonic()
+            if now - self._polled.get(run_id, 0.0) < self.poll_interval:
+                return False
+            self._polled[run_id] = now
+        with self._connect() as conn:
+            row = conn.execute("SELECT 1 FROM cancellations WHERE run_id = ?", (run_id,)).fetchone()
+        if row is not None:
+            with self._lock:
+                self._cancelled.add(run_id)
+        return row is not None
+
+    def clear(self, run_id: str) -> None:
+        """Forget a finished run"""
+        with self._lock:
+            self._cancelled.discard(run_id)
+            self._polled.pop(run_id, None)
+        if self.path is not None:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cancellations WHERE run_id = ?", (run_id,))
+
+    def record_request(self, reason: str) -> None:
+        """Count a client asking for a run to stop (disconnect or delete)"""
+        with self._lock:
+            self.requests[reason] = self.requests.get(reason, 0) + 1
+
+    def record_stopped(self, ran_seconds: float, expected_seconds: Optional[float]) -> None:
+        """
+        Count a run stopped by its cancellation after `ran_seconds` on a
+        worker; a run usually takes `expected_seconds`, so the difference is
+        worker time given back.
+        """
+        with self._lock:
+            self.stopped += 1
+            if expected_seconds is not None:
+                self.seconds_reclaimed += max(0.0, expected_seconds - ran_seconds)
+
+    def metrics(self) -> dict:
+        return {
+            "requests": dict(self.requests),
+            "requested": self.requested,
+            "stopped": self.stopped,
+            "seconds_reclaimed": round(self.seconds_reclaimed, 1),
+        }
+
+
+_cancel_registry: Optional[CancelRegistry] = None
+_cancel_registry_lock = threading.Lock()
+
+
+def get_cancel_registry() -> CancelRegistry:
+    """
+    Process-wide cancel registry. With RESEARCH_EXECUTOR=process or more
+    than one web worker (WEB_CONCURRENCY) it is shared with the other
+    processes through the SQLite file at CANCEL_PATH.
+    """
+    global _cancel_registry
+    with _cancel_registry_lock:
+        if _cancel_registry is None:
+            shared = (
+                os.getenv("RESEARCH_EXECUTOR", "thread").lower() == "process"
+                or int(os.getenv("WEB_CONCURRENCY", "1")) > 1
+            )
+            _cancel_registry = CancelRegistry(
+                os.getenv("CANCEL_PATH", "scout_cancellations.db") if shared else None,
+                poll_interval=float(os.getenv("CANCEL_POLL_INTERVAL", "0.5")),
+            )
+        return _cancel_registry
@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from .cache import normalize_idea
+
+logger = logging.getLogger(__name__)
+
+
+def run_key(inputs: dict) -> str:
+    """Key for a research run's inputs; runs with the same key produce the same result"""
+    material = {
+        "idea": normalize_idea(inputs.get("startup_idea", "")),
+        "topic": normalize_idea(inputs.get("topic", "")),
+        "start_year": str(inputs.get("start_year", "")),
+        "unit": str(inputs.get("unit", "")),
+        "mode": str(inputs.get("mode", "deep")),
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class Flight:
+    """One in-flight research run and the requests waiting for it"""
+
+    def __init__(self, key: str, job_id: Optional[str] = None):
+        self.key = key
+        # Job whose progress the run records, if it was started for a job
+        self.job_id = job_id
+        # The run's id (a job's run id is its job id), used to cancel it
+        self.run_id = job_id or uuid.uuid4().hex
+        self.waiters = 0
+        self.started = False
+        self.started_at: Optional[float] = None
+        self.abandoned = False
+        self.task: Optional[asyncio.Task] = None
+
+    def mark_started(self) -> None:
+        """Called once the run has a worker (from then on it is stopped through on_abandon, not dropped)"""
+        self.started = True
+        self.started_at = time.monotonic()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical research runs.
+
+    The first caller for a key starts the run; callers arriving while it is
+    in flight wait for the same run and get the same result (or error).
+    When every waiter has gone away (e.g. clients disconnected) before the
+    run got a worker, it is cancelled and never starts. A run that already
+    has a worker is handed to `on_abandon(flight)`, which asks the worker to
+    stop it (the crew stops at its next agent step or tool call).
+
+    Only used from the event loop thread, so no locking is needed.
+    """
+
+    def __init__(self, on_abandon: Optional[Callable[[Flight], None]] = None):
+        self._flights = {}
+        self.on_abandon = on_abandon
+        self.started = 0
+        self.joined = 0
+        self.cancelled = 0
+        self.abandoned = 0
+
+    def get(self, key: str) -> Optional[Flight]:
+        return self._flights.get(key)
+
+    def join(self, key: str, start: Callable[[Flight], Awaitable], job_id: Optional[str] = None) -> Flight:
+        """
+        Register a waiter for the run for `key`, starting it with
+        `start(flight)` if none is in flight. `start` should call
+        flight.mark_started() once the run leaves the queue. Follow with
+        wait(flight).
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = Flight(key, job_id)
+            flight.task = asyncio.ensure_future(start(flight))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(flight))
+            self.started += 1
+        else:
+            self.joined += 1
+        flight.waiters += 1
+        return flight
+
+    async def wait(self, flight: Flight):
+        """Wait for a joined flight's result (or error), then leave it"""
+        try:
+            # Shielded so one waiter going away does not cancel the shared run
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                if not flight.started:
+                    logger.info("All waiters left before research run %s started; cancelling it", flight.key[:12])
+                    flight.task.cancel()
+                    self.cancelled += 1
+                elif self.on_abandon is not None:
+                    logger.info("All waiters left research run %s; stopping it", flight.run_id)
+                    flight.abandoned = True
+                    self.on_abandon(flight)
+                    self.abandoned += 1
+                    # New callers start a fresh run instead of joining one that is stopping
+                    if self._flights.get(flight.key) is flight:
+                        del self._flights[flight.key]
+
+    async def run(self, key: str, start: Callable[[Flight], Awaitable], job_id: Optional[str] = None):
+        """join() and wait() in one step"""
+        return await self.wait(self.join(key, start, job_id))
+
+    def _forget(self, flight: Flight) -> None:
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+        if (not flight.task.cancelled() and flight.task.exception() is not None and flight.waiters == 0
+                and not flight.abandoned):
+            # Nobody is left to see the error (the run outlived its waiters)
+            logger.warning("Research run %s failed after its waiters left: %s", flight.key[:12], flight.task.exception())
+
+    def metrics(self) -> dict:
+        return {
+            "in_flight": len(self._flights),
+            "waiters": sum(flight.waiters for flight in self._flights.values()),
+            "started": self.started,
+            "joined": self.joined,
+            "cancelled": self.cancelled,
+            "abandoned": self.abandoned,
+        }
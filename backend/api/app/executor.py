@@ -0,0 +1,154 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """Raised when the research queue has no free slots left"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Research queue is full")
+        self.retry_after = retry_after
+
+
+class ResearchExecutor:
+    """
+    Runs blocking crew kickoffs on a thread or process pool so the event loop
+    stays free for health checks and other requests.
+
+    At most `max_workers` runs execute at once and at most `max_queue` runs wait
+    for a free worker. Anything beyond that is rejected with QueueFullError so
+    callers can answer 503 + Retry-After instead of piling up requests.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 2, max_queue: int = 8, retry_after: int = 30,
+                 initializer=None, cancelled_errors: tuple = ()):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.default_retry_after = max(1, retry_after)
+        # Runs once in each worker process (process pool only), e.g. to warm imports
+        self.initializer = initializer
+        # Errors a cancelled run ends with; counted apart from failures, and
+        # left out of the run time average
+        self.cancelled_errors = cancelled_errors
+
+        self._pool: Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+
+        # Metrics (only touched from the event loop thread, so no locking needed)
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self._avg_duration: float | None = None
+
+    @classmethod
+    def from_env(cls, initializer=None, cancelled_errors: tuple = ()) -> "ResearchExecutor":
+        """Build an executor from RESEARCH_* environment variables"""
+        return cls(
+            kind=os.getenv("RESEARCH_EXECUTOR", "thread").lower(),
+            max_workers=int(os.getenv("RESEARCH_MAX_WORKERS", "2")),
+            max_queue=int(os.getenv("RESEARCH_MAX_QUEUE", "8")),
+            retry_after=int(os.getenv("RESEARCH_RETRY_AFTER", "30")),
+            initializer=initializer,
+            cancelled_errors=cancelled_errors,
+        )
+
+    def _ensure_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=self.initializer)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="research"
+                )
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        return self._pool
+
+    def retry_after(self) -> int:
+        """Estimate how many seconds until a queue slot frees up"""
+        if self._avg_duration is None:
+            return self.default_retry_after
+        waves = (self.queue_depth + self.in_flight) / self.max_workers
+        return max(1, int(self._avg_duration * max(waves, 1)))
+
+    def is_saturated(self) -> bool:
+        return self.in_flight >= self.max_workers and self.queue_depth >= self.max_queue
+
+    async def run(self, fn, *args, on_start=None):
+        """
+        Run `fn(*args)` on the pool and await its result.
+
+        Raises QueueFullError when every worker is busy and the queue is full.
+        With the process pool, `fn` and its arguments must be picklable.
+        `on_start()` is called once the run leaves the queue for a worker.
+        """
+        pool = self._ensure_pool()
+        if self.is_saturated():
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+
+        self.queue_depth += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queue_depth -= 1
+
+        self.in_flight += 1
+        if on_start is not None:
+            on_start()
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        future = pool.submit(fn, *args)
+        # Release the slot when the work actually finishes, not when the awaiting
+        # request goes away, so abandoned runs still count against capacity
+        future.add_done_callback(
+            lambda f: loop.call_soon_threadsafe(self._finish, f, started)
+        )
+        return await asyncio.wrap_future(future)
+
+    def _finish(self, future, started: float) -> None:
+        self.in_flight -= 1
+        self._slots.release()
+        if not future.cancelled() and isinstance(future.exception(), self.cancelled_errors):
+            self.cancelled += 1
+            return
+        if future.cancelled() or future.exception() is not None:
+            self.failed += 1
+        else:
+            self.completed += 1
+        self._record_duration(time.monotonic() - started)
+
+    def _record_duration(self, duration: float) -> None:
+        # Exponential moving average of run time, used for Retry-After hints
+        if self._avg_duration is None:
+            self._avg_duration = duration
+        else:
+            self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+
+    def metrics(self) -> dict:
+        """Snapshot of queue depth, in-flight runs and counters"""
+        return {
+            "executor": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "avg_run_seconds": round(self._avg_duration, 2) if self._avg_duration is not None else None,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,250 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+
+class JobStore:
+    """
+    Base class for research job storage.
+
+    A job is a plain dict with id, status, inputs, per-task progress, parsed
+    partial outputs keyed by task name, result, error, an optional timing
+    breakdown and timestamps. Every
+    write refreshes `expires_at`, so finished jobs (and their results) are
+    kept for `ttl` seconds after their last update.
+    Subclasses only implement loading, atomic mutation and expiry.
+    """
+
+    def __init__(self, ttl: int = 86400):
+        self.ttl = ttl
+
+    def create(self, inputs: dict) -> dict:
+        """Create a queued job for the given crew inputs"""
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "inputs": inputs,
+            "progress": [],
+            "partials": {},
+            "result": None,
+            "error": None,
+            "trace": None,
+            "created_at": now,
+            "updated_at": now,
+            "expires_at": now + self.ttl,
+        }
+        self._insert(job)
+        self.purge_expired()
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return the job, or None if it does not exist or has expired"""
+        job = self._load(job_id)
+        if job is None or job["expires_at"] < time.time():
+            return None
+        return job
+
+    def start(self, job_id: str, task_names: list, concurrent: int = 1) -> None:
+        """
+        Mark the job running and register the crew's tasks in order. The first
+        `concurrent` tasks start out running together.
+        """
+        def apply(job):
+            if job["status"] == "cancelled":
+                return
+            job["status"] = "running"
+            job["progress"] = [
+                {"task": name, "status": "running" if i < concurrent else "pending", "completed_at": None}
+                for i, name in enumerate(task_names)
+            ]
+        self._mutate(job_id, apply)
+
+    def complete_task(self, job_id: str, task_name: str, partial: Optional[dict] = None) -> None:
+        """
+        Mark a task completed (storing its parsed output). Once no task is
+        running any more, the next pending task is marked running.
+        """
+        def apply(job):
+            if partial is not None:
+                job["partials"][task_name] = partial
+            for entry in job["progress"]:
+                if entry["task"] == task_name:
+                    entry["status"] = "completed"
+                    entry["completed_at"] = time.time()
+            if any(entry["status"] == "running" for entry in job["progress"]):
+                return
+            for entry in job["progress"]:
+                if entry["status"] == "pending":
+                    entry["status"] = "running"
+                    break
+        self._mutate(job_id, apply)
+
+    def succeed(self, job_id: str, result: dict) -> None:
+        def apply(job):
+            # A job cancelled from another worker stays cancelled even if its
+            # run finished before it saw the cancellation
+            if job["status"] == "cancelled":
+                return
+            job["status"] = "succeeded"
+            job["result"] = result
+        self._mutate(job_id, apply)
+
+    def set_trace(self, job_id: str, trace: dict) -> None:
+        """Attach a run's timing breakdown (see market_research.tracing)"""
+        def apply(job):
+            job["trace"] = trace
+        self._mutate(job_id, apply)
+
+    def fail(self, job_id: str, error: str) -> None:
+        def apply(job):
+            if job["status"] == "cancelled":
+                return
+            job["status"] = "failed"
+            job["error"] = error
+        self._mutate(job_id, apply)
+
+    def cancel(self, job_id: str) -> None:
+        """Mark a queued or running job cancelled (finished jobs keep their outcome)"""
+        def apply(job):
+            if job["status"] in ("queued", "running"):
+                job["status"] = "cancelled"
+                job["error"] = "Cancelled"
+        self._mutate(job_id, apply)
+
+    def _touch(self, job: dict) -> None:
+        job["updated_at"] = time.time()
+        job["expires_at"] = job["updated_at"] + self.ttl
+
+    def _insert(self, job: dict) -> None:
+        raise NotImplementedError
+
+    def _load(self, job_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def _mutate(self, job_id: str, apply: Callable[[dict], None]) -> None:
+        raise NotImplementedError
+
+    def purge_expired(self) -> None:
+        raise NotImplementedError
+
+
+class InMemoryJobStore(JobStore):
+    """Job store kept in this process's memory (lost on restart)"""
+
+    def __init__(self, ttl: int = 86400):
+        super().__init__(ttl)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _insert(self, job: dict) -> None:
+        with self._lock:
+            self._jobs[job["id"]] = job
+
+    def _load(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            # Hand out a copy so callers never see a half-applied update
+            return json.loads(json.dumps(job)) if job is not None else None
+
+    def _mutate(self, job_id: str, apply: Callable[[dict], None]) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                apply(job)
+                self._touch(job)
+
+    def purge_expired(self) -> None:
+        now = time.time()
+        with self._lock:
+            for job_id in [k for k, job in self._jobs.items() if job["expires_at"] < now]:
+                del self._jobs[job_id]
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Job store backed by a SQLite file, so jobs survive restarts and can be
+    updated from worker processes.
+    """
+
+    def __init__(self, path: str, ttl: int = 86400):
+        super().__init__(ttl)
+        self.path = path
+        with self._connect() as conn:
+            # WAL lets other web workers read jobs while one of them writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at)")
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per operation keeps this safe across threads
+        # and processes; SQLite's own locking serializes the writes
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _insert(self, job: dict) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, data, expires_at) VALUES (?, ?, ?)",
+                (job["id"], json.dumps(job), job["expires_at"]),
+            )
+
+    def _load(self, job_id: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _mutate(self, job_id: str, apply: Callable[[dict], None]) -> None:
+        with self._connect() as conn:
+            # Take the write lock before reading so concurrent updates serialize
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is not None:
+                job = json.loads(row[0])
+                apply(job)
+                self._touch(job)
+                conn.execute(
+                    "UPDATE jobs SET data = ?, expires_at = ? WHERE id = ?",
+                    (json.dumps(job), job["expires_at"], job_id),
+                )
+
+    def purge_expired(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE expires_at < ?", (time.time(),))
+
+
+def job_store_from_env() -> JobStore:
+    """Build a job store from JOB_STORE, JOB_STORE_PATH and JOB_RESULT_TTL"""
+    kind = os.getenv("JOB_STORE", "memory").lower()
+    ttl = int(os.getenv("JOB_RESULT_TTL", "86400"))
+    if kind == "sqlite":
+        return SQLiteJobStore(os.getenv("JOB_STORE_PATH", "scout_jobs.db"), ttl=ttl)
+    if kind == "memory":
+        return InMemoryJobStore(ttl=ttl)
+    raise ValueError(f"Unknown job store: {kind}")
+
+
+_job_store: Optional[JobStore] = None
+
+
+def get_job_store() -> JobStore:
+    """Process-wide job store, created on first use"""
+    global _job_store
+    if _job_store is None:
+        _job_store = job_store_from_env()
+    return _job_store
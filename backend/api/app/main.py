@@ -1,43 +1,135 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 from dotenv import load_dotenv
+from pydantic import ValidationError
+from typing import Literal, Optional
+import asyncio
+import logging
 import os
-import sys
 import json
-import re
-
-from .schemas import ResearchRequest, ResearchResponse
-
-# Import MarketResearch crew
-# Try to import, and if it fails, add to sys.path and try again
-try:
-    from market_research.crew import MarketResearch
-except ImportError:
-    # Fallback: add market_research to sys.path
-    import sys
-    import os
-    market_research_path = os.path.abspath(
-        os.path.join(os.path.dirname(__file__), "../../../market_research/src")
-    )
-    sys.path.insert(0, market_research_path)
-    try:
-        from market_research.crew import MarketResearch
-    except ImportError as e:
-        # If still failing, raise a helpful error
-        raise ImportError(
-            f"Could not import MarketResearch. "
-            f"Please run 'cd {os.path.dirname(market_research_path)} && pip install -e .' "
-            f"Error: {e}"
-        )
+import time
+import uuid
+
+from .archive import get_report_archive
+from .cache import result_cache_from_env, result_cache_key
+from .cancellation import get_cancel_registry
+from .coalesce import SingleFlight, run_key
+from .executor import QueueFullError, ResearchExecutor
+from .jobs import get_job_store
+from .report_parser import parse_competitor_profiles, parse_report
+from .similarity import get_similarity_index, prior_research_text
+
+from .warmup import ensure_market_research_importable, get_runtime, start_warmup, warmup_status, warmup_worker
+
+# crewai itself is imported lazily (see warmup.py) so the app starts serving
+# / and /health right away; only light market_research modules load here
+ensure_market_research_importable()
+
+from market_research.budget import RunCancelled
+from market_research.checkpoints import ReplayError, checkpoint_output, get_checkpoint_store, replay_plan
+from market_research.forecasting import FORECAST_SAMPLES, parameter_errors, project
+from market_research.scheduler import get_call_scheduler
+from market_research.tools.competitor_profiles import get_competitor_profiles
+from market_research.tools.tool_cache import get_tool_cache, scrape_stats, shared_fetches
+from market_research.tracing import metrics as tracing_metrics
+
+# schemas.py reuses the crew's Forecast model, so it is imported once the
+# market_research package is importable
+from .schemas import (
+    ArchivedReport,
+    ArchivedReportSummary,
+    Forecast,
+    ForecastParameters,
+    ReplayRequest,
+    ReportPage,
+    ResearchBatchRequest,
+    ResearchBudget,
+    ResearchJob,
+    ResearchRequest,
+    ResearchResponse,
+    ResearchRun,
+    SimilarResearch,
+    TaskCheckpoint,
+)
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Worker pool that runs crew kickoffs off the event loop
+research_executor = ResearchExecutor.from_env(initializer=warmup_worker, cancelled_errors=(RunCancelled,))
+
+# Finished results keyed on normalized inputs, so repeat ideas skip the crew
+result_cache = result_cache_from_env()
+
+# Research on a near-duplicate idea (see similarity.py) is reused: at or above
+# SIMILAR_RESEARCH_REUSE_THRESHOLD it replaces the research phase outright,
+# at or above SIMILAR_RESEARCH_THRESHOLD the researchers get it as prior
+# knowledge and only search for what it does not cover
+SIMILAR_RESEARCH_THRESHOLD = float(os.getenv("SIMILAR_RESEARCH_THRESHOLD", "0.5"))
+SIMILAR_RESEARCH_REUSE_THRESHOLD = float(os.getenv("SIMILAR_RESEARCH_REUSE_THRESHOLD", "0.8"))
+
+# Server defaults, and caps, for each run's budget (0 = no limit). A request
+# may ask for tighter limits in its `budget`
+RUN_DEADLINE_SECONDS = float(os.getenv("RUN_DEADLINE_SECONDS", "600"))
+RUN_MAX_TOOL_CALLS = int(os.getenv("RUN_MAX_TOOL_CALLS", "30"))
+RUN_MAX_TOKENS = int(os.getenv("RUN_MAX_TOKENS", "300000"))
+
+# Budget defaults for quick-mode runs, which are meant to return in seconds
+QUICK_DEADLINE_SECONDS = float(os.getenv("QUICK_DEADLINE_SECONDS", "60"))
+QUICK_MAX_TOOL_CALLS = int(os.getenv("QUICK_MAX_TOOL_CALLS", "3"))
+QUICK_MAX_TOKENS = int(os.getenv("QUICK_MAX_TOKENS", "40000"))
+
+# Times a run whose crew fails is retried from the tasks it completed
+STAGE_RETRIES = int(os.getenv("STAGE_RETRIES", "1"))
+
+# Runs nobody is waiting for any more (clients disconnected, jobs deleted)
+# are stopped at their next agent step or tool call; see cancellation.py
+cancellations = get_cancel_registry()
+
+# Identical runs requested while one is already in flight (double submits,
+# client retries) wait for that run instead of starting another crew. Once
+# every waiter has left, a run that has started is cancelled
+research_flights = SingleFlight(on_abandon=lambda flight: cancellations.request(flight.run_id))
+
+# How often a waiting /research/run request checks whether its client is gone
+DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", "1.0"))
+
+# Research jobs submitted through /research/jobs, plus the asyncio tasks
+# driving them by job id (kept referenced so they are not garbage collected
+# mid-run, and so DELETE can cancel them)
+job_store = get_job_store()
+_job_tasks = {}
+
+# How often /research/stream checks the job store, and how long it may stay
+# silent before sending a keep-alive comment
+STREAM_POLL_INTERVAL = float(os.getenv("STREAM_POLL_INTERVAL", "0.5"))
+STREAM_KEEPALIVE_INTERVAL = float(os.getenv("STREAM_KEEPALIVE_INTERVAL", "15"))
+
+
+# Import crewai and prebuild the crew in the background at startup
+# (WARMUP=off defers it to the first research run)
+WARMUP = os.getenv("WARMUP", "on").lower() != "off"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP:
+        start_warmup()
+    yield
+    research_executor.shutdown()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="ScoutAI Market Research API",
     description="API for running AI-powered market research on startup ideas",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS to allow frontend origins
@@ -55,315 +147,310 @@ app.add_middleware(
 )
 
 
-def extract_json_from_text(text: str) -> dict:
-    """Extract JSON from markdown code blocks or raw text"""
-    if not text:
-        return get_default_forecast()
-    
-    # First, try to parse the entire text as JSON (in case it's pure JSON output)
-    text_stripped = text.strip()
-    if text_stripped.startswith('{') and text_stripped.endswith('}'):
-        try:
-            parsed = json.loads(text_stripped)
-            if isinstance(parsed, dict) and "series" in parsed:
-                if isinstance(parsed.get("series"), list) and len(parsed.get("series", [])) > 0:
-                    return parsed
-        except json.JSONDecodeError:
-            pass
-    
-    # Try to find JSON in code blocks (legacy format)
-    json_pattern = r'```(?:json)?\s*(\{[\s\S]*?\})\s*```'
-    matches = re.findall(json_pattern, text, re.DOTALL)
-    
-    if matches:
-        for match in matches:
-            try:
-                parsed = json.loads(match)
-                # Validate it has the required structure
-                if isinstance(parsed, dict) and "series" in parsed:
-                    if isinstance(parsed.get("series"), list) and len(parsed.get("series", [])) > 0:
-                        return parsed
-            except json.JSONDecodeError:
-                continue
-    
-    # Try to find raw JSON object with "series" key (multiline)
-    json_pattern = r'\{[^{}]*"series"\s*:\s*\[[^\]]*\][^{}]*\}'
-    matches = re.findall(json_pattern, text, re.DOTALL)
-    
-    if matches:
-        for match in matches:
-            try:
-                parsed = json.loads(match)
-                if isinstance(parsed, dict) and "series" in parsed:
-                    if isinstance(parsed.get("series"), list) and len(parsed.get("series", [])) > 0:
-                        return parsed
-            except json.JSONDecodeError:
-                continue
-    
-    # Try a more flexible pattern to find JSON object that might span multiple lines
-    # Look for opening brace followed by content including "series" and closing brace
-    start_idx = text.find('{')
-    if start_idx != -1:
-        # Find matching closing brace
-        brace_count = 0
-        for i in range(start_idx, len(text)):
-            if text[i] == '{':
-                brace_count += 1
-            elif text[i] == '}':
-                brace_count -= 1
-                if brace_count == 0:
-                    json_str = text[start_idx:i+1]
-                    try:
-                        parsed = json.loads(json_str)
-                        if isinstance(parsed, dict) and "series" in parsed:
-                            if isinstance(parsed.get("series"), list) and len(parsed.get("series", [])) > 0:
-                                return parsed
-                    except json.JSONDecodeError:
-                        pass
-                    break
-    
-    # Return default structure with at least one placeholder data point
-    return get_default_forecast()
-
-
-def get_default_forecast() -> dict:
-    """Return a valid default forecast structure with realistic default values"""
+def build_research_inputs(request: ResearchRequest) -> dict:
+    """Build the crew kickoff inputs for a research request"""
     return {
-        "title": "5-Year Growth Forecast",
+        "startup_idea": request.startup_idea,
+        "topic": request.startup_idea,
+        "start_year": "2025",
         "unit": "USD",
-        "series": [
-            {"year": 2025, "value": 100000},
-            {"year": 2026, "value": 250000},
-            {"year": 2027, "value": 500000},
-            {"year": 2028, "value": 850000},
-            {"year": 2029, "value": 1300000}
-        ],
-        "scenarios": []
+        "mode": request.mode,
     }
 
 
-def extract_competitors_from_text(text: str) -> list:
-    """Extract competitor names from competitive analysis text"""
-    competitors = []
+def build_run_budget(request: ResearchRequest) -> dict:
+    """Budget limits for a research request: its own, capped by the server's"""
+    requested = request.budget or ResearchBudget()
+    if request.mode == "quick":
+        # Unset limits fall back to the quick-mode defaults
+        requested = ResearchBudget(
+            deadline_seconds=requested.deadline_seconds or QUICK_DEADLINE_SECONDS or None,
+            max_tool_calls=requested.max_tool_calls if requested.max_tool_calls is not None else QUICK_MAX_TOOL_CALLS or None,
+            max_tokens=requested.max_tokens or QUICK_MAX_TOKENS or None,
+        )
     
-    # First, try to find the Competitive Intelligence section
-    comp_section_match = re.search(
-        r'##\s*Competitive\s+Intelligence[\s\S]*?(?=##\s*Growth|##\s*Strategic|##\s*Sources|$)',
-        text,
-        re.IGNORECASE
-    )
+    def limit(value, cap):
+        if not cap:
+            return value
+        return cap if value is None else min(value, cap)
     
-    if comp_section_match:
-        text = comp_section_match.group(0)
+    return {
+        "deadline_seconds": limit(requested.deadline_seconds, RUN_DEADLINE_SECONDS),
+        "max_tool_calls": limit(requested.max_tool_calls, RUN_MAX_TOOL_CALLS),
+        "max_tokens": limit(requested.max_tokens, RUN_MAX_TOKENS),
+    }
+
+
+def parse_task_output(output) -> Optional[dict]:
+    """
+    Parse a single task's output into the fields it contributes to the final
+    response, so partial results can be shown before the crew finishes.
+    """
+    if output.name in get_runtime().research_tasks:
+        return {"research": str(output.raw)}
+    if output.name == "forecast_task":
+        # Parameters already validated by the task's guardrail
+        return {"forecast": project(output.pydantic).model_dump()}
+    if output.name == "synthesis_task":
+        report = parse_report(str(output.raw))
+        return {
+            "summary": report.summary,
+            "competitors": report.competitors,
+            "sources": report.sources,
+        }
+    return None
+
+
+def collect_outputs(crew) -> dict:
+    """Task name -> TaskOutput for the crew's tasks and every task they take as context"""
+    outputs = {}
+    pending = list(crew.tasks)
+    while pending:
+        task = pending.pop()
+        if task.output is not None:
+            outputs.setdefault(task.name, task.output)
+        if isinstance(task.context, list):
+            pending.extend(task.context)
+    return outputs
+
+
+def execute_research(inputs: dict, job_id: Optional[str] = None, trace: bool = False,
+                     budget: Optional[dict] = None, replay: Optional[dict] = None,
+                     run_id: Optional[str] = None, priority: str = "interactive") -> dict:
+    """
+    Run the MarketResearch crew and parse its task outputs.
     
-    lines = text.split('\n')
-    in_competitor_section = False
+    This is blocking and runs on the research executor's worker pool, so it
+    must stay a picklable module-level function (process pool mode).
     
-    for line in lines:
-        line_stripped = line.strip()
-        
-        # Skip empty lines and headers
-        if not line_stripped or '---' in line_stripped:
-            continue
-        
-        # Look for competitor section headers
-        if 'competitor' in line_stripped.lower() or 'top competitors' in line_stripped.lower():
-            in_competitor_section = True
-            continue
-        
-        # Extract from table format (markdown tables)
-        if '|' in line_stripped and 'Name' not in line_stripped and '---' not in line_stripped:
-            parts = [p.strip() for p in line_stripped.split('|') if p.strip()]
-            if parts and len(parts[0]) > 2 and len(parts[0]) < 100:
-                name = parts[0].split('—')[0].split('-')[0].strip()
-                name = re.sub(r'\[.*?\]\(.*?\)', '', name).strip()
-                name = re.sub(r'https?://\S+', '', name).strip()
-                name = re.sub(r'\[\d+\]', '', name).strip()
-                if name and len(name) > 2:
-                    competitors.append(name)
+    Args:
+        inputs: Crew kickoff inputs (ignored for a replay, which uses its run's)
+        job_id: Optional job whose per-task progress is recorded in the job store
+        trace: Store the run's timing breakdown and spans on the job
+        budget: RunBudget limits (deadline_seconds, max_tool_calls, max_tokens)
+        replay: Rerun part of a checkpointed run: {"run_id", "from_task" (or None to resume)}
+        run_id: Id for the run (default: the job id, or a new one); cancelling
+            it in the cancel registry stops the run with RunCancelled
+        priority: Scheduler priority class for the run's LLM and search
+            calls, "interactive" or "batch" (see market_research/scheduler.py)
         
-        # Extract from bullet points (format: - Name — URL [citation])
-        elif (line_stripped.startswith('-') or line_stripped.startswith('*')) and (
-            'https://' in line_stripped or 'http://' in line_stripped or '—' in line_stripped
+    Returns:
+        ResearchResponse as a plain dict
+    """
+    # A copy of the prebuilt template crew (waits for warmup if still running)
+    runtime = get_runtime()
+    research_tasks = runtime.research_tasks
+    checkpoints = get_checkpoint_store()
+    run_id = run_id or job_id or uuid.uuid4().hex
+    
+    similar = None
+    reused = None
+    preview = None
+    index = get_similarity_index()
+    if replay is not None:
+        # Only the replayed task and the tasks that depend on it run again
+        parent = checkpoints.get_run(replay["run_id"]) if checkpoints is not None else None
+        if parent is None:
+            raise ReplayError(f"Research run {replay['run_id']} not found or expired")
+        inputs = parent["inputs"]
+        mode = inputs.get("mode", "deep")
+        rerun, done = replay_plan(runtime.templates[mode], parent, replay.get("from_task"))
+        logger.info("Replaying research run %s as %s: rerunning %s", parent["run_id"], run_id, ", ".join(rerun))
+    else:
+        mode = inputs.get("mode", "deep")
+        # Research on a near-duplicate idea is reused instead of repeated. Deep
+        # runs only reuse deep research; quick runs can use either
+        if index is not None:
+            similar = index.lookup(
+                inputs["startup_idea"], SIMILAR_RESEARCH_THRESHOLD, modes=("deep",) if mode == "deep" else None
+            )
+        if similar is not None and similar["similarity"] >= SIMILAR_RESEARCH_REUSE_THRESHOLD and all(
+            name in similar["research"] for name in research_tasks
         ):
-            # Remove bullet marker
-            name = line_stripped.lstrip('-*').strip()
-            
-            # Pattern: "CompanyName — https://..." or "CompanyName - https://..."
-            # Handle em dash (—) and regular dash (-)
-            if '—' in name:
-                name = name.split('—')[0].strip()
-            elif ' - ' in name and ('https://' in name or 'http://' in name):
-                name = name.split(' - ')[0].strip()
-            elif 'https://' in name:
-                name = name.split('https://')[0].strip()
-            elif 'http://' in name:
-                name = name.split('http://')[0].strip()
-            
-            # Remove citations [1], [2], etc.
-            name = re.sub(r'\[\d+\]', '', name).strip()
-            
-            # Remove markdown links but preserve text
-            name = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', name).strip()
-            
-            if name and len(name) > 2 and len(name) < 100:
-                competitors.append(name)
-        
-        # Extract from numbered list or header format
-        # Pattern: "CompanyName — URL" or just "CompanyName" followed by URL
-        elif re.match(r'^[-*•]\s*[A-Z][a-zA-Z0-9\s&]+(?:—| - |:)\s*https?://', line_stripped):
-            name = re.split(r'(?:—| - |:)\s*https?://', line_stripped)[0]
-            name = name.lstrip('-*•').strip()
-            name = re.sub(r'\[\d+\]', '', name).strip()
-            if name and len(name) > 2 and len(name) < 100:
-                competitors.append(name)
-    
-    # Also try to extract from "Top competitors (detailed)" section with headers
-    # Pattern: "- CompanyName — https://..." where CompanyName is capitalized
-    competitor_headers = re.findall(
-        r'[-*•]\s*([A-Z][a-zA-Z0-9\s&]+?)(?:—| - |:)\s*https?://',
-        text,
-        re.MULTILINE
-    )
+            reused = {name: similar["research"][name] for name in research_tasks}
+        elif mode == "deep" and index is not None:
+            # Upgrading a quick result: the deep run builds on its research (and
+            # the searches it repeats are served by the tool cache)
+            preview = index.get(result_cache_key({**inputs, "mode": "quick"}))
+        if preview is not None:
+            similar = preview
+            inputs = {**inputs, "prior_research": prior_research_text(preview, preview=True)}
+        elif similar is not None and not reused:
+            inputs = {**inputs, "prior_research": prior_research_text(similar)}
+        if similar is not None:
+            logger.info(
+                "Research for %r %s research on %r (similarity %.2f)", inputs["startup_idea"],
+                "reuses" if reused else "builds on", similar["idea"], similar["similarity"],
+            )
+        done = {name: {"raw": raw} for name, raw in (reused or {}).items()}
     
-    for comp in competitor_headers:
-        comp = comp.strip()
-        comp = re.sub(r'\[\d+\]', '', comp).strip()
-        if comp and len(comp) > 2 and len(comp) < 100 and comp not in competitors:
-            competitors.append(comp)
-    
-    # More aggressive pattern: Look for any line with format: "- CompanyName — URL" or "CompanyName — URL"
-    # This catches formats like "HireVue — https://www.hirevue.com/"
-    aggressive_pattern = re.findall(
-        r'(?:^[-*•]\s*|^)([A-Z][a-zA-Z0-9\s&.]+?)\s*[—\-]\s*https?://[^\s]+',
-        text,
-        re.MULTILINE | re.IGNORECASE
-    )
+    # Every task's output is checkpointed under the run id as it finishes, so
+    # a failed or unsatisfactory run can be replayed from any task
+    if checkpoints is not None:
+        checkpoints.start_run(run_id, inputs, mode, parent=replay["run_id"] if replay else None, outputs=done)
+    crew = runtime.new_crew(outputs=done, mode=mode)
     
-    for comp in aggressive_pattern:
-        comp = comp.strip()
-        # Skip common false positives
-        if comp.lower() in ['positioning', 'strengths', 'weaknesses', 'differentiation', 'strategic']:
-            continue
-        if len(comp) > 2 and len(comp) < 100 and comp not in competitors:
-            competitors.append(comp)
+    if job_id is not None:
+        # Looked up here rather than passed in so this also works in worker
+        # processes (which then need a shared store such as SQLite)
+        store = get_job_store()
+        store.start(job_id, list(done) + [task.name for task in crew.tasks], concurrent=len(research_tasks))
+        for name, output in done.items():
+            store.complete_task(job_id, name, {"research": output["raw"]} if name in research_tasks else None)
     
-    # Return unique competitors, limited to top 10
-    return list(dict.fromkeys(competitors))[:10]
-
-
-def extract_summary_without_forecast(text: str) -> str:
-    """
-    Extract all sections from synthesis output EXCEPT:
-    - Growth Forecast & Strategy section (displayed as graph separately)
-    - Sources & Citations section (displayed separately)
+    def on_task(output):
+        if checkpoints is not None:
+            checkpoints.save_task(run_id, output.name, **checkpoint_output(output))
+        if job_id is not None:
+            store.complete_task(job_id, output.name, parse_task_output(output))
+        # Task boundaries are also a point where a cancelled run stops
+        run_budget.check()
     
-    Note: Competitive Intelligence section is kept as-is with all competitor listings
-    """
-    if not text:
-        return "Market research completed successfully."
+    # Once a limit runs out the agents are told to answer with what they
+    # have, so the run still ends in a report (see market_research/budget.py).
+    # The budget also polls the cancel registry and stops a cancelled run
+    run_budget = runtime.RunBudget(**(budget or {}), cancelled=lambda: cancellations.is_cancelled(run_id))
+    
+    # LLM calls and searches queue for the providers' rate limits, shared
+    # with every other run in this process
+    scheduler = get_call_scheduler()
+    ticket = scheduler.ticket(run_id, priority) if scheduler is not None else None
     
-    # Remove Growth Forecast & Strategy section completely
-    # This includes "5-Year Forecast (JSON)" and the JSON block
-    # Match from "## Growth Forecast" or "Growth Forecast & Strategy" or "5-Year Forecast" to next major section
-    forecast_section = re.search(
-        r'(##\s*Growth\s+Forecast.*?|5-Year\s+Forecast.*?)(?=##\s*Strategic|##\s*Sources|Summary\s+of\s+the\s+5-year|$)',
-        text,
-        re.IGNORECASE | re.DOTALL
+    # Spans for tasks, LLM calls and tool calls feed /metrics either way
+    run_trace = runtime.RunTrace(run_id)
+    with run_trace:
+        # A failed stage is retried from the checkpoint (STAGE_RETRIES times),
+        # so e.g. a synthesis error costs one more synthesis, not a new crew
+        for attempt in range(STAGE_RETRIES + 1):
+            crew.task_callback = on_task
+            run_budget.attach(crew)
+            if scheduler is not None:
+                scheduler.attach(crew, ticket)
+            run_trace.attach(crew)
+            try:
+                result = crew.kickoff(inputs=inputs)
+                break
+            except RunCancelled:
+                # Not retried; the completed tasks stay checkpointed, so a
+                # replay can resume the run
+                if checkpoints is not None:
+                    checkpoints.finish_run(run_id, error="Cancelled", cancelled=True)
+                logger.info("Research run %s cancelled after %.1fs", run_id, run_budget.cancelled_at or 0.0)
+                raise
+            except Exception as e:
+                done.update(
+                    (task.name, checkpoint_output(task.output)) for task in crew.tasks if task.output is not None
+                )
+                # A run whose budget ran out is not retried: the retry would
+                # only get the agents' wound-down final answers again
+                if attempt == STAGE_RETRIES or run_budget.exhausted is not None:
+                    if checkpoints is not None:
+                        checkpoints.finish_run(run_id, error=str(e))
+                        raise RuntimeError(
+                            f"{e} (research run {run_id}; replay it with POST /research/runs/{run_id}/replay)"
+                        ) from e
+                    raise
+                logger.warning("Research run %s failed (%s); retrying from its completed tasks", run_id, e)
+                crew = runtime.new_crew(outputs=done, mode=mode)
+    if checkpoints is not None:
+        checkpoints.finish_run(run_id)
+    
+    breakdown = run_trace.breakdown(include_spans=trace)
+    breakdown["budget"] = run_budget.usage()
+    breakdown["scheduler"] = ticket.usage() if ticket is not None else None
+    logger.info(
+        "Research run %s took %.1fs (%d LLM calls, %d tool calls, %d tokens, %.1fs queued for rate limits)%s",
+        run_trace.run_id, breakdown["seconds"], breakdown["totals"]["llm_calls"],
+        breakdown["totals"]["tool_calls"],
+        breakdown["totals"]["prompt_tokens"] + breakdown["totals"]["completion_tokens"],
+        ticket.usage()["queue_wait_seconds"] if ticket is not None else 0.0,
+        f"; {run_budget.exhausted} budget ran out" if run_budget.exhausted else "",
     )
+    if job_id is not None and trace:
+        store.set_trace(job_id, breakdown)
+    
+    # Collect task outputs by name, including tasks whose output was carried
+    # over (reused or replayed). The research tasks run in parallel, so
+    # their combined output forms the research report.
+    outputs = collect_outputs(crew)
+    research = {name: str(outputs[name].raw) for name in research_tasks if name in outputs}
+    research_output = "\n\n".join(research[name] for name in research_tasks if name in research).strip()
+    synthesis_output = str(outputs["synthesis_task"].raw) if "synthesis_task" in outputs else str(result)
+    
+    # The forecast task returns validated ForecastParameters (see
+    # validate_forecast_parameters), so there is no text to scrape and no
+    # placeholder to fall back to; the series are computed from them
+    forecast = project(outputs["forecast_task"].pydantic)
+    
+    # Parse the synthesis report once for summary, competitors and sources;
+    # the research report is only parsed if needed
+    report = parse_report(synthesis_output)
+    
+    # Competitors and sources come from the synthesis output (Competitive
+    # Intelligence and Sources & Citations sections), with research as fallback
+    competitors = report.competitors
+    sources = report.sources
+    if not competitors or not sources:
+        research_report = parse_report(research_output)
+        competitors = competitors or research_report.competitors or ["No competitors found"]
+        sources = sources or research_report.sources or ["Various market research sources"]
+    
+    # Only complete, first-hand research is indexed, so reused (or replayed)
+    # research keeps its age and cut-short research is not passed on. A
+    # failed index write is logged; the run itself succeeded
+    if index is not None and not reused and replay is None and not run_budget.exhausted and research:
+        try:
+            index.add(result_cache_key(inputs), inputs["startup_idea"], research, competitors, sources, mode=mode)
+        except Exception:
+            logger.exception("Could not index the research of run %s for reuse", run_id)
+    
+    # Competitor entries feed the profile index the competitor researcher
+    # checks before searching: the competitor research first, then the
+    # synthesis's Competitive Intelligence section for anything it lacks.
+    # Reused research was indexed by the run that did it. A failure here is
+    # logged; it must not discard the finished report
+    try:
+        profiles = get_competitor_profiles()
+        if profiles is not None and not reused and not run_budget.exhausted:
+            entries = parse_competitor_profiles(research.get("competitor_task", ""))
+            known = {entry["name"].lower() for entry in entries}
+            entries += [
+                entry for entry in parse_competitor_profiles(synthesis_output) if entry["name"].lower() not in known
+            ]
+            if entries:
+                profiles.add(entries, idea=inputs["startup_idea"])
+    except Exception:
+        logger.exception("Could not index the competitor profiles of research run %s", run_id)
     
-    if forecast_section:
-        text = text.replace(forecast_section.group(1), '')
+    # Everything EXCEPT forecast and sources
+    summary = report.summary
     
-    # Also remove standalone "5-Year Forecast (JSON)" sections
-    json_forecast_pattern = re.search(
-        r'5-Year\s+Forecast\s*\(JSON\)[\s\S]*?\{[\s\S]*?"title"[\s\S]*?"series"[\s\S]*?\}[\s\S]*?(?=Summary\s+of\s+the\s+5-year|##\s*Strategic|##\s*Sources|$)',
-        text,
-        re.IGNORECASE | re.DOTALL
+    # Build the response
+    response = ResearchResponse(
+        summary=summary,
+        competitors=competitors,
+        forecast=forecast,
+        sources=sources,
+        similar_research=SimilarResearch(
+            idea=similar["idea"], similarity=similar["similarity"],
+            mode="reused" if reused else "upgraded" if preview is not None else "prior_knowledge",
+        ) if similar is not None else None,
+        degraded=run_budget.exhausted,
+        mode=mode,
+        run_id=run_id,
     )
     
-    if json_forecast_pattern:
-        text = text.replace(json_forecast_pattern.group(0), '')
-    
-    # Remove Sources & Citations section completely (displayed separately)
-    # Match various patterns: "## Sources", "## Sources & Citations", "## 📚 Sources & Citations", etc.
-    sources_patterns = [
-        r'##\s*📚\s*Sources[^\#]*?$',
-        r'##\s*Sources\s*&?\s*Citations?[^\#]*?$',
-        r'##\s*Sources[^\#]*?$',
-        r'###\s*Sources[^\#]*?$',
-        r'###\s*Sources\s*&?\s*Citations?[^\#]*?$',
-    ]
-    
-    for pattern in sources_patterns:
-        sources_section = re.search(pattern, text, re.IGNORECASE | re.DOTALL | re.MULTILINE)
-        if sources_section:
-            text = text.replace(sources_section.group(0), '')
-            break
-    
-    # Remove citation-style sources (lines starting with [1], [2], etc. followed by URLs)
-    # This catches formatted citations like "[1] Grand View Research — ... https://..."
-    # Pattern matches: [number] followed by any text and a URL, across multiple lines
-    citation_block_pattern = r'(?:^|\n)(\[\d+\][^\n]*https?://[^\n]*(?:\n|$))+(?=\n\n|\n[^\[]|$)'
-    text = re.sub(citation_block_pattern, '', text, flags=re.MULTILINE)
-    
-    # Also remove any remaining standalone citation lines
-    citation_line_pattern = r'^\[\d+\][^\n]*https?://[^\n]*(?:\n|$)'
-    text = re.sub(citation_line_pattern, '', text, flags=re.MULTILINE)
-    
-    # Keep Competitive Intelligence section as-is (no filtering)
-    # The entire section including competitor listings will be displayed
-    
-    # Clean up extra whitespace
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    
-    return text.strip() if text.strip() else "Market research completed successfully."
-
-
-def extract_sources_from_text(text: str) -> list:
-    """Extract source URLs and citations from text, deduplicated"""
-    sources = []
-    seen_urls = set()
-    
-    # Find URLs - extract from markdown links and plain URLs
-    # Pattern 1: Markdown links [text](url)
-    markdown_link_pattern = r'\[([^\]]+)\]\(([^\)]+)\)'
-    markdown_links = re.findall(markdown_link_pattern, text)
-    for link_text, url in markdown_links:
-        if url.startswith('http') and url not in seen_urls:
-            sources.append(url)
-            seen_urls.add(url)
-    
-    # Pattern 2: Plain URLs
-    url_pattern = r'https?://[^\s\)\]"]+'
-    urls = re.findall(url_pattern, text)
-    for url in urls:
-        # Clean URL (remove trailing punctuation)
-        url = url.rstrip('.,;:!?)')
-        if url not in seen_urls:
-            sources.append(url)
-            seen_urls.add(url)
-    
-    # If no URLs found, look for citation-style references
-    if not sources:
-        lines = text.split('\n')
-        for line in lines:
-            line_stripped = line.strip()
-            if line_stripped and ('source' in line_stripped.lower() or 'citation' in line_stripped.lower() or line_stripped.startswith('[')):
-                # Try to extract URL from the line
-                url_match = re.search(url_pattern, line_stripped)
-                if url_match:
-                    url = url_match.group(0).rstrip('.,;:!?)')
-                    if url not in seen_urls:
-                        sources.append(url)
-                        seen_urls.add(url)
-                elif line_stripped not in seen_urls:
-                    sources.append(line_stripped)
-                    seen_urls.add(line_stripped)
-    
-    # Limit to 10 unique sources
-    unique_sources = list(seen_urls) if seen_urls else sources[:10]
-    return unique_sources[:10] if unique_sources else ["Various market research sources"]
+    # Every report is archived (replays and cut-short runs included), so past
+    # reports can be listed and searched without running the crew again. The
+    # run has finished, so a failed archive write is logged, not raised
+    try:
+        archive = get_report_archive()
+        if archive is not None:
+            archive.add(inputs["startup_idea"], response.model_dump())
+    except Exception:
+        logger.exception("Could not archive the report of research run %s", run_id)
+    
+    return response.model_dump()
 
 
 @app.get("/")
@@ -372,95 +459,617 @@ async def root():
     return {"message": "ScoutAI API is running", "status": "healthy"}
 
 
+def cached_result(inputs: dict) -> Optional[dict]:
+    """Look up a cached result entry for these inputs"""
+    if result_cache is None:
+        return None
+    return result_cache.get(result_cache_key(inputs))
+
+
+def cache_result(inputs: dict, result: dict) -> Optional[dict]:
+    """Store a finished result and return its cache entry"""
+    if result_cache is None:
+        return None
+    return result_cache.set(result_cache_key(inputs), result)
+
+
+def set_cache_headers(response: Response, entry: Optional[dict]):
+    """Attach ETag and Cache-Control headers for a cached result entry"""
+    if entry is None:
+        response.headers["Cache-Control"] = "no-store"
+        return
+    max_age = max(0, int(entry["expires_at"] - time.time()))
+    response.headers["ETag"] = entry["etag"]
+    response.headers["Cache-Control"] = f"private, max-age={max_age}"
+
+
+def join_research(inputs: dict, job_id: Optional[str] = None, trace: bool = False,
+                  budget: Optional[dict] = None, priority: str = "interactive"):
+    """
+    Start a research run on the worker pool (caching its result), or join
+    an identical run that is already in flight. Await the returned flight
+    with research_flights.wait(), which gives (result, cache entry or None).
+    `priority` only applies to a run this starts; a joined run keeps its own.
+    """
+    async def start(flight):
+        result = await run_flight(flight, inputs, job_id, trace, budget, priority=priority)
+        # A run cut short by its budget is returned but not cached
+        return result, cache_result(inputs, result) if not result.get("degraded") else None
+    
+    return research_flights.join(run_key(inputs), start, job_id=job_id)
+
+
+async def run_flight(flight, inputs: dict, job_id: Optional[str] = None, trace: bool = False,
+                     budget: Optional[dict] = None, replay: Optional[dict] = None,
+                     priority: str = "interactive") -> dict:
+    """Run execute_research for a flight on the worker pool, under the flight's run id"""
+    try:
+        return await research_executor.run(
+            execute_research, inputs, job_id, trace, budget, replay, flight.run_id, priority,
+            on_start=flight.mark_started,
+        )
+    except RunCancelled:
+        cancellations.record_stopped(
+            time.monotonic() - flight.started_at if flight.started_at is not None else 0.0,
+            research_executor.metrics()["avg_run_seconds"],
+        )
+        raise
+    finally:
+        cancellations.clear(flight.run_id)
+
+
+async def research_once(inputs: dict, budget: Optional[dict] = None, priority: str = "interactive") -> tuple:
+    """Run (or join) research for these inputs and return (result, cache entry or None)"""
+    return await research_flights.wait(join_research(inputs, budget=budget, priority=priority))
+
+
+async def until_disconnected(request: Request, awaitable):
+    """
+    Await `awaitable`, but stop waiting (cancelling it) if the client
+    disconnects first, so a run nobody is waiting for can be dropped (or
+    stopped, see SingleFlight).
+    """
+    task = asyncio.ensure_future(awaitable)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            cancellations.record_request("disconnect")
+            task.cancel()
+            raise HTTPException(status_code=499, detail="Client disconnected")
+
+
+@app.post("/forecast", response_model=Forecast)
+async def compute_forecast(
+    params: ForecastParameters,
+    samples: int = Query(FORECAST_SAMPLES, ge=0, le=100000, description="Monte Carlo samples for the bands (0 = none)"),
+):
+    """
+    Compute a forecast from its parameters without running the crew, e.g. a
+    report's `forecast.parameters` with different assumptions. 422 if the
+    parameters cannot be used.
+    """
+    error = parameter_errors(params)
+    if error is not None:
+        raise HTTPException(status_code=422, detail=error)
+    return project(params, samples=samples)
+
+
 @app.post("/research/run", response_model=ResearchResponse)
-async def run_research(request: ResearchRequest):
+async def run_research(request: ResearchRequest, http_request: Request, response: Response):
     """
     Run market research analysis on a startup idea.
     
+    The crew runs on the research worker pool, so the event loop keeps serving
+    other requests. When the pool and its queue are full this returns 503 with
+    a Retry-After header instead of queueing without bound.
+    
+    Results are cached on the normalized idea, start year and unit. Cached
+    results come back with an ETag; a matching If-None-Match gets a 304.
+    Identical requests that arrive while a run is in flight share that run.
+    If the client disconnects, the run is stopped once nobody else waits on it.
+    
     Args:
         request: ResearchRequest containing the startup_idea
         
     Returns:
         ResearchResponse with summary, competitors, forecast, and sources
     """
+    inputs = build_research_inputs(request)
+    
+    entry = cached_result(inputs)
+    if entry is not None:
+        if_none_match = http_request.headers.get("if-none-match", "")
+        if entry["etag"] in [tag.strip() for tag in if_none_match.split(",")]:
+            not_modified = Response(status_code=304)
+            set_cache_headers(not_modified, entry)
+            return not_modified
+        set_cache_headers(response, entry)
+        return ResearchResponse(**entry["result"])
+    
     try:
-        # Instantiate the crew (import is at the top of the file now)
-        market_research_crew = MarketResearch()
-        
-        # Run the crew with the startup idea and topic
-        inputs = {
-            "startup_idea": request.startup_idea,
-            "topic": request.startup_idea,
-            "start_year": "2025",
-            "unit": "USD"
-        }
-        result = market_research_crew.crew().kickoff(inputs=inputs)
-        
-        # Access individual task outputs
-        # CrewAI stores task outputs in result.tasks_output (list of TaskOutput objects)
-        tasks_output = result.tasks_output if hasattr(result, 'tasks_output') else []
-        
-        # Extract outputs from each task
-        # NEW Task order (3 tasks): research_task, forecast_task, synthesis_task
-        research_output = str(tasks_output[0].raw) if len(tasks_output) > 0 else ""
-        forecast_output = str(tasks_output[1].raw) if len(tasks_output) > 1 else ""
-        synthesis_output = str(tasks_output[2].raw) if len(tasks_output) > 2 else str(result)
-        
-          # Debug logging (can be removed in production)
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.debug(f"Forecast output length: {len(forecast_output)}")
-        logger.debug(f"Forecast output preview: {forecast_output[:500] if forecast_output else 'Empty'}")
-        
-        # Parse forecast JSON - search in both forecast_output and synthesis_output
-        # Sometimes the JSON is in the synthesis output instead
-        forecast_data = extract_json_from_text(forecast_output)
-        
-        # If extraction failed or series is empty, try synthesis output
-        if not forecast_data.get("series") or len(forecast_data.get("series", [])) == 0:
-            logger.debug("Forecast not found in forecast_output, trying synthesis_output")
-            forecast_data = extract_json_from_text(synthesis_output)
-        
-        # If still no valid forecast, use default
-        if not forecast_data.get("series") or len(forecast_data.get("series", [])) == 0:
-            logger.warning("No valid forecast found, using default forecast")
-            forecast_data = get_default_forecast()
-        
-        logger.debug(f"Final forecast_data: {forecast_data}")
-        
-        # Extract competitors from synthesis output (Competitive Intelligence section)
-        # Also check research_output as fallback
-        competitors = extract_competitors_from_text(synthesis_output)
-        if not competitors or len(competitors) == 0:
-            competitors = extract_competitors_from_text(research_output)
-        if not competitors or len(competitors) == 0:
-            competitors = ["No competitors found"]
-        
-        # Extract sources from synthesis output (Sources & Citations section)
-        sources = extract_sources_from_text(synthesis_output)
-        if not sources or len(sources) == 0:
-            sources = extract_sources_from_text(research_output)
-        if not sources or len(sources) == 0:
-            sources = ["Various market research sources"]
-        
-        # Extract all sections EXCEPT forecast, explicit competitors, and sources
-        summary = extract_summary_without_forecast(synthesis_output)
-        
-        # Build the response
-        response = ResearchResponse(
-            summary=summary,
-            competitors=competitors,
-            forecast=forecast_data,
-            sources=sources
+        result, entry = await until_disconnected(http_request, research_once(inputs, build_run_budget(request)))
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Research capacity exhausted, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
         )
-        
-        return response
-        
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error running market research: {str(e)}"
         )
+    
+    set_cache_headers(response, entry)
+    return ResearchResponse(**result)
+
+
+@app.post("/research/batch")
+async def research_batch(batch: ResearchBatchRequest):
+    """
+    Research many ideas in one request, streaming NDJSON as each one finishes.
+    
+    At most `concurrency` ideas run at once (default and cap: the worker pool
+    size). Duplicate ideas (after normalization) run once, and so do ideas
+    already being researched by other requests; cached results are returned
+    straight away, and identical searches and scrapes that overlap across
+    the batch are fetched once.
+    
+    Each line is {"index", "startup_idea", "status", "result" or "error",
+    "cached", "duplicate", "seconds"} in completion order; the last line is a
+    summary with "done": true.
+    """
+    concurrency = min(batch.concurrency or research_executor.max_workers, research_executor.max_workers)
+    slots = asyncio.Semaphore(concurrency)
+    runs = {}  # result cache key -> task, so duplicate ideas share one run
+    started = time.monotonic()
+    shared_before = shared_fetches.metrics()
+    
+    async def research(inputs: dict, budget: dict):
+        async with slots:
+            entry = cached_result(inputs)
+            if entry is not None:
+                return entry["result"], True
+            # Batch runs yield the providers' rate limits to interactive runs
+            result, _ = await research_once(inputs, budget, priority="batch")
+            return result, False
+    
+    async def research_item(index: int, request: ResearchRequest) -> dict:
+        inputs = build_research_inputs(request)
+        key = result_cache_key(inputs)
+        duplicate = key in runs
+        if not duplicate:
+            runs[key] = asyncio.ensure_future(research(inputs, build_run_budget(request)))
+        line = {"index": index, "startup_idea": request.startup_idea, "duplicate": duplicate}
+        try:
+            # Shielded so one waiter going away does not cancel a shared run
+            result, cached = await asyncio.shield(runs[key])
+            line.update(status="succeeded", result=result, cached=cached)
+        except QueueFullError:
+            line.update(status="failed", error="Research capacity exhausted, please retry later")
+        except Exception as e:
+            logger.exception("Batch research for %r failed", request.startup_idea)
+            line.update(status="failed", error=f"Error running market research: {str(e)}")
+        line["seconds"] = round(time.monotonic() - started, 3)
+        return line
+    
+    async def lines():
+        items = [asyncio.ensure_future(research_item(i, r)) for i, r in enumerate(batch.requests)]
+        counts = {"succeeded": 0, "failed": 0}
+        try:
+            for next_item in asyncio.as_completed(items):
+                line = await next_item
+                counts[line["status"]] += 1
+                yield json.dumps(line) + "\n"
+        finally:
+            # Client gone (or done): drop ideas that have not started yet and
+            # stop the ones that are running (unless others wait on them too)
+            if any(not task.done() for task in runs.values()):
+                cancellations.record_request("disconnect")
+            for task in [*items, *runs.values()]:
+                task.cancel()
+        shared_after = shared_fetches.metrics()
+        yield json.dumps({
+            "done": True,
+            "ideas": len(batch.requests),
+            "unique_ideas": len(runs),
+            **counts,
+            "concurrency": concurrency,
+            "seconds": round(time.monotonic() - started, 3),
+            "shared_fetches": {
+                tool: count - shared_before.get(tool, 0) for tool, count in shared_after.items()
+            },
+        }) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/research/jobs", response_model=ResearchJob, status_code=202)
+async def create_research_job(request: ResearchRequest, response: Response, trace: bool = Query(False)):
+    """
+    Submit a research run in the background and return its job id right away.
+    
+    Poll GET /research/jobs/{id} for per-task progress and the final result.
+    With ?trace=true the job also gets a per-task timing breakdown and spans.
+    """
+    job = submit_research_job(build_research_inputs(request), trace=trace, budget=build_run_budget(request))
+    
+    response.headers["Location"] = f"/research/jobs/{job['id']}"
+    return job
+
+
+def submit_research_job(inputs: dict, trace: bool = False, budget: Optional[dict] = None) -> dict:
+    """
+    Create a job and start running it in the background.
+    
+    A cached result completes the job immediately without running the crew,
+    and a resubmission of a job that is still running returns that job.
+    """
+    entry = cached_result(inputs)
+    if entry is not None:
+        job = job_store.create(inputs)
+        job_store.succeed(job["id"], entry["result"])
+        return job_store.get(job["id"])
+    
+    flight = research_flights.get(run_key(inputs))
+    if flight is not None and flight.job_id is not None:
+        job = job_store.get(flight.job_id)
+        if job is not None and job["status"] in ("queued", "running"):
+            return job
+    
+    if research_executor.is_saturated():
+        raise HTTPException(
+            status_code=503,
+            detail="Research capacity exhausted, please retry later",
+            headers={"Retry-After": str(research_executor.retry_after())}
+        )
+    
+    job = job_store.create(inputs)
+    # Joined right away (not in the task) so a resubmission finds this run
+    flight = join_research(inputs, job["id"], trace, budget)
+    task = asyncio.create_task(run_research_job(job["id"], flight))
+    _job_tasks[job["id"]] = task
+    task.add_done_callback(lambda _: _job_tasks.pop(job["id"], None))
+    return job
+
+
+async def run_research_job(job_id: str, flight):
+    """Wait for a submitted job's run and store its outcome"""
+    try:
+        # The flight may be an identical run started elsewhere, in which case
+        # per-task progress is recorded on whichever job started it
+        result, _ = await research_flights.wait(flight)
+    except RunCancelled:
+        job_store.cancel(job_id)
+    except QueueFullError:
+        job_store.fail(job_id, "Research capacity exhausted, please resubmit later")
+    except Exception as e:
+        logger.exception("Research job %s failed", job_id)
+        job_store.fail(job_id, f"Error running market research: {str(e)}")
+    else:
+        job_store.succeed(job_id, result)
+
+
+@app.get("/research/jobs/{job_id}", response_model=ResearchJob)
+async def get_research_job(job_id: str):
+    """Return a research job's status, per-task progress and result"""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Research job not found or expired")
+    return job
+
+
+@app.delete("/research/jobs/{job_id}", response_model=ResearchJob)
+async def cancel_research_job(job_id: str):
+    """
+    Cancel a queued or running job. A queued run is dropped; a running one
+    stops at its next agent step or tool call (unless an identical request
+    is still waiting on it). Its finished tasks stay checkpointed, so
+    POST /research/runs/{job_id}/replay can resume it. 409 if the job has
+    already finished.
+
+    A job running in another web worker is stopped through the shared
+    cancel registry; that worker stops the run even if it coalesced other
+    requests onto it.
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Research job not found or expired")
+    if job["status"] not in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Research job already {job['status']}")
+    cancellations.record_request("delete")
+    job_store.cancel(job_id)
+    task = _job_tasks.get(job_id)
+    if task is not None:
+        # The job stops waiting on its run, which is dropped or stopped once
+        # no other request waits on it (see SingleFlight)
+        task.cancel()
+    else:
+        # Started by another web worker (the job's id is its run id)
+        cancellations.request(job_id)
+    return job_store.get(job_id)
+
+
+@app.get("/research/runs/{run_id}", response_model=ResearchRun)
+async def get_research_run(run_id: str, outputs: bool = Query(False, description="Include each task's raw output")):
+    """
+    Get a run's checkpoints: which tasks finished (and their raw outputs with
+    ?outputs=true). A job's id is also its run id.
+    """
+    checkpoints = get_checkpoint_store()
+    run = checkpoints.get_run(run_id) if checkpoints is not None else None
+    if run is None:
+        raise HTTPException(status_code=404, detail="Research run not found or expired")
+    return ResearchRun(
+        run_id=run["run_id"],
+        startup_idea=run["inputs"]["startup_idea"],
+        mode=run["mode"],
+        status=run["status"],
+        error=run["error"],
+        parent=run["parent"],
+        tasks=[
+            TaskCheckpoint(
+                task=task,
+                completed_at=datetime.fromtimestamp(output["created_at"], timezone.utc),
+                output=output["raw"] if outputs else None,
+            )
+            for task, output in run["outputs"].items()
+        ],
+        created_at=datetime.fromtimestamp(run["created_at"], timezone.utc),
+        updated_at=datetime.fromtimestamp(run["updated_at"], timezone.utc),
+    )
+
+
+@app.post("/research/runs/{run_id}/replay", response_model=ResearchResponse)
+async def replay_research_run(run_id: str, replay: ReplayRequest, http_request: Request):
+    """
+    Rerun part of a checkpointed run and return the new result.
+    
+    `from_task` and the tasks that depend on it run again; every other task
+    reuses its checkpointed output, so e.g. from_task=synthesis_task costs
+    one LLM call. Without from_task a failed run resumes where it stopped.
+    The replay is a new run (with this one as its parent), and its result
+    replaces the cached result for the idea.
+    """
+    checkpoints = get_checkpoint_store()
+    run = checkpoints.get_run(run_id) if checkpoints is not None else None
+    if run is None:
+        raise HTTPException(status_code=404, detail="Research run not found or expired")
+    request = ResearchRequest(startup_idea=run["inputs"]["startup_idea"], mode=run["mode"], budget=replay.budget)
+    budget = build_run_budget(request)
+    
+    async def start(flight):
+        return await run_flight(flight, run["inputs"], None, False, budget, {"run_id": run_id, "from_task": replay.from_task})
+    
+    try:
+        # As a flight, identical concurrent replays share one run, and a
+        # replay whose client disconnects is dropped or stopped
+        result = await until_disconnected(
+            http_request, research_flights.run(f"replay:{run_id}:{replay.from_task}", start)
+        )
+    except HTTPException:
+        raise
+    except ReplayError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Research capacity exhausted, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error replaying market research: {str(e)}"
+        )
+    
+    if not result.get("degraded"):
+        cache_result(run["inputs"], result)
+    return ResearchResponse(**result)
+
+
+def report_page(reports: list, next_before: Optional[int]) -> ReportPage:
+    return ReportPage(
+        reports=[
+            ArchivedReportSummary(**{**report, "created_at": datetime.fromtimestamp(report["created_at"], timezone.utc)})
+            for report in reports
+        ],
+        next_before=next_before,
+    )
+
+
+def report_archive():
+    archive = get_report_archive()
+    if archive is None:
+        raise HTTPException(status_code=404, detail="The report archive is disabled")
+    return archive
+
+
+@app.get("/reports", response_model=ReportPage)
+async def list_reports(
+    limit: int = Query(20, ge=1, le=100, description="Reports per page"),
+    before: Optional[int] = Query(None, description="Cursor from the previous page's next_before"),
+):
+    """Archived reports, newest first, a page at a time"""
+    return report_page(*report_archive().recent(limit, before))
+
+
+@app.get("/reports/search", response_model=ReportPage)
+async def search_reports(
+    q: Optional[str] = Query(None, description='Words or "quoted phrases" in the idea, summary or competitor names'),
+    competitor: Optional[str] = Query(None, description="A competitor the report lists"),
+    domain: Optional[str] = Query(None, description="A source domain the report cites, e.g. statista.com"),
+    limit: int = Query(20, ge=1, le=100, description="Reports per page"),
+    before: Optional[int] = Query(None, description="Cursor from the previous page's next_before"),
+):
+    """
+    Archived reports matching every given filter, newest first. Text
+    matches carry a snippet of the summary with the matched words in
+    **bold**. 422 without any filter.
+    """
+    # Blank parameters (e.g. an empty search box) are not filters
+    q, competitor, domain = (value if value and value.strip() else None for value in (q, competitor, domain))
+    if q is None and competitor is None and domain is None:
+        raise HTTPException(status_code=422, detail="Give at least one of q, competitor or domain")
+    return report_page(*report_archive().search(q, competitor, domain, limit, before))
+
+
+@app.get("/reports/{report_id}", response_model=ArchivedReport)
+async def get_report(report_id: int):
+    """An archived report in full, as /research/run returned it"""
+    report = report_archive().get(report_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    report["created_at"] = datetime.fromtimestamp(report["created_at"], timezone.utc)
+    return report
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.get("/research/stream")
+async def stream_research(
+    request: Request,
+    startup_idea: Optional[str] = Query(None, description="Startup idea to research (starts a new job)"),
+    job_id: Optional[str] = Query(None, description="Existing job to follow, e.g. when reconnecting"),
+    mode: Literal["quick", "deep"] = Query("deep", description="Research mode for a new job"),
+):
+    """
+    Stream research progress as Server-Sent Events.
+    
+    Events:
+        job:   {"id": ...} once, so clients can reconnect with ?job_id=
+        task:  {"task": name, ...parsed partial output} as each crew task finishes
+               (research markdown, then the forecast, then summary/competitors/sources)
+        done:  the final ResearchResponse
+        error: {"detail": ...} if the run failed or the job was cancelled
+    
+    Disconnecting does not cancel the job (reconnect with ?job_id=); use
+    DELETE /research/jobs/{id} for that.
+    """
+    if job_id is not None:
+        job = job_store.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Research job not found or expired")
+    elif startup_idea is not None:
+        try:
+            research_request = ResearchRequest(startup_idea=startup_idea, mode=mode)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+        job = submit_research_job(build_research_inputs(research_request), budget=build_run_budget(research_request))
+    else:
+        raise HTTPException(status_code=422, detail="Either startup_idea or job_id is required")
+    
+    async def events():
+        yield format_sse("job", {"id": job["id"]})
+        sent = set()
+        idle = 0.0
+        while True:
+            current = job_store.get(job["id"])
+            if current is None:
+                yield format_sse("error", {"detail": "Research job expired"})
+                return
+            
+            # Emit partials in task order as they complete
+            for entry in current["progress"]:
+                name = entry["task"]
+                if name not in sent and name in current["partials"]:
+                    sent.add(name)
+                    idle = 0.0
+                    yield format_sse("task", {"task": name, **current["partials"][name]})
+            
+            if current["status"] == "succeeded":
+                yield format_sse("done", current["result"])
+                return
+            if current["status"] in ("failed", "cancelled"):
+                yield format_sse("error", {"detail": current["error"]})
+                return
+            if await request.is_disconnected():
+                # The job keeps running; the client can reconnect with ?job_id=
+                return
+            
+            await asyncio.sleep(STREAM_POLL_INTERVAL)
+            idle += STREAM_POLL_INTERVAL
+            if idle >= STREAM_KEEPALIVE_INTERVAL:
+                # SSE comment line keeps proxies from closing an idle stream
+                idle = 0.0
+                yield ": keep-alive\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Research worker pool metrics (queue depth, in-flight runs, counters).
+    With several web workers each reports its own; `web_worker` says which
+    one answered.
+    """
+    return {
+        "web_worker": {"pid": os.getpid(), "workers": int(os.getenv("WEB_CONCURRENCY", "1"))},
+        "research": research_executor.metrics(),
+        "result_cache": result_cache.metrics() if result_cache is not None else None,
+        "tool_cache": get_tool_cache().metrics() if get_tool_cache() is not None else None,
+        "shared_fetches": shared_fetches.metrics(),
+        "scrape": scrape_stats.metrics(),
+        "coalesced_runs": research_flights.metrics(),
+        "similar_research": get_similarity_index().metrics() if get_similarity_index() is not None else None,
+        "checkpoints": get_checkpoint_store().metrics() if get_checkpoint_store() is not None else None,
+        "report_archive": get_report_archive().metrics() if get_report_archive() is not None else None,
+        "competitor_profiles": get_competitor_profiles().metrics() if get_competitor_profiles() is not None else None,
+        "cancellations": cancellations.metrics(),
+        "scheduler": get_call_scheduler().metrics() if get_call_scheduler() is not None else None,
+        "warmup": warmup_status(),
+        "tracing": tracing_metrics.snapshot(),
+    }
+
+
+@app.get("/metrics/prometheus")
+async def prometheus_metrics():
+    """Worker pool gauges and task/LLM/tool counters in Prometheus text format"""
+    pool = research_executor.metrics()
+    lines = []
+    for name in ("queue_depth", "in_flight"):
+        lines += [f"# TYPE scout_research_{name} gauge", f"scout_research_{name} {pool[name]}"]
+    for name in ("completed", "failed", "rejected", "cancelled"):
+        lines += [f"# TYPE scout_research_{name}_total counter", f"scout_research_{name}_total {pool[name]}"]
+    scheduler = get_call_scheduler()
+    if scheduler is not None:
+        lines += ["# TYPE scout_scheduler_queue_wait_seconds_total counter"]
+        for provider, stats in scheduler.metrics().items():
+            for priority, seconds in stats["wait_seconds"].items():
+                lines.append(
+                    f'scout_scheduler_queue_wait_seconds_total{{provider="{provider}",priority="{priority}"}} {seconds}'
+                )
+        lines += ["# TYPE scout_scheduler_rate_limited_total counter"] + [
+            f'scout_scheduler_rate_limited_total{{provider="{provider}"}} {stats["rate_limited"]}'
+            for provider, stats in scheduler.metrics().items()
+        ]
+    body = "\n".join(lines) + "\n" + tracing_metrics.prometheus()
+    return Response(content=body, media_type="text/plain; version=0.0.4")
+
+
+@app.get("/ready")
+async def ready(response: Response):
+    """
+    Readiness: 200 once crewai is imported and the crew is prebuilt, 503
+    while warming up (or if warmup failed). Includes import, prebuild and
+    per-run setup timings.
+    """
+    status = warmup_status()
+    if status["status"] != "ready":
+        response.status_code = 503
+    return status
 
 
 @app.get("/health")
@@ -0,0 +1,384 @@
+"""
+Single-pass parser for crew report markdown.
+
+The synthesis (and research) output is split into lines once and walked in a
+single linear pass that tracks the current markdown section. Along the way it
+collects the forecast JSON candidates, competitor names, source URLs and the
+summary text (everything except the forecast and sources sections).
+
+All patterns are precompiled and applied per line. None of them can
+backtrack across lines, and JSON objects are located by a brace/string
+tokenizer, so parsing time grows linearly with the size of the output.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+MAX_COMPETITORS = 10
+MAX_SOURCES = 10
+DEFAULT_SUMMARY = "Market research completed successfully."
+DEFAULT_SOURCES = ["Various market research sources"]
+
+HEADING_RE = re.compile(r"^\s{0,3}(#{1,6})\s*(.*?)\s*#*\s*$")
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+BULLET_RE = re.compile(r"^(\s*)(?:[-*•+]|\d{1,3}[.)])\s+(.*)$")
+TABLE_SEPARATOR_RE = re.compile(r"^[\s|:\-]+$")
+CITATION_LINE_RE = re.compile(r"^\s*\[\d+\][^\n]*https?://")
+CITATION_RE = re.compile(r"\[\d+\]")
+MD_LINK_RE = re.compile(r"\[([^\]\n]*)\]\(([^)\s]*)\)")
+LEADING_LINK_RE = re.compile(r"^(?:\*\*)?\[([^\]\n]+)\]\((https?://[^)\s]*)\)")
+LEADING_BOLD_RE = re.compile(r"^\*\*([^*\n]+)\*\*")
+URL_RE = re.compile(r"https?://[^\s)\]\"'<>]+")
+NAME_SEPARATOR_RE = re.compile(r"\s+[—–]\s*|\s*[—–]\s+|\s+-\s+|:\s*(?=https?://)|\s*\(?https?://")
+PLAIN_COMPETITOR_RE = re.compile(r"^([A-Z][\w&.' ]{1,60}?)\s*(?:—|–| - |:)\s*https?://")
+FORECAST_SUMMARY_RE = re.compile(r"summary\s+of\s+the\s+5-year", re.IGNORECASE)
+FORECAST_JSON_LABEL_RE = re.compile(r"5-year\s+forecast\s*\(json\)", re.IGNORECASE)
+JSON_TOKEN_RE = re.compile(r'"(?:[^"\\\n]|\\.)*"|[{}]')
+BLANK_RUN_RE = re.compile(r"\n{3,}")
+
+# Bullet labels used inside competitor entries; never competitor names
+COMPETITOR_LABELS = {
+    "strengths", "strength", "weaknesses", "weakness", "weakness/threat", "threat", "threats",
+    "differentiation", "positioning", "pricing", "summary", "opportunities", "risks",
+    "strategic", "key findings", "market gaps", "competitive advantages", "note",
+}
+
+
+@dataclass
+class ParsedReport:
+    """Everything the API needs from one report, extracted in a single pass"""
+    summary: str
+    competitors: List[str] = field(default_factory=list)
+    sources: List[str] = field(default_factory=list)
+    forecast: Optional[dict] = None
+
+
+def _section_kind(title: str) -> str:
+    title = title.lower()
+    if "forecast" in title:
+        return "forecast"
+    if "source" in title or "citation" in title or "reference" in title:
+        return "sources"
+    if "competitive" in title or "competitor" in title:
+        return "competitors"
+    return "other"
+
+
+def _as_forecast(candidate: str) -> Optional[dict]:
+    """Parse a JSON candidate and return it if it looks like a forecast"""
+    if '"series"' not in candidate:
+        return None
+    try:
+        parsed = json.loads(candidate)
+    except ValueError:
+        return None
+    if not isinstance(parsed, dict):
+        return None
+    series = parsed.get("series")
+    if not isinstance(series, list) or not series:
+        return None
+    if not all(isinstance(point, dict) and "year" in point and "value" in point for point in series):
+        return None
+    parsed.setdefault("title", "5-Year Growth Forecast")
+    parsed.setdefault("unit", "USD")
+    return parsed
+
+
+def find_json_spans(text: str) -> List[tuple]:
+    """
+    Return (start, end) offsets of the top-level balanced {...} spans in text.
+
+    Only braces and JSON strings are visited (via one regex scan), so this is
+    linear in the text length. Strings cannot span lines, which keeps a stray
+    quote in prose from swallowing the rest of the document.
+    """
+    spans = []
+    depth = 0
+    start = 0
+    for match in JSON_TOKEN_RE.finditer(text):
+        token = match.group(0)
+        if token == "{":
+            if depth == 0:
+                start = match.start()
+            depth += 1
+        elif token == "}":
+            if depth > 0:
+                depth -= 1
+                if depth == 0:
+                    spans.append((start, match.end()))
+    return spans
+
+
+def _forecast_spans(text: str) -> List[tuple]:
+    """Spans of the JSON objects in text that are valid forecasts, with the parsed forecast"""
+    found = []
+    for start, end in find_json_spans(text):
+        forecast = _as_forecast(text[start:end])
+        if forecast is not None:
+            found.append((start, end, forecast))
+    return found
+
+
+def _clean_name(name: str) -> str:
+    name = MD_LINK_RE.sub(r"\1", name)
+    name = URL_RE.sub("", name)
+    name = CITATION_RE.sub("", name)
+    name = name.replace("**", "").replace("__", "").strip(" \t*_`:;,.-—–([")
+    return name
+
+
+def _accept_name(name: str) -> Optional[str]:
+    name = _clean_name(name)
+    if not 2 < len(name) < 100:
+        return None
+    if ":" in name or name.lower() in COMPETITOR_LABELS:
+        return None
+    if len(name.split()) > 8:
+        return None
+    return name
+
+
+def _competitor_from_bullet(body: str) -> Optional[str]:
+    match = LEADING_LINK_RE.match(body)
+    if match:
+        return _accept_name(match.group(1))
+    match = LEADING_BOLD_RE.match(body)
+    if match:
+        return _accept_name(match.group(1))
+    if "http" not in body and "—" not in body and "–" not in body:
+        return None
+    head = NAME_SEPARATOR_RE.split(body, maxsplit=1)[0]
+    if not head[:1].isupper() and not head[:1].isdigit() and not head.startswith("["):
+        return None
+    return _accept_name(head)
+
+
+def _competitor_from_table_row(line: str) -> Optional[str]:
+    cells = [cell.strip() for cell in line.strip().strip("|").split("|")]
+    if not cells or not cells[0]:
+        return None
+    first = cells[0]
+    if first.lower().strip("* ") in ("name", "company", "competitor", "competitors"):
+        return None
+    return _accept_name(first)
+
+
+def _profile_detail(body: str) -> Optional[tuple]:
+    """("Strengths", "...") for a "Strengths: ..." bullet inside a competitor entry, else None"""
+    label, sep, value = body.replace("**", "").partition(":")
+    label = label.strip(" *_")
+    value = CITATION_RE.sub("", MD_LINK_RE.sub(r"\1", value)).strip()
+    if not sep or not value or not 2 < len(label) <= 40 or "http" in label:
+        return None
+    return label, value
+
+
+def parse_competitor_profiles(text: str) -> List[dict]:
+    """
+    Competitor entries of a report, for the competitor profile index: one
+    dict per competitor with its name, URL (its link, else the first URL on
+    its line), positioning (the text after the name) and details ({label:
+    text} from "Strengths: ..." style sub-bullets).
+
+    Like parse_report, competitors come from the Competitive Landscape /
+    Intelligence section when there is one, else from the whole text.
+    """
+    profiles = []
+    section_profiles = []
+    has_competitor_section = False
+    stack = []
+    in_fence = False
+    # The entry sub-bullets are added to, and its bullet indent
+    current = None
+    current_indent = 0
+
+    for line in (text or "").split("\n"):
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        heading = HEADING_RE.match(line)
+        if heading:
+            level = len(heading.group(1))
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            kind = _section_kind(heading.group(2))
+            stack.append((level, kind))
+            has_competitor_section = has_competitor_section or kind == "competitors"
+            current = None
+            continue
+        if any(entry[1] == "sources" for entry in stack):
+            current = None
+            continue
+
+        bullet = BULLET_RE.match(line)
+        if not bullet:
+            if line.strip():
+                current = None
+            continue
+        indent = len(bullet.group(1).expandtabs(4))
+        body = bullet.group(2).strip()
+        name = _competitor_from_bullet(body)
+        if name is None or (current is not None and indent > current_indent):
+            # A sub-bullet (or label bullet) of the current entry
+            detail = _profile_detail(body) if current is not None else None
+            if detail is not None:
+                current["details"].setdefault(*detail)
+            elif current is not None and indent <= current_indent:
+                current = None
+            continue
+
+        link = LEADING_LINK_RE.match(body)
+        url = link.group(2) if link else next(iter(URL_RE.findall(body)), None)
+        rest = body[link.end():] if link else NAME_SEPARATOR_RE.split(body, maxsplit=1)[-1]
+        positioning = CITATION_RE.sub("", URL_RE.sub("", MD_LINK_RE.sub(r"\1", rest)))
+        positioning = positioning.replace("**", "").strip(" \t*_:;,-—–()")
+        current = {
+            "name": name,
+            "url": url.rstrip(".,;:!?)") if url else None,
+            "positioning": positioning if positioning != name else "",
+            "details": {},
+        }
+        current_indent = indent
+        profiles.append(current)
+        if any(entry[1] == "competitors" for entry in stack):
+            section_profiles.append(current)
+
+    found = section_profiles if has_competitor_section and section_profiles else profiles
+    # First entry per name wins
+    unique = {}
+    for profile in found:
+        unique.setdefault(profile["name"].lower(), profile)
+    return list(unique.values())
+
+
+def parse_report(text: str) -> ParsedReport:
+    """
+    Parse a report in one pass over its lines.
+
+    - forecast: first JSON object with a non-empty "series" (fenced or bare)
+    - competitors: names from the Competitive Intelligence section (or the
+      whole text if there is none), from links, bold names, "Name — URL"
+      bullets and table rows
+    - sources: URLs from the Sources section first, then the rest of the text
+    - summary: the text without the forecast section (up to "Summary of the
+      5-year forecast", which the frontend shows under the chart), the sources
+      section, JSON blocks and citation lines
+    """
+    if not text:
+        return ParsedReport(summary=DEFAULT_SUMMARY)
+
+    # Forecast JSON (fenced or bare) is located by one tokenizer scan up
+    # front; lines overlapping those spans are left out of the summary
+    json_spans = _forecast_spans(text)
+    forecast = json_spans[0][2] if json_spans else None
+
+    summary_lines = []
+    section_competitors = []
+    all_competitors = []
+    has_competitor_section = False
+    source_urls = []
+    other_urls = []
+    citation_lines = []
+
+    # Section stack entries: (level, kind)
+    stack = []
+    in_fence = False
+    forecast_summary_started = False
+    span_index = 0
+    offset = 0
+
+    def kind_active(kind: str) -> bool:
+        return any(entry[1] == kind for entry in stack)
+
+    for line in text.split("\n"):
+        line_start = offset
+        offset += len(line) + 1
+
+        # Skip lines that are part of a forecast JSON object
+        while span_index < len(json_spans) and json_spans[span_index][1] <= line_start:
+            span_index += 1
+        if span_index < len(json_spans) and json_spans[span_index][0] < offset:
+            continue
+
+        # Fenced code blocks never belong in the summary
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+
+        heading = HEADING_RE.match(line)
+        if heading:
+            level = len(heading.group(1))
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            kind = _section_kind(heading.group(2))
+            stack.append((level, kind))
+            if kind == "competitors":
+                has_competitor_section = True
+            if kind == "forecast":
+                forecast_summary_started = False
+            if kind in ("forecast", "sources") or kind_active("sources"):
+                continue
+            if kind_active("forecast") and not forecast_summary_started:
+                continue
+            summary_lines.append(line)
+            continue
+
+        in_sources = kind_active("sources")
+        in_forecast = kind_active("forecast")
+        in_competitors = kind_active("competitors")
+
+        # Sources and URLs
+        urls = URL_RE.findall(line)
+        for url in urls:
+            url = url.rstrip(".,;:!?)")
+            (source_urls if in_sources else other_urls).append(url)
+        stripped = line.strip()
+        if in_sources and stripped and not urls:
+            citation_lines.append(stripped)
+
+        # Competitors
+        name = None
+        bullet = BULLET_RE.match(line)
+        if bullet:
+            name = _competitor_from_bullet(bullet.group(2).strip())
+        elif "|" in stripped and not TABLE_SEPARATOR_RE.match(stripped):
+            name = _competitor_from_table_row(stripped)
+        elif urls:
+            plain = PLAIN_COMPETITOR_RE.match(stripped)
+            if plain:
+                name = _accept_name(plain.group(1))
+        if name:
+            all_competitors.append(name)
+            if in_competitors:
+                section_competitors.append(name)
+
+        # Summary
+        if in_sources or CITATION_LINE_RE.match(line) or FORECAST_JSON_LABEL_RE.search(line):
+            continue
+        if in_forecast:
+            if not forecast_summary_started and FORECAST_SUMMARY_RE.search(line):
+                forecast_summary_started = True
+            if not forecast_summary_started:
+                continue
+        summary_lines.append(line)
+
+    competitors = section_competitors if has_competitor_section and section_competitors else all_competitors
+    competitors = list(dict.fromkeys(competitors))[:MAX_COMPETITORS]
+
+    sources = list(dict.fromkeys(source_urls + other_urls))[:MAX_SOURCES]
+    if not sources:
+        sources = list(dict.fromkeys(citation_lines))[:MAX_SOURCES]
+
+    summary = BLANK_RUN_RE.sub("\n\n", "\n".join(summary_lines)).strip()
+
+    return ParsedReport(
+        summary=summary or DEFAULT_SUMMARY,
+        competitors=competitors,
+        sources=sources,
+        forecast=forecast,
+    )
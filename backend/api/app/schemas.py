@@ -1,21 +1,43 @@
+from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
+
+# The forecast models are shared with the crew, whose forecast_task returns
+# validated ForecastParameters that market_research.forecasting turns into
+# a Forecast
+from market_research.models import Estimate, Forecast, ForecastBand, ForecastParameters, ForecastSeries  # noqa: F401
+
+
+class ResearchBudget(BaseModel):
+    deadline_seconds: Optional[float] = Field(None, gt=0, description="Wall-clock seconds the run may take once it starts")
+    max_tool_calls: Optional[int] = Field(None, ge=0, description="Searches and page scrapes the run may make")
+    max_tokens: Optional[int] = Field(None, gt=0, description="LLM tokens (prompt + completion) the run may use")
 
 
 class ResearchRequest(BaseModel):
     startup_idea: str = Field(..., min_length=10, description="The startup idea to research")
+    mode: Literal["quick", "deep"] = Field(
+        "deep", description="quick: a short preview in seconds; deep: the full report (builds on an earlier quick run)"
+    )
+    budget: Optional[ResearchBudget] = Field(
+        None, description="Limits for this run (capped by the server's); when one runs out the report is written from what was gathered"
+    )
 
 
-class ForecastSeries(BaseModel):
-    year: int = Field(..., description="Year for the forecast data point")
-    value: float = Field(..., description="Forecast value for the year")
+class ResearchBatchRequest(BaseModel):
+    requests: List[ResearchRequest] = Field(..., min_length=1, max_length=100, description="Ideas to research")
+    concurrency: Optional[int] = Field(None, ge=1, description="Ideas researched at once (capped by the worker pool size)")
 
 
-class Forecast(BaseModel):
-    title: str = Field(..., description="Title of the forecast")
-    unit: str = Field(..., description="Unit of measurement (e.g., 'USD Billions', 'Million Users')")
-    series: List[ForecastSeries] = Field(..., description="List of forecast data points")
-    scenarios: Optional[List[str]] = Field(None, description="Optional list of forecast scenarios")
+class SimilarResearch(BaseModel):
+    idea: str = Field(..., description="Earlier idea whose research was used")
+    similarity: float = Field(..., description="Similarity of the two ideas (0-1)")
+    mode: Literal["reused", "prior_knowledge", "upgraded"] = Field(
+        ..., description=(
+            "reused: its research replaced the research phase; prior_knowledge: researchers built on it; "
+            "upgraded: this deep run built on the idea's quick preview"
+        )
+    )
 
 
 class ResearchResponse(BaseModel):
@@ -23,4 +45,77 @@ class ResearchResponse(BaseModel):
     competitors: List[str] = Field(..., description="List of key competitors")
     forecast: Forecast = Field(..., description="Market forecast data")
     sources: List[str] = Field(..., description="List of sources used in the research")
+    similar_research: Optional[SimilarResearch] = Field(
+        None, description="Earlier research on a near-duplicate idea that this run built on, if any"
+    )
+    degraded: Optional[Literal["deadline", "tool_calls", "tokens"]] = Field(
+        None, description="Budget limit that ran out, if the run was wound down early"
+    )
+    mode: Literal["quick", "deep"] = Field("deep", description="Research mode the result was produced in")
+    run_id: Optional[str] = Field(None, description="Run whose task outputs are checkpointed, for POST /research/runs/{run_id}/replay")
+
+
+class ReplayRequest(BaseModel):
+    from_task: Optional[Literal["market_sizing_task", "competitor_task", "trends_task", "forecast_task", "synthesis_task"]] = Field(
+        None, description="Task to rerun, with the tasks that depend on it (default: resume the run's unfinished tasks, or redo the synthesis)"
+    )
+    budget: Optional[ResearchBudget] = Field(None, description="Limits for the replay (capped by the server's)")
+
+
+class TaskCheckpoint(BaseModel):
+    task: str = Field(..., description="Crew task name")
+    completed_at: datetime = Field(..., description="When the task's output was checkpointed")
+    output: Optional[str] = Field(None, description="Raw task output, when requested with ?outputs=true")
+
+
+class ResearchRun(BaseModel):
+    run_id: str = Field(..., description="Run identifier")
+    startup_idea: str = Field(..., description="The idea the run researched")
+    mode: Literal["quick", "deep"] = Field(..., description="Research mode of the run")
+    status: Literal["running", "succeeded", "failed", "cancelled"] = Field(..., description="Run status")
+    error: Optional[str] = Field(None, description="Error message if the run failed")
+    parent: Optional[str] = Field(None, description="Run this one replayed, if any")
+    tasks: List[TaskCheckpoint] = Field(default_factory=list, description="Checkpointed task outputs in completion order")
+    created_at: datetime = Field(..., description="When the run started")
+    updated_at: datetime = Field(..., description="When the run last changed")
+
+
+class TaskProgress(BaseModel):
+    task: str = Field(..., description="Crew task name")
+    status: Literal["pending", "running", "completed"] = Field(..., description="Task status")
+    completed_at: Optional[datetime] = Field(None, description="When the task finished")
+
+
+class ResearchJob(BaseModel):
+    id: str = Field(..., description="Job identifier used for polling")
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"] = Field(..., description="Job status")
+    progress: List[TaskProgress] = Field(default_factory=list, description="Per-task progress in execution order")
+    result: Optional[ResearchResponse] = Field(None, description="Research result once the job has succeeded")
+    error: Optional[str] = Field(None, description="Error message if the job failed or was cancelled")
+    trace: Optional[dict] = Field(None, description="Per-task timing, LLM/tool call and token breakdown, when requested with ?trace=true")
+    created_at: datetime = Field(..., description="When the job was submitted")
+    updated_at: datetime = Field(..., description="When the job last changed")
+    expires_at: datetime = Field(..., description="When the job and its result will be discarded")
+
+
+class ArchivedReportSummary(BaseModel):
+    id: int = Field(..., description="Archive id of the report")
+    run_id: Optional[str] = Field(None, description="Run that produced the report")
+    startup_idea: str = Field(..., description="The idea the report researched")
+    mode: Literal["quick", "deep"] = Field(..., description="Research mode the report was produced in")
+    competitors: List[str] = Field(default_factory=list, description="Competitors the report lists")
+    degraded: Optional[Literal["deadline", "tool_calls", "tokens"]] = Field(None, description="Budget limit that ran out, if any")
+    created_at: datetime = Field(..., description="When the report was archived")
+    snippet: Optional[str] = Field(None, description="Summary excerpt around the matched words (text searches only)")
+
+
+class ReportPage(BaseModel):
+    reports: List[ArchivedReportSummary] = Field(..., description="Reports, newest first")
+    next_before: Optional[int] = Field(None, description="Pass as ?before= for the next page; null on the last page")
+
 
+class ArchivedReport(BaseModel):
+    id: int = Field(..., description="Archive id of the report")
+    startup_idea: str = Field(..., description="The idea the report researched")
+    created_at: datetime = Field(..., description="When the report was archived")
+    result: ResearchResponse = Field(..., description="The report as /research/run returned it")
@@ -0,0 +1,271 @@
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from .cache import normalize_idea
+
+# Words that say little about which market an idea is in
+STOPWORDS = {
+    "a", "an", "and", "app", "application", "are", "as", "at", "based", "by", "can", "driven", "for",
+    "from", "help", "helps", "helping", "in", "into", "is", "it", "its", "of", "on", "or", "platform",
+    "powered", "service", "software", "startup", "that", "the", "their", "them", "to", "tool", "using",
+    "via", "which", "who", "with", "your",
+}
+
+# MinHash signature of NUM_PERM values split into BANDS bands for LSH lookup.
+# Two-row bands make ideas sharing about half their words near-certain candidates;
+# candidates are then compared exactly.
+NUM_PERM = 64
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def _stem(word: str) -> str:
+    """Crude plural folding, so "freelancers" matches "freelancer" """
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def idea_features(idea: str) -> set:
+    """Content words of an idea, normalized and with plurals folded"""
+    return {_stem(word) for word in normalize_idea(idea).split() if word not in STOPWORDS}
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def minhash(features: set) -> list:
+    hashes = [
+        int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for feature in features
+    ]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def lsh_buckets(signature: list) -> list:
+    """(band, bucket) pairs; ideas sharing any bucket are candidate matches"""
+    return [
+        (band, hashlib.blake2b(repr(signature[band * ROWS:(band + 1) * ROWS]).encode(), digest_size=8).hexdigest())
+        for band in range(BANDS)
+    ]
+
+
+class SimilarityIndex:
+    """
+    On-disk index of past research, for reusing it on near-duplicate ideas.
+
+    Each finished run stores its idea, the research tasks' outputs and the
+    extracted competitors and sources in SQLite. Ideas are compared by the
+    Jaccard similarity of their content words; a MinHash/LSH band table
+    finds candidates without scanning every stored idea. Entries older than
+    `ttl` seconds are not matched, so research does not go stale. Each entry
+    records the research mode (quick or deep) that produced it.
+    """
+
+    def __init__(self, path: str, ttl: int = 2592000, max_entries: int = 5000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS research_index ("
+                " id INTEGER PRIMARY KEY,"
+                " key TEXT UNIQUE NOT NULL,"
+                " idea TEXT NOT NULL,"
+                " features TEXT NOT NULL,"
+                " research TEXT NOT NULL,"
+                " competitors TEXT NOT NULL,"
+                " sources TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " mode TEXT NOT NULL DEFAULT 'deep')"
+            )
+            # Indexes created before research modes existed hold deep research
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(research_index)")}
+            if "mode" not in columns:
+                conn.execute("ALTER TABLE research_index ADD COLUMN mode TEXT NOT NULL DEFAULT 'deep'")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS research_bands ("
+                " band INTEGER NOT NULL,"
+                " bucket TEXT NOT NULL,"
+                " entry_id INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS research_bands_bucket ON research_bands (band, bucket)")
+            conn.execute("CREATE INDEX IF NOT EXISTS research_bands_entry ON research_bands (entry_id)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, key: str, idea: str, research: dict, competitors: list, sources: list,
+            mode: str = "deep") -> None:
+        """
+        Store (or replace) the research for an idea.
+
+        Args:
+            key: Result cache key of the run's inputs
+            idea: The startup idea as submitted
+            research: Research task name -> raw output
+            competitors, sources: Extracted from the run's reports
+            mode: Research mode of the run (quick or deep)
+        """
+        features = idea_features(idea)
+        if not features or not research:
+            return
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            old = conn.execute("SELECT id FROM research_index WHERE key = ?", (key,)).fetchone()
+            if old is not None:
+                conn.execute("DELETE FROM research_bands WHERE entry_id = ?", (old[0],))
+                conn.execute("DELETE FROM research_index WHERE id = ?", (old[0],))
+            cursor = conn.execute(
+                "INSERT INTO research_index (key, idea, features, research, competitors, sources, created_at, mode)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, idea, json.dumps(sorted(features)), json.dumps(research),
+                 json.dumps(competitors), json.dumps(sources), now, mode),
+            )
+            conn.executemany(
+                "INSERT INTO research_bands (band, bucket, entry_id) VALUES (?, ?, ?)",
+                [(band, bucket, cursor.lastrowid) for band, bucket in lsh_buckets(minhash(features))],
+            )
+            # Drop expired entries and the oldest beyond the size limit
+            conn.execute(
+                "DELETE FROM research_index WHERE created_at < ? OR id IN ("
+                " SELECT id FROM research_index ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (now - self.ttl, self.max_entries),
+            )
+            conn.execute("DELETE FROM research_bands WHERE entry_id NOT IN (SELECT id FROM research_index)")
+
+    def lookup(self, idea: str, threshold: float, modes: Optional[tuple] = None) -> Optional[dict]:
+        """
+        The most similar stored research with similarity >= threshold, as a
+        dict with idea, similarity, research, competitors, sources,
+        created_at and mode; or None. `modes` limits the match to research
+        from those modes.
+        """
+        features = idea_features(idea)
+        if not features:
+            return None
+        buckets = lsh_buckets(minhash(features))
+        mode_filter = f" AND i.mode IN ({', '.join('?' * len(modes))})" if modes else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT i.id, i.idea, i.features, i.created_at FROM research_index i"
+                " JOIN research_bands b ON b.entry_id = i.id"
+                " WHERE i.created_at >= ?" + mode_filter
+                + " AND (" + " OR ".join(["(b.band = ? AND b.bucket = ?)"] * len(buckets)) + ")",
+                [time.time() - self.ttl] + list(modes or ()) + [value for pair in buckets for value in pair],
+            ).fetchall()
+            best, best_score = None, 0.0
+            for entry_id, stored_idea, stored_features, created_at in rows:
+                score = jaccard(features, set(json.loads(stored_features)))
+                if score > best_score:
+                    best, best_score = entry_id, score
+            if best is None or best_score < threshold:
+                self.misses += 1
+                return None
+            row = conn.execute(
+                "SELECT idea, research, competitors, sources, created_at, mode FROM research_index WHERE id = ?",
+                (best,),
+            ).fetchone()
+        self.hits += 1
+        return self._entry(row, round(best_score, 3))
+
+    def get(self, key: str) -> Optional[dict]:
+        """The stored research for exactly these inputs (by result cache key), if still fresh"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT idea, research, competitors, sources, created_at, mode FROM research_index"
+                " WHERE key = ? AND created_at >= ?",
+                (key, time.time() - self.ttl),
+            ).fetchone()
+        return self._entry(row, 1.0) if row is not None else None
+
+    @staticmethod
+    def _entry(row: tuple, similarity: float) -> dict:
+        return {
+            "idea": row[0],
+            "similarity": similarity,
+            "research": json.loads(row[1]),
+            "competitors": json.loads(row[2]),
+            "sources": json.loads(row[3]),
+            "created_at": row[4],
+            "mode": row[5],
+        }
+
+    def size(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM research_index").fetchone()[0]
+
+    def metrics(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": self.size()}
+
+
+_similarity_index: Optional[SimilarityIndex] = None
+_similarity_index_lock = threading.Lock()
+
+
+def get_similarity_index() -> Optional[SimilarityIndex]:
+    """
+    Process-wide similarity index from SIMILAR_RESEARCH_PATH, or None when
+    SIMILAR_RESEARCH=off.
+    """
+    global _similarity_index
+    if os.getenv("SIMILAR_RESEARCH", "on").lower() == "off":
+        return None
+    with _similarity_index_lock:
+        if _similarity_index is None:
+            _similarity_index = SimilarityIndex(
+                os.getenv("SIMILAR_RESEARCH_PATH", "scout_similar_research.db"),
+                ttl=int(os.getenv("SIMILAR_RESEARCH_TTL", "2592000")),
+                max_entries=int(os.getenv("SIMILAR_RESEARCH_MAX_ENTRIES", "5000")),
+            )
+        return _similarity_index
+
+
+def prior_research_text(match: dict, budget: int = 600, preview: bool = False) -> str:
+    """
+    Instructions plus a digest of a similar idea's research, for the
+    research tasks' {prior_research} input. With `preview`, the match is a
+    quick-mode run on this same idea that a deep run is expanding on.
+    """
+    # Imported here: it loads crewai, which the API imports lazily
+    from market_research.compaction import digest_reports
+
+    age_days = max(0, int((time.time() - match["created_at"]) / 86400))
+    if preview:
+        intro = (
+            f"A quick preview of this idea's research ({age_days} days old) is summarized below. "
+            "Keep its facts, competitors and sources, and spend your searches going deeper: fill its "
+            "gaps and check its figures rather than repeating the searches it already made."
+        )
+    else:
+        intro = (
+            f'Research on a closely related idea ("{match["idea"]}", {age_days} days old) is summarized below. '
+            "Reuse the facts, competitors and sources that still apply to this idea and search only to fill "
+            "gaps or to check figures that differ; do not repeat searches it already answers."
+        )
+    return intro + "\n\n" + digest_reports(match["research"], budget)
@@ -0,0 +1,149 @@
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_market_research_importable() -> None:
+    """Add market_research/src to sys.path when the package is not installed"""
+    try:
+        import market_research  # noqa: F401
+    except ImportError:
+        market_research_path = os.path.abspath(
+            os.path.join(os.path.dirname(__file__), "../../market_research/src")
+        )
+        sys.path.insert(0, market_research_path)
+        try:
+            import market_research  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                f"Could not import market_research. "
+                f"Please run 'cd {os.path.dirname(market_research_path)} && pip install -e .' "
+                f"Error: {e}"
+            )
+
+
+class CrewRuntime:
+    """
+    The crew modules, imported once, plus a template crew per research mode
+    (quick and deep) built once.
+
+    Importing crewai takes seconds, and building a crew re-reads the YAML
+    configs and creates every agent and LLM client. So both happen once per
+    process (in the background at startup), and each run gets a copy of the
+    template crew. Copies share the LLM clients and tools but have their own
+    agents and tasks, so concurrent runs stay independent.
+    """
+
+    def __init__(self):
+        started = time.perf_counter()
+        from market_research import crew as crew_module
+        from market_research import budget, checkpoints, tracing
+        self.import_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        self.research_tasks = crew_module.RESEARCH_TASKS
+        self.modes = crew_module.MODES
+        self.RunTrace = tracing.RunTrace
+        self.RunBudget = budget.RunBudget
+        self.restore_outputs = checkpoints.restore_outputs
+        # crewai memoizes @agent/@task/@crew results per instance for the life
+        # of the process, so building one MarketResearch per request would
+        # also keep every request's crew alive; one template per mode avoids that
+        self.templates = {mode: crew_module.MarketResearch(mode).crew() for mode in self.modes}
+        self.prebuild_seconds = time.perf_counter() - started
+
+        self._lock = threading.Lock()
+        self.crews_built = 0
+        self.last_setup_seconds: Optional[float] = None
+        self.avg_setup_seconds: Optional[float] = None
+
+    def new_crew(self, outputs: Optional[dict] = None, mode: str = "deep"):
+        """
+        A fresh crew for one run, copied from the mode's template. With
+        `outputs` ({task name: raw output or checkpoint entry}, e.g. research
+        reused from a similar idea, or a replay's kept tasks), those tasks are
+        given that output and left out of the crew, so only the rest run.
+        """
+        started = time.perf_counter()
+        crew = self.templates[mode].copy()
+        if outputs:
+            self.restore_outputs(crew, outputs)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.crews_built += 1
+            self.last_setup_seconds = elapsed
+            if self.avg_setup_seconds is None:
+                self.avg_setup_seconds = elapsed
+            else:
+                self.avg_setup_seconds = 0.8 * self.avg_setup_seconds + 0.2 * elapsed
+        return crew
+
+
+_runtime: Optional[CrewRuntime] = None
+_runtime_lock = threading.Lock()
+_state = {"status": "pending", "error": None, "started_at": None, "ready_at": None}
+
+
+def get_runtime() -> CrewRuntime:
+    """
+    Return the process's crew runtime, loading it on first use. Callers that
+    arrive while the background warmup is running wait for it to finish.
+    """
+    global _runtime
+    if _runtime is not None:
+        return _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _state.update(status="warming", started_at=_state["started_at"] or time.time())
+            try:
+                _runtime = CrewRuntime()
+            except Exception as e:
+                _state.update(status="failed", error=str(e))
+                raise
+            _state.update(status="ready", error=None, ready_at=time.time())
+            logger.info(
+                "Crew runtime ready (import %.2fs, prebuild %.2fs)",
+                _runtime.import_seconds, _runtime.prebuild_seconds,
+            )
+    return _runtime
+
+
+def start_warmup() -> None:
+    """Load the crew runtime on a background thread so startup is not blocked"""
+    if _runtime is not None or _state["status"] == "warming":
+        return
+    _state.update(status="warming", started_at=time.time())
+
+    def warm():
+        try:
+            get_runtime()
+        except Exception:
+            logger.exception("Crew warmup failed")
+
+    threading.Thread(target=warm, name="crew-warmup", daemon=True).start()
+
+
+def warmup_worker() -> None:
+    """Process pool initializer: warm each worker process before it takes work"""
+    ensure_market_research_importable()
+    get_runtime()
+
+
+def warmup_status() -> dict:
+    """Readiness plus import, prebuild and per-run setup timings"""
+    status = dict(_state)
+    runtime = _runtime
+    if runtime is not None:
+        status.update(
+            import_seconds=round(runtime.import_seconds, 3),
+            prebuild_seconds=round(runtime.prebuild_seconds, 3),
+            crews_built=runtime.crews_built,
+            last_setup_ms=round(runtime.last_setup_seconds * 1000, 2) if runtime.last_setup_seconds is not None else None,
+            avg_setup_ms=round(runtime.avg_setup_seconds * 1000, 2) if runtime.avg_setup_seconds is not None else None,
+        )
+    return status
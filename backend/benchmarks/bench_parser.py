@@ -0,0 +1,130 @@
+"""
+Benchmark and fuzz the report parser against the sample corpus.
+
+    cd backend
+    python benchmarks/bench_parser.py              # timings on the corpus and scaled inputs
+    python benchmarks/bench_parser.py --fuzz 2000  # random mutations, checks time and invariants
+
+The scaled run repeats each corpus document 1x..64x; time per KB should stay
+roughly flat if parsing is linear. The fuzz run mutates corpus documents
+(splices, duplicated lines, unbalanced braces/quotes/fences, long junk lines)
+and fails if any parse raises, returns a malformed result or takes longer than
+--max-seconds.
+"""
+import argparse
+import glob
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.app.report_parser import MAX_COMPETITORS, MAX_SOURCES, parse_report  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+# Fragments that used to trip up the regex cascade
+NOISE = [
+    "{", "}", '"', "```", "```json", "{{{{", '"series": [', "[1]", "## ",
+    "- **", "](", "https://", "—", "|", "5-Year Forecast (JSON)", "\\",
+]
+
+
+def load_corpus() -> dict:
+    docs = {}
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, "*"))):
+        with open(path, encoding="utf-8") as f:
+            docs[os.path.basename(path)] = f.read()
+    return docs
+
+
+def time_parse(text: str, repeat: int) -> float:
+    """Median seconds per parse over `repeat` runs"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse_report(text)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def mutate(text: str, rng: random.Random) -> str:
+    lines = text.split("\n")
+    for _ in range(rng.randint(1, 8)):
+        op = rng.randrange(5)
+        i = rng.randrange(len(lines) or 1)
+        if op == 0 and lines:
+            lines.insert(i, rng.choice(lines))
+        elif op == 1:
+            lines.insert(i, "".join(rng.choice(NOISE) for _ in range(rng.randint(1, 40))))
+        elif op == 2 and lines:
+            del lines[i]
+        elif op == 3 and lines:
+            pos = rng.randint(0, len(lines[i]))
+            lines[i] = lines[i][:pos] + rng.choice(NOISE) + lines[i][pos:]
+        else:
+            # A single very long line, e.g. a minified blob or an unterminated string
+            lines.insert(i, rng.choice(NOISE) * rng.randint(1000, 20000))
+    return "\n".join(lines)
+
+
+def check(report) -> None:
+    assert isinstance(report.summary, str) and report.summary
+    assert len(report.competitors) <= MAX_COMPETITORS
+    assert len(report.sources) <= MAX_SOURCES
+    assert all(isinstance(name, str) and name for name in report.competitors)
+    if report.forecast is not None:
+        assert isinstance(report.forecast.get("series"), list) and report.forecast["series"]
+
+
+def run_benchmark(docs: dict, repeat: int) -> None:
+    print(f"{'document':40} {'KB':>8} {'ms':>10} {'ms/KB':>8}")
+    for name, text in docs.items():
+        for factor in (1, 4, 16, 64):
+            scaled = "\n".join([text] * factor)
+            seconds = time_parse(scaled, repeat)
+            kb = len(scaled) / 1024
+            print(f"{name + ' x' + str(factor):40} {kb:8.1f} {seconds * 1000:10.2f} {seconds * 1000 / kb:8.3f}")
+
+
+def run_fuzz(docs: dict, iterations: int, seed: int, max_seconds: float) -> int:
+    rng = random.Random(seed)
+    sources = list(docs.values())
+    slowest = 0.0
+    failures = 0
+    for i in range(iterations):
+        text = mutate(rng.choice(sources), rng)
+        started = time.perf_counter()
+        try:
+            check(parse_report(text))
+        except Exception as e:
+            failures += 1
+            print(f"iteration {i}: {type(e).__name__}: {e}")
+            continue
+        elapsed = time.perf_counter() - started
+        slowest = max(slowest, elapsed)
+        if elapsed > max_seconds:
+            failures += 1
+            print(f"iteration {i}: took {elapsed:.3f}s on {len(text)} chars")
+    print(f"fuzz: {iterations} inputs, {failures} failures, slowest {slowest * 1000:.2f} ms (seed {seed})")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="runs per timing (median is reported)")
+    parser.add_argument("--fuzz", type=int, default=0, metavar="N", help="run N fuzz iterations instead")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-seconds", type=float, default=0.5, help="per-input time limit when fuzzing")
+    args = parser.parse_args()
+
+    docs = load_corpus()
+    if args.fuzz:
+        sys.exit(1 if run_fuzz(docs, args.fuzz, args.seed, args.max_seconds) else 0)
+    run_benchmark(docs, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,791 @@
+"""
+Offline benchmark for research runs.
+
+Starts the fake LLM/Serper/website server (benchmarks/fake_services.py),
+points the crew at it and measures:
+
+- crew:   MarketResearch().crew().kickoff() end-to-end latency, per-task time
+          and per-task prompt/context tokens (compare CONTEXT_COMPACTION=off)
+- api:    POST /research/run latency percentiles and throughput with N
+          concurrent clients (in-process ASGI app, or --url for a running server)
+- modes:  quick vs deep crew kickoffs: p50 latency, tool calls and tokens per
+          run, checked against each mode's MODE_TARGETS (crew.py)
+- batch:  POST /research/batch wall-clock time and fake LLM/search calls for
+          --requests ideas (each idea appears twice, as in a real cohort
+          with overlapping submissions)
+- ratelimit: --clients concurrent crew kickoffs (half batch, half
+          interactive priority) against a fake provider that returns 429s
+          above --llm-rpm, with the call scheduler (scheduler.py) and
+          without: wall clock, failed runs, 429s and queue wait per class
+- workers: the api suite against gunicorn (gunicorn.conf.py) started with
+          each of --workers web workers, sharing SQLite job/result/tool
+          state: throughput and latency per worker count, and how the
+          requests spread over the workers
+- scrape: --runs x 5 fixture competitor pages (fake_services.page) through
+          crewai's ScrapeWebsiteTool (full page text) and the scrape tool
+          the crew uses (streamed, digested): latency, bytes fetched and
+          bytes/approx. tokens passed to the model
+- archive: --reports synthetic reports in the report archive (archive.py):
+          write rate, then latency of listing (first and a deep page),
+          full-text, competitor and source domain searches, and fetching
+          one report
+- profiles: research runs (through the API's execute_research) over
+          ideas in one crowded market, on an empty competitor profile index
+          (competitor_profiles.py) and then a warm one: latency, searches,
+          page fetches and LLM calls per run, --runs times each
+- parser: parse_report time on large outputs
+
+    cd backend
+    python benchmarks/bench_research.py                        # everything, defaults
+    python benchmarks/bench_research.py api --clients 8 --requests 32 --llm-latency 0.2
+    python benchmarks/bench_research.py ratelimit --clients 4 --llm-rpm 120
+    python benchmarks/bench_research.py workers --workers 1,2,4 --clients 8 --requests 32
+    python benchmarks/bench_research.py archive --reports 100000
+    python benchmarks/bench_research.py profiles --runs 3
+    python benchmarks/bench_research.py --json baseline.json   # save results
+    python benchmarks/bench_research.py --compare baseline.json --tolerance 0.25
+
+With --compare the script exits non-zero when any p50 regresses by more than
+the tolerance, and the modes suite exits non-zero when a mode misses its
+target, so either can gate local CI-like runs. No network access is needed.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.fake_services import LOOKUP_TOOL, FakeServices  # noqa: E402
+
+IDEA = "An AI-powered expense tracker that helps freelancers manage irregular income"
+# Ideas in IDEA's market, which meet the same competitors (profiles suite)
+MARKET_IDEAS = [
+    IDEA,
+    "Budgeting app for freelancers with irregular income",
+    "Tax set-aside tool for freelancers and gig workers with irregular income",
+    "Cash-flow forecasting for freelance designers with irregular income",
+]
+
+
+def percentile(values: list, p: float) -> float:
+    """Nearest-rank percentile (p in 0..100)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(values: list) -> dict:
+    return {
+        "count": len(values),
+        "mean": statistics.mean(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0,
+    }
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the crew's verbose console output while measuring"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def configure_environment(services: FakeServices, args) -> None:
+    """Must run before the crew or API modules are imported (they read env at import)"""
+    os.environ.update(services.env())
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    # Every run should reach the (fake) services rather than a cache, or
+    # reuse a near-duplicate idea's research (the suites submit "IDEA i")
+    os.environ["TOOL_CACHE"] = "off"
+    os.environ["RESULT_CACHE"] = "off"
+    os.environ["SIMILAR_RESEARCH"] = "off"
+    # SQLite stores go in a fresh directory, so nothing carries over between
+    # benchmark invocations (or is left in the working directory)
+    state = tempfile.mkdtemp(prefix="scout-bench-")
+    os.environ["SIMILAR_RESEARCH_PATH"] = os.path.join(state, "similar.db")
+    os.environ["CHECKPOINT_PATH"] = os.path.join(state, "checkpoints.db")
+    os.environ["JOB_STORE_PATH"] = os.path.join(state, "jobs.db")
+    os.environ["RESULT_CACHE_PATH"] = os.path.join(state, "results.db")
+    os.environ["TOOL_CACHE_PATH"] = os.path.join(state, "tool_cache.db")
+    os.environ["CANCEL_PATH"] = os.path.join(state, "cancellations.db")
+    os.environ["REPORT_ARCHIVE_PATH"] = os.path.join(state, "reports.db")
+    os.environ["COMPETITOR_PROFILES_PATH"] = os.path.join(state, "competitor_profiles.db")
+    os.environ.setdefault("RESEARCH_MAX_WORKERS", str(max(2, args.clients)))
+    os.environ.setdefault("RESEARCH_MAX_QUEUE", str(max(8, args.requests)))
+
+
+def build_inputs(idea: str) -> dict:
+    return {"startup_idea": idea, "topic": idea, "start_year": "2025", "unit": "USD"}
+
+
+def bench_crew(args) -> dict:
+    from market_research.crew import MarketResearch
+    from market_research.tracing import RunTrace
+
+    totals = []
+    per_task = {}
+    tokens = {}
+    for i in range(args.runs):
+        crew = MarketResearch().crew()
+        started = time.perf_counter()
+        with quiet(), RunTrace().attach(crew) as trace:
+            crew.kickoff(inputs=build_inputs(f"{IDEA} {i}"))
+        totals.append(time.perf_counter() - started)
+        for task in crew.tasks:
+            if task.start_time and task.end_time:
+                per_task.setdefault(task.name, []).append((task.end_time - task.start_time).total_seconds())
+        for name, entry in trace.breakdown(include_spans=False)["tasks"].items():
+            counts = tokens.setdefault(name, {"prompt_tokens": 0, "context_tokens": 0, "context_original_tokens": 0})
+            for field in counts:
+                counts[field] += entry[field]
+
+    return {
+        "latency": summarize(totals),
+        "tasks": {name: summarize(values) for name, values in per_task.items()},
+        # Mean per run
+        "tokens": {name: {field: value // max(1, args.runs) for field, value in counts.items()}
+                   for name, counts in tokens.items()},
+    }
+
+
+def bench_modes(args) -> dict:
+    from market_research.crew import MODE_TARGETS, MarketResearch
+    from market_research.tracing import RunTrace
+
+    results = {}
+    for mode, target in MODE_TARGETS.items():
+        totals = []
+        tool_calls = []
+        tokens = []
+        for i in range(args.runs):
+            crew = MarketResearch(mode).crew()
+            started = time.perf_counter()
+            with quiet(), RunTrace().attach(crew) as trace:
+                crew.kickoff(inputs=build_inputs(f"{IDEA} {mode} {i}"))
+            totals.append(time.perf_counter() - started)
+            breakdown = trace.breakdown(include_spans=True)
+            counts = breakdown["totals"]
+            # Searches and scrapes, as RunBudget counts them; the local
+            # competitor profile lookup is free
+            tool_calls.append(sum(
+                1 for span in breakdown["spans"]
+                if span["kind"] == "tool" and span["attributes"].get("tool") != LOOKUP_TOOL
+            ))
+            tokens.append(counts["prompt_tokens"] + counts["completion_tokens"])
+        latency = summarize(totals)
+        measured = {"p50_seconds": latency["p50"], "max_tool_calls": max(tool_calls), "max_tokens": max(tokens)}
+        results[mode] = {
+            "latency": latency,
+            "tool_calls": max(tool_calls),
+            "tokens": max(tokens),
+            "target": target,
+            "missed": [name for name, limit in target.items() if measured[name] > limit],
+        }
+    return results
+
+
+def bench_ratelimit(args, services: FakeServices) -> dict:
+    import threading
+
+    from market_research.crew import MarketResearch
+    from market_research.scheduler import CallScheduler
+
+    results = {}
+    for label in ("scheduled", "unscheduled"):
+        # Both rounds start with the provider's limits fully available
+        services.set_limits(llm_rpm=args.llm_rpm)
+        scheduler = CallScheduler({"llm": {"rpm": args.llm_rpm}}) if label == "scheduled" else None
+        before = dict(services.counters)
+        latencies = {"interactive": [], "batch": []}
+        failures = []
+
+        def run(i: int, priority: str):
+            crew = MarketResearch().crew()
+            if scheduler is not None:
+                scheduler.attach(crew, scheduler.ticket(f"{label}-{i}", priority))
+            started = time.perf_counter()
+            try:
+                crew.kickoff(inputs=build_inputs(f"{IDEA} {label} {i}"))
+                latencies[priority].append(time.perf_counter() - started)
+            except Exception as e:
+                failures.append(type(e).__name__)
+
+        threads = [
+            threading.Thread(target=run, args=(i, "batch" if i < args.clients // 2 else "interactive"))
+            for i in range(args.clients)
+        ]
+        started = time.perf_counter()
+        with quiet():
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        results[label] = {
+            "seconds": time.perf_counter() - started,
+            "runs": args.clients,
+            "failed": len(failures),
+            "rate_limited": services.counters["rate_limited"] - before["rate_limited"],
+            "llm_calls": services.counters["llm_calls"] - before["llm_calls"],
+            "latency": {priority: summarize(values) for priority, values in latencies.items() if values},
+            "queue_wait": scheduler.metrics()["llm"]["wait_seconds"] if scheduler is not None else None,
+        }
+    services.set_limits()
+    return {"llm_rpm": args.llm_rpm, **results}
+
+
+async def _api_requests(args, keepalive: bool = True) -> tuple:
+    import httpx
+
+    if args.url:
+        transport, base_url = None, args.url.rstrip("/")
+    else:
+        from api.app.main import app
+        transport, base_url = httpx.ASGITransport(app=app), "http://bench"
+
+    latencies = []
+    statuses = {}
+    counter = iter(range(args.requests))
+
+    async def client_loop(client):
+        for i in counter:
+            started = time.perf_counter()
+            # A distinct idea per request so result caching cannot kick in
+            response = await client.post("/research/run", json={"startup_idea": f"{IDEA} {i}"})
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    # Without keep-alive every request is a new connection, which any web
+    # worker can accept (a kept-alive one stays with the same worker)
+    limits = httpx.Limits() if keepalive else httpx.Limits(max_keepalive_connections=0)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout,
+                                 limits=limits) as client:
+        started = time.perf_counter()
+        with quiet():
+            await asyncio.gather(*(client_loop(client) for _ in range(args.clients)))
+        elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+
+def bench_api(args) -> dict:
+    latencies, statuses, elapsed = asyncio.run(_api_requests(args))
+    return {
+        "clients": args.clients,
+        "latency": summarize(latencies),
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(base_url: str, workers: int, timeout: float) -> None:
+    """Wait until /ready answers 200 several times in a row, so every worker has warmed up"""
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    ready = 0
+    while ready < 4 * workers:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"gunicorn with {workers} workers not ready after {timeout:.0f}s")
+        try:
+            ready = ready + 1 if httpx.get(f"{base_url}/ready", timeout=5).status_code == 200 else 0
+        except httpx.HTTPError:
+            ready = 0
+        if not ready:
+            time.sleep(0.5)
+
+
+def _worker_runs(base_url: str, workers: int) -> dict:
+    """Completed research runs per web worker pid (each worker reports its own /metrics)"""
+    import httpx
+
+    runs = {}
+    for _ in range(20 * workers):
+        metrics = httpx.get(f"{base_url}/metrics", timeout=10).json()
+        runs[str(metrics["web_worker"]["pid"])] = metrics["research"]["completed"]
+        if len(runs) == workers:
+            break
+    return runs
+
+
+def bench_workers(args) -> dict:
+    results = {}
+    for workers in [int(n) for n in args.workers.split(",")]:
+        port = _free_port()
+        with tempfile.TemporaryDirectory() as state:
+            # The same per-worker pool for every count, with all shared state
+            # in fresh SQLite files
+            env = dict(
+                os.environ,
+                PORT=str(port),
+                WEB_CONCURRENCY=str(workers),
+                JOB_STORE="sqlite",
+                JOB_STORE_PATH=os.path.join(state, "jobs.db"),
+                CHECKPOINT_PATH=os.path.join(state, "checkpoints.db"),
+                SIMILAR_RESEARCH_PATH=os.path.join(state, "similar.db"),
+                CANCEL_PATH=os.path.join(state, "cancellations.db"),
+                REPORT_ARCHIVE_PATH=os.path.join(state, "reports.db"),
+                COMPETITOR_PROFILES_PATH=os.path.join(state, "competitor_profiles.db"),
+            )
+            server = subprocess.Popen(
+                [sys.executable, "-m", "gunicorn", "api.app.main:app", "-c", "gunicorn.conf.py"],
+                cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            base_url = f"http://127.0.0.1:{port}"
+            try:
+                _wait_ready(base_url, workers, timeout=120)
+                run_args = argparse.Namespace(**{**vars(args), "url": base_url})
+                latencies, statuses, elapsed = asyncio.run(_api_requests(run_args, keepalive=False))
+                per_worker = _worker_runs(base_url, workers)
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait(timeout=60)
+        results[str(workers)] = {
+            "latency": summarize(latencies),
+            "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+            "statuses": {str(code): count for code, count in sorted(statuses.items())},
+            "runs_per_worker": per_worker,
+        }
+    return results
+
+
+async def _batch_request(args, services: FakeServices) -> dict:
+    import httpx
+
+    if args.url:
+        transport, base_url = None, args.url.rstrip("/")
+    else:
+        from api.app.main import app
+        transport, base_url = httpx.ASGITransport(app=app), "http://bench"
+
+    ideas = [f"{IDEA} batch {i // 2}" for i in range(args.requests)]
+    before = dict(services.counters)
+    latencies = []
+    summary = {}
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as client:
+        started = time.perf_counter()
+        with quiet():
+            payload = {"requests": [{"startup_idea": idea} for idea in ideas], "concurrency": args.clients}
+            async with client.stream("POST", "/research/batch", json=payload) as response:
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    item = json.loads(line)
+                    if item.get("done"):
+                        summary = item
+                    else:
+                        latencies.append(time.perf_counter() - started)
+        elapsed = time.perf_counter() - started
+    calls = {key: services.counters[key] - before[key] for key in ("llm_calls", "searches", "pages")}
+    return {
+        "ideas": len(ideas),
+        "seconds": elapsed,
+        "latency": summarize(latencies),
+        "fake_calls": calls,
+        "summary": {k: v for k, v in summary.items() if k != "done"},
+    }
+
+
+def bench_batch(args, services: FakeServices) -> dict:
+    return asyncio.run(_batch_request(args, services))
+
+
+def bench_profiles(args, services: FakeServices) -> dict:
+    from api.app.main import execute_research
+    from api.app.warmup import get_runtime
+    from market_research.tools import competitor_profiles
+
+    # Load the crew outside the timings
+    get_runtime()
+    results = {"cold": [], "warm": []}
+    calls = {label: {"searches": 0, "pages": 0, "llm_calls": 0} for label in results}
+    saved = competitor_profiles._competitor_profiles
+    try:
+        for i in range(args.runs):
+            with tempfile.TemporaryDirectory() as state:
+                # A fresh, empty index for each round
+                competitor_profiles._competitor_profiles = competitor_profiles.CompetitorProfiles(
+                    os.path.join(state, "profiles.db"))
+                for n, idea in enumerate(MARKET_IDEAS):
+                    label = "cold" if n == 0 else "warm"
+                    before = dict(services.counters)
+                    started = time.perf_counter()
+                    with quiet():
+                        execute_research(build_inputs(f"{idea} {i}"))
+                    results[label].append(time.perf_counter() - started)
+                    for name in calls[label]:
+                        calls[label][name] += services.counters[name] - before[name]
+    finally:
+        competitor_profiles._competitor_profiles = saved
+    return {
+        label: {
+            "latency": summarize(values),
+            # Mean per run
+            **{name: round(count / max(1, len(values)), 2) for name, count in calls[label].items()},
+        }
+        for label, values in results.items()
+    }
+
+
+def bench_parser(args) -> dict:
+    from api.app.report_parser import parse_report
+    from benchmarks.bench_parser import load_corpus, time_parse
+
+    results = {}
+    for name, text in load_corpus().items():
+        large = "\n".join([text] * args.parser_scale)
+        seconds = time_parse(large, repeat=5)
+        results[name] = {"kb": round(len(large) / 1024, 1), "p50": seconds}
+    # Sanity check that the large synthesis output still parses
+    parse_report("\n".join([load_corpus()["synthesis_fintech.md"]] * args.parser_scale))
+    return results
+
+
+def bench_scrape(args, services: FakeServices) -> dict:
+    from crewai_tools import ScrapeWebsiteTool
+
+    from market_research.tools.cached_tools import CachedScrapeWebsiteTool
+    from market_research.tools.tool_cache import scrape_stats
+
+    urls = [f"{services.base_url}/page/competitor-{i}" for i in range(1, 6)] * max(1, args.runs)
+    results = {}
+    for label, tool in (("full_text", ScrapeWebsiteTool()), ("digest", CachedScrapeWebsiteTool(cache=None))):
+        before = dict(services.counters)
+        stats_before = scrape_stats.metrics()
+        latencies = []
+        to_model = 0
+        with quiet():
+            for url in urls:
+                started = time.perf_counter()
+                text = tool.run(website_url=url)
+                latencies.append(time.perf_counter() - started)
+                to_model += len(text.encode("utf-8"))
+        stats = scrape_stats.metrics()
+        results[label] = {
+            "pages": services.counters["pages"] - before["pages"],
+            "latency": summarize(latencies),
+            # The stock tool does not count what it downloads
+            "bytes_fetched": stats["bytes_fetched"] - stats_before["bytes_fetched"] if label == "digest" else None,
+            "bytes_to_model": to_model // len(urls),
+            "approx_tokens": to_model // len(urls) // 4,
+        }
+    return results
+
+
+# Vocabulary of the synthetic archive: a few sectors' words, made-up
+# competitor names (with some real-looking ones to search for) and source
+# domains, drawn with a long tail like real reports
+ARCHIVE_SECTORS = {
+    "fintech": "budgeting freelancers income invoices taxes savings subscriptions banking payments cash flow",
+    "health": "patients clinics telehealth wearables insurance providers wellness therapy diagnostics",
+    "food": "meal planning groceries recipes delivery nutrition restaurants kitchens diets",
+    "education": "students tutoring courses teachers schools learning exams universities skills",
+    "mobility": "fleet drivers charging scooters logistics routes parking vehicles transit",
+    "retail": "shoppers inventory stores ecommerce loyalty returns merchants pricing catalog",
+}
+ARCHIVE_FILLER = (
+    "market growth segment adoption demand customers revenue competitors pricing trend share forecast "
+    "regulation enterprise consumer mobile platform integration retention churn acquisition funding "
+    "startups incumbents opportunity risk barrier channel partnership expansion region europe asia"
+).split()
+ARCHIVE_COMPETITORS = ["Rocket Money", "YNAB", "Mint", "Mealime", "Coursera", "Bird", "Shopify", "Teladoc"] + [
+    f"{head}{tail}" for head in ("Bright", "Ledger", "Nova", "Pulse", "Kite", "Orbit", "Sage", "Flux", "Peak", "Tide")
+    for tail in ("ly", "io", "Hub", "Labs", "Wise", "Stack", "Path", "Base", "Flow", "Grid")
+]
+ARCHIVE_DOMAINS = ["statista.com", "grandviewresearch.com", "techcrunch.com", "mckinsey.com", "cbinsights.com"] + [
+    f"source{i}.example.com" for i in range(200)
+]
+
+
+def _archive_reports(count: int, seed: int = 7):
+    """Deterministic synthetic (idea, result, created_at) tuples for the report archive"""
+    rng = random.Random(seed)
+    long_tail = lambda pool: [1 / (rank + 1) for rank in range(len(pool))]  # noqa: E731
+    competitor_weights = long_tail(ARCHIVE_COMPETITORS)
+    domain_weights = long_tail(ARCHIVE_DOMAINS)
+    forecast = {"title": "Revenue forecast", "unit": "USD", "series": [{"year": 2025 + i, "value": 1000.0 * (i + 1)} for i in range(5)]}
+    started = time.time() - count * 60
+    for i in range(count):
+        sector_words = ARCHIVE_SECTORS[rng.choice(list(ARCHIVE_SECTORS))].split()
+        competitors = list(dict.fromkeys(rng.choices(ARCHIVE_COMPETITORS, competitor_weights, k=5)))
+        words = rng.choices(sector_words, k=40) + rng.choices(ARCHIVE_FILLER, k=100) + competitors
+        rng.shuffle(words)
+        summary = ". ".join(" ".join(words[j:j + 14]).capitalize() for j in range(0, len(words), 14)) + "."
+        sources = [f"https://www.{domain}/report/{i}" for domain in dict.fromkeys(rng.choices(ARCHIVE_DOMAINS, domain_weights, k=4))]
+        idea = f"{rng.choice(['AI', 'Mobile', 'B2B', 'Marketplace'])} {' '.join(rng.sample(sector_words, 3))} app"
+        result = {"summary": summary, "competitors": competitors, "sources": sources, "forecast": forecast,
+                  "mode": rng.choice(["quick", "deep"]), "run_id": f"bench-{i}"}
+        yield idea, result, started + i * 60
+
+
+def bench_archive(args) -> dict:
+    from api.app.archive import ReportArchive
+
+    with tempfile.TemporaryDirectory() as state:
+        archive = ReportArchive(os.path.join(state, "reports.db"))
+        started = time.perf_counter()
+        batch = []
+        for report in _archive_reports(args.reports):
+            batch.append(report)
+            if len(batch) == 1000:
+                archive.add_many(batch)
+                batch = []
+        archive.add_many(batch)
+        build_seconds = time.perf_counter() - started
+        # Single writes, as the API makes them
+        single = []
+        for idea, result, _ in _archive_reports(50, seed=8):
+            started = time.perf_counter()
+            archive.add(idea, {**result, "run_id": "single-" + result["run_id"]})
+            single.append(time.perf_counter() - started)
+
+        middle = archive.size() // 2
+        queries = {
+            "list_first_page": lambda: archive.recent(20),
+            "list_deep_page": lambda: archive.recent(20, before=middle),
+            "text_common": lambda: archive.search("budgeting freelancers"),
+            "text_phrase": lambda: archive.search('"rocket money"'),
+            "text_no_match": lambda: archive.search("quantum"),
+            "competitor": lambda: archive.search(competitor="Rocket Money"),
+            "competitor_rare": lambda: archive.search(competitor="FluxGrid"),
+            "domain": lambda: archive.search(domain="statista.com"),
+            "combined": lambda: archive.search("telehealth", competitor="YNAB", domain="mckinsey.com"),
+            "get": lambda: archive.get(middle),
+        }
+        results = {
+            "reports": archive.size(),
+            "build_seconds": round(build_seconds, 2),
+            "single_write": summarize(single),
+            "db_mb": round(sum(os.path.getsize(os.path.join(state, name)) for name in os.listdir(state)) / 2 ** 20, 1),
+            "queries": {},
+        }
+        for name, query in queries.items():
+            latencies = []
+            for _ in range(args.archive_repeat):
+                started = time.perf_counter()
+                found = query()
+                latencies.append(time.perf_counter() - started)
+            rows = len(found[0]) if isinstance(found, tuple) else int(found is not None)
+            results["queries"][name] = {"latency": summarize(latencies), "rows": rows}
+    return results
+
+
+def print_results(results: dict) -> None:
+    def row(label, stats):
+        print(f"  {label:28} p50 {stats['p50']:8.3f}s  p90 {stats['p90']:8.3f}s  "
+              f"p99 {stats['p99']:8.3f}s  max {stats['max']:8.3f}s  (n={stats['count']})")
+
+    if "crew" in results:
+        print("crew kickoff")
+        row("end-to-end", results["crew"]["latency"])
+        for name, stats in results["crew"]["tasks"].items():
+            row(name, stats)
+        for name, counts in results["crew"].get("tokens", {}).items():
+            print(f"  {name:28} prompt {counts['prompt_tokens']:7d} tok  context {counts['context_tokens']:6d} tok"
+                  f"  (uncompacted {counts['context_original_tokens']:6d})")
+    if "modes" in results:
+        print("research modes (max per run vs MODE_TARGETS)")
+        for mode, entry in results["modes"].items():
+            row(mode, entry["latency"])
+            target = entry["target"]
+            print(f"  {'':28} tool calls {entry['tool_calls']:3d} (target {target['max_tool_calls']}), "
+                  f"tokens {entry['tokens']:7d} (target {target['max_tokens']}), "
+                  f"p50 target {target['p50_seconds']}s  {'MISSED ' + ', '.join(entry['missed']) if entry['missed'] else 'ok'}")
+    if "api" in results:
+        api = results["api"]
+        print(f"POST /research/run ({api['clients']} clients)")
+        row("latency", api["latency"])
+        print(f"  throughput {api['throughput_rps']:.2f} req/s, statuses {api['statuses']}")
+    if "batch" in results:
+        batch = results["batch"]
+        print(f"POST /research/batch ({batch['ideas']} ideas)")
+        row("time to each idea", batch["latency"])
+        print(f"  wall clock {batch['seconds']:.2f}s, fake calls {batch['fake_calls']}")
+        print(f"  summary {batch['summary']}")
+    if "ratelimit" in results:
+        print(f"rate limited provider ({results['ratelimit']['llm_rpm']:g} LLM requests/min)")
+        for label in ("scheduled", "unscheduled"):
+            entry = results["ratelimit"][label]
+            print(f"  {label:28} wall clock {entry['seconds']:7.2f}s, failed runs {entry['failed']}/{entry['runs']}, "
+                  f"429s {entry['rate_limited']}, LLM calls {entry['llm_calls']}")
+            for priority, stats in entry["latency"].items():
+                row(f"  {priority}", stats)
+            if entry["queue_wait"]:
+                print(f"  {'':28} queue wait {entry['queue_wait']}")
+    if "workers" in results:
+        print(f"POST /research/run via gunicorn ({results['settings']['clients']} clients)")
+        for workers, entry in results["workers"].items():
+            row(f"{workers} web worker(s)", entry["latency"])
+            print(f"  {'':28} throughput {entry['throughput_rps']:.2f} req/s, statuses {entry['statuses']}, "
+                  f"runs per worker {sorted(entry['runs_per_worker'].values(), reverse=True)}")
+    if "scrape" in results:
+        print("scrape tool (per page)")
+        for label, entry in results["scrape"].items():
+            row(label, entry["latency"])
+            fetched = f"fetched {entry['bytes_fetched'] // max(1, entry['pages'])} B, " if entry["bytes_fetched"] else ""
+            print(f"  {'':28} {fetched}to model {entry['bytes_to_model']} B (~{entry['approx_tokens']} tokens)")
+    if "archive" in results:
+        archive = results["archive"]
+        print(f"report archive ({archive['reports']} reports, {archive['db_mb']} MB, "
+              f"built in {archive['build_seconds']}s, single write p50 {archive['single_write']['p50'] * 1000:.2f} ms)")
+        for name, entry in archive["queries"].items():
+            stats = entry["latency"]
+            print(f"  {name:28} p50 {stats['p50'] * 1000:8.3f}ms  p99 {stats['p99'] * 1000:8.3f}ms  "
+                  f"max {stats['max'] * 1000:8.3f}ms  ({entry['rows']} rows)")
+    if "profiles" in results:
+        print("research runs in one market (competitor profile index)")
+        for label, entry in results["profiles"].items():
+            row(f"{label} index", entry["latency"])
+            print(f"  {'':28} per run: searches {entry['searches']}, pages {entry['pages']}, "
+                  f"LLM calls {entry['llm_calls']}")
+    if "parser" in results:
+        print("parse_report")
+        for name, stats in results["parser"].items():
+            print(f"  {name:36} {stats['kb']:8.1f} KB  {stats['p50'] * 1000:8.2f} ms")
+    print(f"fake services: {results['fake_services']}")
+
+
+def collect_p50s(results: dict) -> dict:
+    """Flatten the p50 timings that --compare checks"""
+    p50s = {}
+    if "crew" in results:
+        p50s["crew.end_to_end"] = results["crew"]["latency"]["p50"]
+        for name, stats in results["crew"]["tasks"].items():
+            p50s[f"crew.{name}"] = stats["p50"]
+    if "modes" in results:
+        for mode, entry in results["modes"].items():
+            p50s[f"modes.{mode}"] = entry["latency"]["p50"]
+    if "api" in results:
+        p50s["api.latency"] = results["api"]["latency"]["p50"]
+    if "batch" in results:
+        p50s["batch.seconds"] = results["batch"]["seconds"]
+    if "workers" in results:
+        for workers, entry in results["workers"].items():
+            p50s[f"workers.{workers}"] = entry["latency"]["p50"]
+    if "ratelimit" in results:
+        p50s["ratelimit.scheduled"] = results["ratelimit"]["scheduled"]["seconds"]
+    if "scrape" in results:
+        p50s["scrape.digest"] = results["scrape"]["digest"]["latency"]["p50"]
+    if "archive" in results:
+        for name, entry in results["archive"]["queries"].items():
+            p50s[f"archive.{name}"] = entry["latency"]["p50"]
+    if "profiles" in results:
+        for label, entry in results["profiles"].items():
+            p50s[f"profiles.{label}"] = entry["latency"]["p50"]
+    if "parser" in results:
+        for name, stats in results["parser"].items():
+            p50s[f"parser.{name}"] = stats["p50"]
+    return p50s
+
+
+def compare(results: dict, baseline_path: str, tolerance: float) -> int:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = collect_p50s(json.load(f))
+    regressions = 0
+    for key, value in collect_p50s(results).items():
+        before = baseline.get(key)
+        if not before:
+            continue
+        change = (value - before) / before
+        flag = "REGRESSION" if change > tolerance else ""
+        regressions += bool(flag)
+        print(f"  {key:44} {before:9.4f}s -> {value:9.4f}s  {change:+7.1%} {flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("suites", nargs="*", metavar="suite", help="crew, modes, api, batch, ratelimit, workers, scrape, archive, profiles and/or parser (default: all)")
+    parser.add_argument("--runs", type=int, default=3, help="sequential crew kickoffs")
+    parser.add_argument("--clients", type=int, default=4, help="concurrent API clients")
+    parser.add_argument("--requests", type=int, default=8, help="total API requests")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--timeout", type=float, default=600, help="per-request timeout (seconds)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake chat completion")
+    parser.add_argument("--search-latency", type=float, default=0.02, help="seconds per fake search/page")
+    parser.add_argument("--output-scale", type=int, default=1, help="repeat fake research answers N times")
+    parser.add_argument("--prompt-latency", type=float, default=0.0, help="fake seconds per 1000 prompt tokens")
+    parser.add_argument("--llm-rpm", type=float, default=120, help="fake provider's LLM requests/min for ratelimit")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated gunicorn worker counts for workers")
+    parser.add_argument("--reports", type=int, default=100000, help="synthetic reports in the archive for archive")
+    parser.add_argument("--archive-repeat", type=int, default=50, help="times each archive query is timed")
+    parser.add_argument("--parser-scale", type=int, default=64, help="repeat corpus documents N times")
+    parser.add_argument("--fake-port", type=int, default=0, help="port for the fake services (0 = any)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline results file to compare p50s against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown for --compare")
+    args = parser.parse_args()
+    suites = args.suites or ["crew", "modes", "api", "batch", "ratelimit", "workers", "scrape", "archive", "profiles",
+                             "parser"]
+    unknown = set(suites) - {"crew", "modes", "api", "batch", "ratelimit", "workers", "scrape", "archive", "profiles",
+                             "parser"}
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(sorted(unknown))}")
+
+    services = FakeServices(args.fake_port, args.llm_latency, args.search_latency, args.output_scale,
+                            args.prompt_latency).start()
+    configure_environment(services, args)
+    if args.url:
+        print(f"Benchmarking {args.url}; start it with these variables to use the fake services:")
+        for name, value in services.env().items():
+            print(f"  {name}={value}")
+
+    results = {"settings": vars(args)}
+    try:
+        if "crew" in suites:
+            results["crew"] = bench_crew(args)
+        if "modes" in suites:
+            results["modes"] = bench_modes(args)
+        if "api" in suites:
+            results["api"] = bench_api(args)
+        if "batch" in suites:
+            results["batch"] = bench_batch(args, services)
+        if "ratelimit" in suites:
+            results["ratelimit"] = bench_ratelimit(args, services)
+        if "workers" in suites:
+            results["workers"] = bench_workers(args)
+        if "scrape" in suites:
+            results["scrape"] = bench_scrape(args, services)
+        if "archive" in suites:
+            results["archive"] = bench_archive(args)
+        if "profiles" in suites:
+            results["profiles"] = bench_profiles(args, services)
+        if "parser" in suites:
+            results["parser"] = bench_parser(args)
+    finally:
+        services.stop()
+    results["fake_services"] = dict(services.counters)
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    failed = any(entry["missed"] for entry in results.get("modes", {}).values())
+    if args.compare:
+        print(f"compared with {args.compare} (tolerance {args.tolerance:.0%})")
+        failed = compare(results, args.compare, args.tolerance) > 0 or failed
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
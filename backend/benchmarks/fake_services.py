@@ -0,0 +1,401 @@
+"""
+Deterministic offline stand-ins for the LLM, Serper and scraped websites.
+
+One local HTTP server provides:
+
+- POST /v1/chat/completions  OpenAI-compatible chat completions. The agent is
+  recognised from its role in the system prompt and answers with a canned
+  ReAct script: researchers call their tools first, then every agent returns
+  a fixed final answer (report text comes from benchmarks/corpus).
+- POST /search               Serper-style organic results whose links point
+                             back at this server.
+- GET  /page/<slug>          Small HTML pages with an ETag, for the scrape tool.
+
+Point the crew at it through the environment (see FakeServices.env()), e.g.
+
+    cd backend
+    python benchmarks/fake_services.py --port 8900 --llm-latency 0.5
+    OPENAI_API_BASE=http://127.0.0.1:8900/v1 SERPER_BASE_URL=http://127.0.0.1:8900 ... uvicorn api.app.main:app
+
+Every response is a pure function of the request, so runs are repeatable.
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+SEARCH_TOOL = "Search the internet with Serper"
+SCRAPE_TOOL = "Read website content"
+LOOKUP_TOOL = "Look up competitor profiles"
+
+MARKET_SIZING_ANSWER = """## Market Overview
+The market for {idea} sits inside the broader personal finance software segment, valued at roughly USD 1.3 billion in 2023 with a CAGR of about 5.7% through 2030 [1]. Freelancers and gig workers are the fastest growing user group [2].
+
+- TAM: USD 1.3B (2023), SAM: USD 260M, SOM: USD 13M within five years
+- Growth drivers: open banking APIs, mobile-first budgeting, independent work
+
+## Sources
+[1] Example Research — [Market report]({base}/page/market-report) — Accessed: 2025-01-12
+[2] Example Survey — [Freelance survey]({base}/page/freelance-survey) — Accessed: 2025-01-12
+"""
+
+TRENDS_ANSWER = """## Trends & Drivers
+- Open banking adoption lowers aggregation costs [1]
+- On-device machine learning makes private categorization practical [2]
+
+## Opportunities & Risks
+- Opportunity: cash-flow forecasting for irregular income
+- Risk: aggregator price increases compress margins
+
+## Sources
+[1] Example Bank — [Open banking outlook]({base}/page/open-banking) — Accessed: 2025-01-12
+[2] Example Labs — [On-device ML]({base}/page/on-device-ml) — Accessed: 2025-01-12
+"""
+
+# Role fragment -> (task kind, tools to call before answering)
+AGENT_SCRIPTS = [
+    ("Market Sizing Analyst", "market_sizing", [SEARCH_TOOL]),
+    ("Competitive Intelligence Analyst", "competitor", [LOOKUP_TOOL, SEARCH_TOOL, SCRAPE_TOOL]),
+    ("Trends & Risk Analyst", "trends", [SEARCH_TOOL]),
+    ("Financial Forecasting Analyst", "forecast", []),
+    ("Executive Report Synthesizer", "synthesis", []),
+]
+
+IDEA_RE = re.compile(r'for "([^"\n]{1,300})"')
+YEAR_RE = re.compile(r'"(?:start_)?year":\s*(\d{4})')
+FRESH_PROFILES_RE = re.compile(r"Found (\d+) fresh profile")
+# Fresh competitor profiles from a lookup that make the web research unnecessary
+ENOUGH_PROFILES = 5
+
+
+def _read_corpus(name: str) -> str:
+    with open(os.path.join(CORPUS_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class FakeServices:
+    """
+    Local fake LLM + Serper + website server.
+
+    `llm_latency` and `search_latency` (seconds) are added to every chat
+    completion and search/page request, and `prompt_latency` (seconds per
+    1000 prompt tokens) to chat completions, so longer prompts are slower as
+    with a real model. `output_scale` repeats the research answers that many
+    times to simulate long model outputs. Call counts are kept in `counters`.
+
+    Like a real provider it can enforce rate limits: `llm_rpm` and
+    `llm_tpm` (prompt tokens) for chat completions and `search_rpm` for
+    searches, as token buckets holding ten seconds' worth (a provider's
+    per-minute limit allows some burst). Requests over a limit get a 429
+    with a Retry-After header and are counted in `counters["rate_limited"]`.
+    """
+
+    def __init__(self, port: int = 0, llm_latency: float = 0.0, search_latency: float = 0.0,
+                 output_scale: int = 1, prompt_latency: float = 0.0, llm_rpm: float = 0, llm_tpm: float = 0,
+                 search_rpm: float = 0):
+        self.llm_latency = llm_latency
+        self.prompt_latency = prompt_latency
+        self.search_latency = search_latency
+        self.output_scale = max(1, output_scale)
+        self.counters = {
+            "llm_calls": 0, "searches": 0, "pages": 0, "prompt_tokens": 0, "completion_tokens": 0, "rate_limited": 0,
+        }
+        self._lock = threading.Lock()
+        self.set_limits(llm_rpm, llm_tpm, search_rpm)
+        self._competitor_answer = _read_corpus("research_competitors.md")
+        self._synthesis_answer = _read_corpus("synthesis_fintech.md")
+        self._page_template = _read_corpus("competitor_page.html")
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> dict:
+        """Environment variables that route the crew's LLM and tools to this server"""
+        return {
+            "OPENAI_API_BASE": f"{self.base_url}/v1",
+            "OPENAI_API_KEY": "fake-key",
+            "MODEL": "openai/fake-model",
+            "SERPER_API_KEY": "fake-key",
+            "SERPER_BASE_URL": self.base_url,
+        }
+
+    def start(self) -> "FakeServices":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-services", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self, **amounts) -> None:
+        with self._lock:
+            for key, amount in amounts.items():
+                self.counters[key] += amount
+
+    def set_limits(self, llm_rpm: float = 0, llm_tpm: float = 0, search_rpm: float = 0) -> None:
+        """Change the rate limits (0 = no limit); the buckets start out full"""
+        limits = {
+            "llm": (llm_rpm / 60.0, max(1.0, llm_rpm / 6.0)) if llm_rpm else None,
+            "llm_tokens": (llm_tpm / 60.0, llm_tpm / 6.0) if llm_tpm else None,
+            "search": (search_rpm / 60.0, max(1.0, search_rpm / 6.0)) if search_rpm else None,
+        }
+        with self._lock:
+            self._limits = limits
+            self._buckets = {name: [limit[1], time.monotonic()] for name, limit in limits.items() if limit}
+
+    def _over_limit(self, **amounts) -> Optional[float]:
+        """Take from the rate limit buckets; seconds to wait if any limit is exceeded (nothing taken then)"""
+        with self._lock:
+            now = time.monotonic()
+            waits = []
+            for name, amount in amounts.items():
+                if name not in self._buckets:
+                    continue
+                rate, capacity = self._limits[name]
+                bucket = self._buckets[name]
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+                if bucket[0] < min(amount, capacity):
+                    waits.append((min(amount, capacity) - bucket[0]) / rate)
+            if waits:
+                self.counters["rate_limited"] += 1
+                return max(waits)
+            for name, amount in amounts.items():
+                if name in self._buckets:
+                    self._buckets[name][0] -= amount
+            return None
+
+    # Canned behaviour
+
+    def complete(self, messages: list) -> str:
+        """Return the assistant message for a chat request"""
+        system = str(messages[0].get("content", "")) if messages else ""
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+        steps = sum(1 for m in messages if m.get("role") == "assistant")
+
+        kind, tools = "synthesis", []
+        for fragment, script_kind, script_tools in AGENT_SCRIPTS:
+            if fragment in system:
+                # Only the tools this agent was given (quick runs do not scrape)
+                kind, tools = script_kind, [tool for tool in script_tools if tool in prompt]
+                break
+
+        idea_match = IDEA_RE.search(prompt)
+        idea = idea_match.group(1) if idea_match else "the startup idea"
+
+        fresh = FRESH_PROFILES_RE.search(prompt)
+        if tools[:1] == [LOOKUP_TOOL] and fresh is not None and int(fresh.group(1)) >= ENOUGH_PROFILES:
+            # Every competitor is known from earlier runs: no searching or scraping
+            tools = tools[:1]
+
+        if steps < len(tools):
+            tool = tools[steps]
+            if tool == LOOKUP_TOOL:
+                action_input = json.dumps({"market": idea, "names": ""})
+            elif tool == SEARCH_TOOL:
+                # Queries use the idea's leading words, so ideas in the same
+                # sector issue overlapping searches (as real agents tend to)
+                sector = " ".join(idea.split()[:6])
+                action_input = json.dumps({"search_query": f"{sector} {kind.replace('_', ' ')}"})
+            else:
+                action_input = json.dumps({"website_url": f"{self.base_url}/page/competitor-1"})
+            return f"Thought: I should use the {tool} tool.\nAction: {tool}\nAction Input: {action_input}"
+
+        return "Thought: I now know the final answer\nFinal Answer: " + self._final_answer(kind, idea, prompt)
+
+    def _final_answer(self, kind: str, idea: str, prompt: str) -> str:
+        if kind == "forecast":
+            year_match = YEAR_RE.search(prompt)
+            start = int(year_match.group(1)) if year_match else 2025
+            # Parameters only; the backend computes the series (forecasting.py)
+            return json.dumps({
+                "title": f"5-Year Growth Forecast for {idea}"[:100],
+                "unit": "USD",
+                "start_year": start,
+                "tam": 5000000000,
+                "sam": 800000000,
+                "cagr": {"low": 0.08, "base": 0.14, "high": 0.2},
+                "peak_share": {"low": 0.002, "base": 0.005, "high": 0.01},
+                "adoption_midpoint": 3,
+                "adoption_steepness": 1.2,
+                "price_change": {"low": -0.03, "base": 0, "high": 0.03},
+            })
+        if kind == "market_sizing":
+            text = MARKET_SIZING_ANSWER
+        elif kind == "competitor":
+            text = self._competitor_answer
+        elif kind == "trends":
+            text = TRENDS_ANSWER
+        else:
+            return self._synthesis_answer
+        text = text.replace("{idea}", idea).replace("{base}", self.base_url)
+        return "\n\n".join([text] * self.output_scale)
+
+    def search_results(self, query: str) -> dict:
+        slug = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-")[:40] or "result"
+        return {
+            "searchParameters": {"q": query, "type": "search", "engine": "google"},
+            "organic": [
+                {
+                    "title": f"{query} — result {i}",
+                    "link": f"{self.base_url}/page/{slug}-{i}",
+                    "snippet": f"Market data, competitors and trends for {query} (result {i}).",
+                    "position": i,
+                }
+                for i in range(1, 6)
+            ],
+        }
+
+    def page(self, slug: str) -> str:
+        """
+        A competitor landing page like real ones: navigation, cookie banner,
+        footer, inline styles and scripts, and an embedded app-state blob
+        around the content (features, a pricing table, customer quotes)
+        """
+        name = slug.replace("-", " ").title()
+        # Client-side frameworks ship the page's data again as JSON
+        state = json.dumps({
+            "route": f"/{slug}",
+            "experiments": {f"exp_{i}": {"variant": "b", "weight": 0.5} for i in range(40)},
+            "translations": {f"key_{i}": f"{name} translated string number {i}" for i in range(400)},
+        })
+        # A mega menu and a sitemap footer, as most product sites have
+        menu = "".join(
+            f'<div class="menu-column"><h4>{section}</h4><ul>' + "".join(
+                f'<li><a href="/{section.lower()}/{i}">{section} item {i}</a>'
+                f'<span>Short description of {section.lower()} item {i} for {name}</span></li>'
+                for i in range(1, 9)
+            ) + "</ul></div>"
+            for section in ("Product", "Solutions", "Resources", "Company")
+        )
+        sitemap = "".join(f'<a href="/sitemap/{i}">Sitemap link {i}</a>' for i in range(1, 61))
+        return (self._page_template.replace("{name}", name).replace("{state}", state)
+                .replace("{menu}", menu).replace("{sitemap}", sitemap))
+
+    # HTTP plumbing
+
+    def _handler(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; with Nagle on, a reused
+            # connection waits ~40 ms for the client's delayed ACK per response
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _rate_limited(self, wait: float):
+                body = {"error": {"message": "Rate limit exceeded", "type": "rate_limit_error", "code": "rate_limit_exceeded"}}
+                self._send(429, json.dumps(body).encode("utf-8"), "application/json",
+                           {"Retry-After": f"{max(wait, 0.001):.3f}"})
+
+            def _json_body(self) -> dict:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_POST(self):
+                if self.path.rstrip("/").endswith("/chat/completions"):
+                    request = self._json_body()
+                    messages = request.get("messages", [])
+                    prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+                    wait = services._over_limit(llm=1, llm_tokens=prompt_tokens)
+                    if wait is not None:
+                        self._rate_limited(wait)
+                        return
+                    time.sleep(services.llm_latency + services.prompt_latency * prompt_tokens / 1000)
+                    content = services.complete(messages)
+                    completion_tokens = len(content) // 4
+                    services._count(llm_calls=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+                    body = {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": request.get("model", "fake-model"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": {
+                            "prompt_tokens": prompt_tokens,
+                            "completion_tokens": completion_tokens,
+                            "total_tokens": prompt_tokens + completion_tokens,
+                        },
+                    }
+                    self._send(200, json.dumps(body).encode("utf-8"), "application/json")
+                elif self.path.rstrip("/") in ("/search", "/news"):
+                    request = self._json_body()
+                    wait = services._over_limit(search=1)
+                    if wait is not None:
+                        self._rate_limited(wait)
+                        return
+                    time.sleep(services.search_latency)
+                    services._count(searches=1)
+                    body = services.search_results(str(request.get("q", "")))
+                    self._send(200, json.dumps(body).encode("utf-8"), "application/json")
+                else:
+                    self._send(404, b"{}", "application/json")
+
+            def do_GET(self):
+                if not self.path.startswith("/page/"):
+                    self._send(404, b"not found", "text/plain")
+                    return
+                slug = self.path[len("/page/"):].split("?")[0] or "index"
+                etag = f'"{slug}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, b"", "text/html", {"ETag": etag})
+                    return
+                time.sleep(services.search_latency)
+                services._count(pages=1)
+                self._send(200, services.page(slug).encode("utf-8"), "text/html; charset=utf-8", {"ETag": etag})
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the fake LLM/Serper/website server")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds added to each chat completion")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="seconds added to each search/page")
+    parser.add_argument("--output-scale", type=int, default=1, help="repeat research answers N times")
+    parser.add_argument("--prompt-latency", type=float, default=0.0, help="seconds per 1000 prompt tokens")
+    parser.add_argument("--llm-rpm", type=float, default=0, help="chat completions per minute before 429s (0 = no limit)")
+    parser.add_argument("--llm-tpm", type=float, default=0, help="prompt tokens per minute before 429s (0 = no limit)")
+    parser.add_argument("--search-rpm", type=float, default=0, help="searches per minute before 429s (0 = no limit)")
+    args = parser.parse_args()
+
+    services = FakeServices(args.port, args.llm_latency, args.search_latency, args.output_scale,
+                            args.prompt_latency, args.llm_rpm, args.llm_tpm, args.search_rpm)
+    for name, value in services.env().items():
+        print(f"{name}={value}")
+    try:
+        services._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
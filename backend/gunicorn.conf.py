@@ -0,0 +1,80 @@
+"""
+Gunicorn settings for running the API with several uvicorn workers.
+
+    cd backend
+    gunicorn api.app.main:app -c gunicorn.conf.py
+
+Each worker is a separate process with its own research pool, so jobs,
+cached results, tool cache entries, checkpoints and cancellations are kept
+in SQLite files (WAL mode) that every worker reads and writes; a job
+submitted to one worker can be polled, streamed or cancelled through any
+other. Request coalescing, the call scheduler's queues and /metrics are
+still per worker (the provider limits are split between workers).
+
+The worker count is WEB_CONCURRENCY if set, otherwise as many workers as
+there are CPUs available to the container, capped by how many fit in its
+memory at WORKER_MEMORY_MB each.
+"""
+import multiprocessing
+import os
+
+
+def _cpu_count() -> int:
+    """CPUs this container may use (cgroup quota, then affinity)"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, int(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+def _memory_mb() -> int:
+    """Memory this container may use in MB (cgroup limit, then physical memory)"""
+    try:
+        with open("/sys/fs/cgroup/memory.max") as f:
+            limit = f.read().strip()
+        if limit != "max":
+            return int(limit) // (1024 * 1024)
+    except (OSError, ValueError):
+        pass
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+
+
+def worker_count() -> int:
+    if os.getenv("WEB_CONCURRENCY"):
+        return max(1, int(os.environ["WEB_CONCURRENCY"]))
+    # Each worker imports crewai and runs its own crews, so memory usually
+    # runs out before CPU does
+    by_memory = _memory_mb() // int(os.getenv("WORKER_MEMORY_MB", "512"))
+    return max(1, min(_cpu_count(), by_memory))
+
+
+workers = worker_count()
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# Research runs in the workers' pools, not on the event loop, so a worker
+# that stops answering for this long is stuck; warmup imports happen in the
+# background too
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("WORKER_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+# Each worker gets its own SO_REUSEPORT listening socket and the kernel
+# spreads new connections across them. With one shared socket the worker
+# that wakes first takes nearly every connection, and since crews run off
+# the event loop a busy worker keeps winning while the others sit idle
+reuse_port = True
+accesslog = "-"
+
+# Workers inherit these: the app sizes its shared state from WEB_CONCURRENCY
+# (cancellations, scheduler shares), and with more than one worker jobs and
+# results must live on disk to be visible to all of them
+os.environ["WEB_CONCURRENCY"] = str(workers)
+if workers > 1:
+    os.environ.setdefault("JOB_STORE", "sqlite")
+    os.environ.setdefault("RESULT_CACHE", "disk")
@@ -0,0 +1,185 @@
+"""
+Per-run budgets: a wall-clock deadline, a cap on tool calls and a cap on LLM
+tokens, shared by every agent in the crew.
+
+The agents have no max_iter of their own, so without a budget a run can keep
+searching for as long as the model wants to. RunBudget checks the limits
+after every agent step and on every tool call. Once one is used up the run
+is not failed; instead:
+
+- tools stop calling out and tell the agent to give its final answer
+- every agent's max_iter drops to 1, which makes CrewAI ask it for its final
+  answer now (and lets later tasks answer in one step)
+
+so the remaining tasks still run and the synthesis works with whatever
+research was gathered. `exhausted` records which limit ran out.
+
+The same checks stop a cancelled run: once its `cancelled` predicate is
+true, the next agent step (or tool call) raises RunCancelled, and the
+agents' retries are turned off so the crew stops instead of retrying.
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+EXHAUSTED_MESSAGE = (
+    "The research budget for this run is used up ({reason}), so this tool is no longer available. "
+    "Do not call any more tools: give your Final Answer now, based on what you have already found."
+)
+
+
+class RunCancelled(Exception):
+    """Raised inside a run at its next agent step or tool call once the run has been cancelled"""
+
+
+class RunBudget:
+    """
+    Limits for one crew run. Any limit left as None is not enforced.
+
+    Use after the crew is built and before kickoff:
+
+        budget = RunBudget(deadline_seconds=300, max_tool_calls=12).attach(crew)
+        crew.kickoff(inputs=inputs)
+        budget.usage()
+    """
+
+    def __init__(self, deadline_seconds: Optional[float] = None, max_tool_calls: Optional[int] = None,
+                 max_tokens: Optional[int] = None, cancelled: Optional[Callable[[], bool]] = None):
+        self.deadline_seconds = deadline_seconds
+        self.max_tool_calls = max_tool_calls
+        self.max_tokens = max_tokens
+        # Polled at every check; True stops the run (see RunCancelled)
+        self.cancelled = cancelled
+        # Set by the first attach; a retried stage's crew keeps the run's deadline
+        self.started_at: Optional[float] = None
+        self.tool_calls = 0
+        self.exhausted: Optional[str] = None
+        self.cancelled_at: Optional[float] = None
+        self._agents = []
+        self._lock = threading.Lock()
+
+    def attach(self, crew) -> "RunBudget":
+        """
+        Give the crew's agents budgeted tools and check the budget after each
+        of their steps. Attaching again (a retried stage's new crew) keeps
+        the run's start time, and if the budget already ran out the new
+        agents are wound down straight away.
+        """
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        # Tools are shared by all runs, so each run gets its own copies. Tasks
+        # hold their own list of their agent's tools, so both are replaced
+        for agent in crew.agents:
+            self._agents.append(agent)
+            agent.tools = self._budgeted(agent.tools)
+        if self.exhausted is not None:
+            self._wind_down(crew.agents)
+        for task in crew.tasks:
+            task.tools = self._budgeted(task.tools)
+        previous = crew.step_callback
+
+        def on_step(step):
+            self.check()
+            if previous is not None:
+                previous(step)
+
+        crew.step_callback = on_step
+        return self
+
+    def _budgeted(self, tools) -> list:
+        return [
+            tool.model_copy(update={"budget": self}) if "budget" in type(tool).model_fields else tool
+            for tool in tools or []
+        ]
+
+    # Checks
+
+    def tokens(self) -> int:
+        """LLM tokens (prompt + completion) used by the run's agents so far"""
+        total = 0
+        for agent in self._agents:
+            process = getattr(agent, "_token_process", None)
+            if process is not None:
+                total += process.get_summary().total_tokens
+        return total
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at if self.started_at is not None else 0.0
+
+    def check(self) -> Optional[str]:
+        """
+        Return which limit is used up (deadline, tool_calls or tokens), if
+        any, and wind the run down. Using exactly max_tool_calls is fine; the
+        tool_calls limit only runs out when take_tool_call refuses a call.
+        Raises RunCancelled once the run has been cancelled.
+        """
+        if self.cancelled_at is not None or (self.cancelled is not None and self.cancelled()):
+            self._cancel()
+        if self.exhausted is not None:
+            return self.exhausted
+        reason = None
+        if self.deadline_seconds is not None and self.elapsed() >= self.deadline_seconds:
+            reason = "deadline"
+        elif self.max_tokens is not None and self.tokens() >= self.max_tokens:
+            reason = "tokens"
+        if reason is not None:
+            self._exhaust(reason)
+        return self.exhausted
+
+    def take_tool_call(self) -> bool:
+        """Count a tool call; False (and no call should be made) once the budget is used up. Raises RunCancelled once cancelled"""
+        if self.check() is not None:
+            return False
+        with self._lock:
+            if self.max_tool_calls is not None and self.tool_calls >= self.max_tool_calls:
+                allowed = False
+            else:
+                self.tool_calls += 1
+                allowed = True
+        if not allowed:
+            self._exhaust("tool_calls")
+        return allowed
+
+    def exhausted_message(self) -> str:
+        """What a tool returns instead of its result once the budget is used up"""
+        return EXHAUSTED_MESSAGE.format(reason=(self.exhausted or "limit reached").replace("_", " "))
+
+    def _cancel(self) -> None:
+        with self._lock:
+            if self.cancelled_at is None:
+                self.cancelled_at = self.elapsed()
+        # Agents retry a failed task (max_retry_limit times); a cancelled one
+        # must not be retried
+        for agent in self._agents:
+            agent.max_retry_limit = 0
+        raise RunCancelled(f"Research run cancelled after {self.cancelled_at:.1f}s")
+
+    def _exhaust(self, reason: str) -> None:
+        with self._lock:
+            if self.exhausted is not None:
+                return
+            self.exhausted = reason
+        self._wind_down(self._agents)
+
+    @staticmethod
+    def _wind_down(agents) -> None:
+        # With max_iter 1 CrewAI asks a running agent for its final answer on
+        # its next step, and agents that have not started answer in one step
+        for agent in agents:
+            agent.max_iter = 1
+            executor = getattr(agent, "agent_executor", None)
+            if executor is not None:
+                executor.max_iter = 1
+
+    def usage(self) -> dict:
+        """Limits and what the run used of them"""
+        return {
+            "deadline_seconds": self.deadline_seconds,
+            "max_tool_calls": self.max_tool_calls,
+            "max_tokens": self.max_tokens,
+            "elapsed_seconds": round(self.elapsed(), 3),
+            "tool_calls": self.tool_calls,
+            "tokens": self.tokens(),
+            "exhausted": self.exhausted,
+            "cancelled_after_seconds": round(self.cancelled_at, 3) if self.cancelled_at is not None else None,
+        }
@@ -0,0 +1,245 @@
+"""
+Per-run checkpoints of task outputs, for replaying a run from any task.
+
+Every run gets a run id, and each task's raw output (plus its structured
+output, e.g. the validated forecast) is saved as the task finishes. A replay
+builds a fresh crew in which the tasks that are not rerun are given their
+checkpointed output and left out, so regenerating the synthesis from stored
+research and forecast costs one LLM call instead of a full crew run.
+
+Checkpoints are plain JSON in SQLite (no crewai objects), so they are shared
+by the API, its worker processes and the CLI (`replay <run_id> [task]`).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+class ReplayError(ValueError):
+    """A replay that cannot run: unknown run or task, or a missing checkpoint"""
+
+
+class CheckpointStore:
+    """
+    SQLite store of runs (inputs, mode, status, parent run) and their task
+    outputs. Runs not updated for `ttl` seconds are purged.
+    """
+
+    def __init__(self, path: str, ttl: int = 604800):
+        self.path = path
+        self.ttl = ttl
+        self.replays = 0
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                " run_id TEXT PRIMARY KEY,"
+                " inputs TEXT NOT NULL,"
+                " mode TEXT NOT NULL,"
+                " parent TEXT,"
+                " status TEXT NOT NULL,"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS task_outputs ("
+                " run_id TEXT NOT NULL,"
+                " task TEXT NOT NULL,"
+                " raw TEXT NOT NULL,"
+                " structured TEXT,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (run_id, task))"
+            )
+        self.purge()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def start_run(self, run_id: str, inputs: dict, mode: str = "deep", parent: Optional[str] = None,
+                  outputs: Optional[dict] = None) -> None:
+        """
+        Record a run as running. `outputs` ({task: {"raw", "structured"}})
+        are the outputs a replay carried over from its parent run, saved so
+        the new run is complete on its own.
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs (run_id, inputs, mode, parent, status, error, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, 'running', NULL, ?, ?)",
+                (run_id, json.dumps(inputs), mode, parent, now, now),
+            )
+            conn.execute("DELETE FROM task_outputs WHERE run_id = ?", (run_id,))
+            conn.executemany(
+                "INSERT INTO task_outputs (run_id, task, raw, structured, created_at) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (run_id, task, output["raw"], json.dumps(output.get("structured")), now)
+                    for task, output in (outputs or {}).items()
+                ],
+            )
+            if parent is not None:
+                self.replays += 1
+
+    def save_task(self, run_id: str, task: str, raw: str, structured: Optional[dict] = None) -> None:
+        """Checkpoint one finished task's output"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO task_outputs (run_id, task, raw, structured, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (run_id, task, raw, json.dumps(structured), now),
+            )
+            conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (now, run_id))
+
+    def finish_run(self, run_id: str, error: Optional[str] = None, cancelled: bool = False) -> None:
+        """Mark a run succeeded, failed with `error`, or cancelled (a replay resumes it)"""
+        status = "cancelled" if cancelled else "failed" if error else "succeeded"
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET status = ?, error = ?, updated_at = ? WHERE run_id = ?",
+                (status, error, time.time(), run_id),
+            )
+
+    def get_run(self, run_id: str) -> Optional[dict]:
+        """
+        A run as a dict with run_id, inputs, mode, parent, status, error,
+        created_at, updated_at and outputs ({task: {"raw", "structured",
+        "created_at"}}); or None if unknown or expired.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT run_id, inputs, mode, parent, status, error, created_at, updated_at FROM runs"
+                " WHERE run_id = ? AND updated_at >= ?",
+                (run_id, time.time() - self.ttl),
+            ).fetchone()
+            if row is None:
+                return None
+            tasks = conn.execute(
+                "SELECT task, raw, structured, created_at FROM task_outputs WHERE run_id = ? ORDER BY created_at",
+                (run_id,),
+            ).fetchall()
+        return {
+            "run_id": row[0],
+            "inputs": json.loads(row[1]),
+            "mode": row[2],
+            "parent": row[3],
+            "status": row[4],
+            "error": row[5],
+            "created_at": row[6],
+            "updated_at": row[7],
+            "outputs": {
+                task: {"raw": raw, "structured": json.loads(structured) if structured else None, "created_at": created_at}
+                for task, raw, structured, created_at in tasks
+            },
+        }
+
+    def purge(self) -> None:
+        """Drop runs (and their outputs) not updated within the TTL"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM runs WHERE updated_at < ?", (time.time() - self.ttl,))
+            conn.execute("DELETE FROM task_outputs WHERE run_id NOT IN (SELECT run_id FROM runs)")
+
+    def size(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def metrics(self) -> dict:
+        return {"runs": self.size(), "replays": self.replays}
+
+
+def replay_plan(crew, run: dict, from_task: Optional[str] = None) -> tuple:
+    """
+    Work out which tasks of `crew` a replay of `run` reruns.
+
+    `from_task` and every task that (directly or through other tasks) takes
+    it as context are rerun; all other tasks reuse their checkpointed output.
+    Without `from_task` the run resumes: the tasks with no checkpoint (and
+    their dependents) are rerun, or the final task if every task has one.
+
+    Returns (names of the rerun tasks in crew order, {task: checkpointed
+    output} for the kept tasks). Raises ReplayError for an unknown task or a
+    kept task with no checkpoint.
+    """
+    names = [task.name for task in crew.tasks]
+    outputs = run["outputs"]
+    if from_task is None:
+        rerun = {name for name in names if name not in outputs} or {names[-1]}
+    elif from_task not in names:
+        raise ReplayError(f"Unknown task {from_task!r} (expected one of {', '.join(names)})")
+    else:
+        rerun = {from_task}
+    # Tasks come after their context tasks, so one pass in order is enough
+    for task in crew.tasks:
+        context = task.context if isinstance(task.context, list) else []
+        if any(dependency.name in rerun for dependency in context):
+            rerun.add(task.name)
+    kept = [name for name in names if name not in rerun]
+    missing = [name for name in kept if name not in outputs]
+    if missing:
+        raise ReplayError(f"Run {run['run_id']} has no checkpoint for {', '.join(missing)}; replay from an earlier task")
+    return [name for name in names if name in rerun], {name: outputs[name] for name in kept}
+
+
+def restore_outputs(crew, outputs: dict):
+    """
+    Give the crew's tasks named in `outputs` ({task: raw text, or {"raw",
+    "structured"}}) that output, and leave them out of the crew, so only the
+    remaining tasks run. Returns the crew.
+    """
+    from crewai.tasks.task_output import TaskOutput
+
+    for task in crew.tasks:
+        if task.name not in outputs:
+            continue
+        output = outputs[task.name]
+        if isinstance(output, str):
+            output = {"raw": output}
+        structured = output.get("structured")
+        task.output = TaskOutput(
+            name=task.name, description=task.description, raw=output["raw"],
+            pydantic=task.output_pydantic.model_validate(structured) if structured and task.output_pydantic else None,
+            json_dict=structured if structured and not task.output_pydantic else None,
+            agent=task.agent.role if task.agent else "",
+        )
+    # Later tasks still list these in their context and read their output
+    crew.tasks = [task for task in crew.tasks if task.name not in outputs]
+    return crew
+
+
+def checkpoint_output(output) -> dict:
+    """A finished TaskOutput as a checkpoint entry {"raw", "structured"}"""
+    if output.pydantic is not None:
+        structured = output.pydantic.model_dump()
+    else:
+        structured = output.json_dict or None
+    return {"raw": str(output.raw), "structured": structured}
+
+
+_checkpoint_store: Optional[CheckpointStore] = None
+_checkpoint_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> Optional[CheckpointStore]:
+    """Process-wide checkpoint store from CHECKPOINT_PATH, or None when CHECKPOINTS=off"""
+    global _checkpoint_store
+    if os.getenv("CHECKPOINTS", "on").lower() == "off":
+        return None
+    with _checkpoint_store_lock:
+        if _checkpoint_store is None:
+            _checkpoint_store = CheckpointStore(
+                os.getenv("CHECKPOINT_PATH", "scout_checkpoints.db"),
+                ttl=int(os.getenv("CHECKPOINT_TTL", "604800")),
+            )
+        return _checkpoint_store
@@ -0,0 +1,253 @@
+"""
+Context compaction between tasks.
+
+By default CrewAI hands a task the full raw output of every task in its
+context, so the forecast and synthesis prompts carry all three research
+reports verbatim and grow with every verbose research run. CompactedTask
+replaces that with a digest of what the downstream task needs:
+
+- each report's sections, as short bullets (sentences with figures, links
+  and citations are kept first)
+- competitor entries reduced to "[Name](URL) — positioning; Strengths: ..."
+- one merged, deduplicated Sources list, with inline [n] citations renumbered
+  to match it
+- structured outputs (e.g. the validated forecast) passed through unchanged
+
+The digest is shrunk step by step until it fits the task's `context_budget`
+(tokens, set in tasks.yaml). Token counts are estimated at ~4 characters per
+token, which is close enough for budgeting; the exact prompt tokens of each
+run are in its trace. CONTEXT_COMPACTION=off restores the full context.
+"""
+import logging
+import os
+import re
+from typing import List, Optional, Tuple
+
+from crewai import Task
+from crewai.tasks.task_output import TaskOutput
+from pydantic import Field, PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+COMPACTION_ENABLED = os.getenv("CONTEXT_COMPACTION", "on").lower() != "off"
+
+HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s+(.+?)\s*#*\s*$")
+BULLET_RE = re.compile(r"^(\s*)(?:[-*+•]|\d+[.)])\s+(.*)$")
+SOURCE_LINE_RE = re.compile(r"^\s*(?:[-*•]\s*)?\[(\d+)\]\s*(.+)$")
+CITATION_RE = re.compile(r"\[(\d+)\](?!\()")
+BARE_CITATION_RE = re.compile(r"\s*\[\d+\](?!\()")
+URL_RE = re.compile(r"https?://[^\s)\]>]+")
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z\[(])")
+SOURCES_HEADING_RE = re.compile(r"\b(sources?|citations?|references?)\b", re.IGNORECASE)
+SIGNAL_RE = re.compile(r"\d|https?://|\[\d+\]")
+
+# Progressively tighter (items per section, characters per item) limits,
+# tried in order until the digest fits the budget
+SHRINK_STEPS = [(None, None), (12, 600), (8, 360), (6, 240), (5, 160), (4, 110), (3, 80), (2, 60)]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return (len(text) + 3) // 4
+
+
+def _clean(text: str) -> str:
+    return re.sub(r"\s+", " ", text.replace("**", "")).strip()
+
+
+def parse_sections(text: str) -> List[Tuple[Optional[str], List[str], List[str]]]:
+    """
+    Split a markdown report into (heading, items, source lines). Top-level
+    bullets become items with their nested bullets folded in; paragraphs are
+    split into sentences.
+    """
+    sections = []
+    heading, items, sources = None, [], []
+    is_sources = False
+    paragraph = []
+    # Indent of the bullet that started the current item (None after a paragraph)
+    item_indent = None
+
+    def flush_paragraph():
+        nonlocal item_indent
+        if paragraph:
+            items.extend(s for s in SENTENCE_RE.split(_clean(" ".join(paragraph))) if s)
+            paragraph.clear()
+            item_indent = None
+
+    for line in text.splitlines():
+        heading_match = HEADING_RE.match(line)
+        if heading_match:
+            flush_paragraph()
+            if items or sources:
+                sections.append((heading, items, sources))
+            heading, items, sources = _clean(heading_match.group(1)).rstrip(":"), [], []
+            is_sources = bool(SOURCES_HEADING_RE.search(heading))
+            item_indent = None
+            continue
+        if not line.strip():
+            flush_paragraph()
+            continue
+
+        source_match = SOURCE_LINE_RE.match(line)
+        if source_match and (is_sources or URL_RE.search(line)):
+            flush_paragraph()
+            sources.append(line.strip().lstrip("-*• "))
+            continue
+        if is_sources:
+            continue
+
+        bullet_match = BULLET_RE.match(line)
+        if bullet_match:
+            flush_paragraph()
+            indent, content = len(bullet_match.group(1)), _clean(bullet_match.group(2))
+            nested = item_indent is not None and indent > item_indent
+            if nested and not items[-1].endswith(":"):
+                # Detail of the current item (e.g. "Strengths: ..."): fold it in
+                separator = " " if items[-1].endswith((".", ";", ":")) else "; "
+                items[-1] = f"{items[-1]}{separator}{content}"
+                continue
+            if nested:
+                # Children of a label line ("Top 5 competitors:") are the items
+                items.pop()
+            if content:
+                items.append(content)
+                item_indent = indent
+        else:
+            paragraph.append(line)
+    flush_paragraph()
+    if items or sources:
+        sections.append((heading, items, sources))
+    return sections
+
+
+class SourceList:
+    """Sources merged across reports, deduplicated by URL (or text)"""
+
+    def __init__(self):
+        self.entries = []
+        self._numbers = {}
+
+    def add(self, line: str) -> int:
+        match = SOURCE_LINE_RE.match(line)
+        text = _clean(match.group(2) if match else line)
+        url = URL_RE.search(text)
+        key = url.group(0).rstrip(".,;").lower() if url else text.lower()
+        if key not in self._numbers:
+            self.entries.append(text)
+            self._numbers[key] = len(self.entries)
+        return self._numbers[key]
+
+    def render(self) -> str:
+        return "\n".join(f"[{number}] {text}" for number, text in enumerate(self.entries, 1))
+
+
+def _pick(items: List[str], max_items: Optional[int], max_chars: Optional[int]) -> List[str]:
+    """Keep up to max_items items, preferring ones with figures, links or citations, in original order"""
+    if max_items is not None and len(items) > max_items:
+        ranked = sorted(range(len(items)), key=lambda i: (not SIGNAL_RE.search(items[i]), i))
+        items = [items[i] for i in sorted(ranked[:max_items])]
+    if max_chars is not None:
+        items = [item if len(item) <= max_chars else item[:max_chars - 1].rstrip() + "…" for item in items]
+    return items
+
+
+def _render(blocks: List[Tuple[str, List[str]]], max_items: Optional[int], max_chars: Optional[int]) -> str:
+    parts = []
+    for heading, items in blocks:
+        picked = _pick(items, max_items, max_chars)
+        if picked:
+            parts.append(f"## {heading}\n" + "\n".join(f"- {item}" for item in picked))
+    return "\n\n".join(parts)
+
+
+def compact_context(outputs: list, budget: int, include_sources: bool = True) -> str:
+    """
+    Digest of the given TaskOutputs that fits in about `budget` tokens.
+
+    Structured outputs (pydantic/JSON) are kept verbatim; markdown outputs
+    are reduced to their sections' key items, with one merged Sources list.
+    """
+    blocks = []
+    verbatim = []
+    sources = SourceList()
+    for output in outputs:
+        label = str(output.name or "context").replace("_task", "").replace("_", " ").title()
+        if output.pydantic is not None or output.json_dict:
+            verbatim.append(f"## {label}\n{str(output.raw).strip()}")
+            continue
+        sections = parse_sections(str(output.raw))
+        # Map this report's citation numbers to the merged list
+        numbers = {}
+        for _, _, source_lines in sections:
+            for line in source_lines:
+                match = SOURCE_LINE_RE.match(line)
+                number = sources.add(line)
+                if match:
+                    numbers.setdefault(match.group(1), number)
+        seen = set()
+        for heading, items, _ in sections:
+            if not include_sources:
+                items = [BARE_CITATION_RE.sub("", item).strip() for item in items]
+            elif numbers:
+                items = [CITATION_RE.sub(lambda m: f"[{numbers.get(m.group(1), m.group(1))}]", item) for item in items]
+            # Models sometimes repeat themselves; keep each item once
+            items = [item for item in items if not (item in seen or seen.add(item))]
+            if items:
+                blocks.append((heading or label, items))
+    fixed = "\n\n".join(verbatim)
+    tail = f"## Sources\n{sources.render()}" if include_sources and sources.entries else ""
+    reserved = estimate_tokens(fixed) + estimate_tokens(tail)
+
+    body = ""
+    for max_items, max_chars in SHRINK_STEPS:
+        body = _render(blocks, max_items, max_chars)
+        if estimate_tokens(body) + reserved <= budget:
+            break
+    else:
+        body = body[:max(0, budget - reserved) * 4].rstrip()
+    return "\n\n".join(part for part in (body, fixed, tail) if part)
+
+
+def digest_reports(reports: dict, budget: int, include_sources: bool = True) -> str:
+    """compact_context for stored reports given as {task name: raw output}"""
+    outputs = [TaskOutput(name=name, description=name, raw=raw, agent="") for name, raw in reports.items()]
+    return compact_context(outputs, budget, include_sources)
+
+
+class CompactedTask(Task):
+    """
+    A Task whose context is a budgeted digest of its context tasks' outputs
+    rather than their full text (see compact_context).
+    """
+
+    context_budget: Optional[int] = Field(
+        default=None, description="Token budget for the compacted context (None keeps the full context)"
+    )
+    context_sources: bool = Field(
+        default=True, description="Include the merged Sources list and inline citations in the context"
+    )
+    _compaction: Optional[dict] = PrivateAttr(default=None)
+
+    @property
+    def compaction(self) -> Optional[dict]:
+        """Token counts of the last compaction: original, compacted and budget"""
+        return self._compaction
+
+    def execute_sync(self, agent=None, context: Optional[str] = None, tools=None):
+        if COMPACTION_ENABLED and self.context_budget and isinstance(self.context, list):
+            outputs = [task.output for task in self.context if task.output is not None]
+            try:
+                compacted = compact_context(outputs, self.context_budget, self.context_sources) if outputs else None
+            except Exception:
+                # The full context still works, it is just longer
+                logger.exception("Context compaction failed for %s; using the full context", self.name)
+                compacted = None
+            if compacted:
+                self._compaction = {
+                    "original_tokens": estimate_tokens(context or ""),
+                    "compacted_tokens": estimate_tokens(compacted),
+                    "budget": self.context_budget,
+                }
+                context = compacted
+        return super().execute_sync(agent, context, tools)
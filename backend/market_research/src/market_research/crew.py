@@ -1,11 +1,78 @@
 from crewai import Agent, Crew, Process, Task
-from crewai.project import CrewBase, agent, crew, task
+from crewai.project import CrewBase, agent, before_kickoff, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from typing import List
-from crewai_tools import ScrapeWebsiteTool, SerperDevTool
+import os
+import yaml
 
-search_tool = SerperDevTool()
-scrape_tool = ScrapeWebsiteTool()
+from market_research.compaction import CompactedTask
+from market_research.forecasting import validate_forecast_parameters
+from market_research.models import ForecastParameters
+from market_research.tools.cached_tools import CachedScrapeWebsiteTool, CachedSerperDevTool, CompetitorLookupTool
+
+# Research phase tasks, in crew order; their outputs together form the research report
+RESEARCH_TASKS = ("market_sizing_task", "competitor_task", "trends_task")
+
+# Search and scrape results are cached across runs (see tools/tool_cache.py).
+# SERPER_BASE_URL can point searches at a local stub server for offline runs.
+search_tool = CachedSerperDevTool(base_url=os.getenv("SERPER_BASE_URL", "https://google.serper.dev"))
+scrape_tool = CachedScrapeWebsiteTool()
+# Competitors researched in earlier runs (see tools/competitor_profiles.py);
+# the competitor researcher checks it before searching. None when
+# COMPETITOR_PROFILES=off.
+lookup_tool = CompetitorLookupTool() if os.getenv("COMPETITOR_PROFILES", "on").lower() != "off" else None
+
+# Console logging of every agent step is slow and unstructured; it is opt-in
+# (CREW_VERBOSE=true). Use tracing.RunTrace for timings instead.
+VERBOSE = os.getenv("CREW_VERBOSE", "false").lower() in ("1", "true", "yes")
+
+# How many times the forecast analyst may redo invalid forecast parameters before the run fails
+FORECAST_MAX_RETRIES = int(os.getenv("FORECAST_MAX_RETRIES", "2"))
+
+# Research modes. "deep" is the full profile in config/agents.yaml and
+# config/tasks.yaml; "quick" is a preview in seconds: config/quick/*.yaml
+# override those entries with one search per researcher, no scraping and a
+# short synthesis, and QUICK_MODEL (if set) gives its agents a cheaper model.
+MODES = ("quick", "deep")
+QUICK_MODEL = os.getenv("QUICK_MODEL") or None
+
+# Latency and cost each mode is held to: p50 seconds per run, searches and scrapes, and
+# LLM tokens (prompt + completion). Documented in the README and checked by
+# `python benchmarks/bench_research.py modes`.
+MODE_TARGETS = {
+    "quick": {"p50_seconds": 20, "max_tool_calls": 3, "max_tokens": 40000},
+    "deep": {"p50_seconds": 120, "max_tool_calls": 12, "max_tokens": 150000},
+}
+
+
+class ResearchTask(Task):
+    """
+    A Task whose async execution passes errors on. CrewAI's thread for an
+    async task only ever sets a result, so a task that raised (a failed LLM
+    call, a cancelled run) would leave kickoff waiting for it forever.
+    """
+
+    def _execute_task_async(self, agent, context, tools, future) -> None:
+        try:
+            result = self._execute_core(agent, context, tools)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), "config")
+
+
+def load_mode_overrides(mode: str) -> dict:
+    """Agent and task config overrides for a mode: {"agents": {...}, "tasks": {...}}"""
+    overrides = {"agents": {}, "tasks": {}}
+    if mode == "deep":
+        return overrides
+    for kind in overrides:
+        with open(os.path.join(CONFIG_DIR, mode, f"{kind}.yaml"), encoding="utf-8") as f:
+            overrides[kind] = yaml.safe_load(f) or {}
+    return overrides
 
 
 @CrewBase
@@ -21,52 +88,122 @@ class MarketResearch():
     
     # If you would like to add tools to your agents, you can learn more about it here:
     # https://docs.crewai.com/concepts/agents#agent-tools
+    def __init__(self, mode: str = "deep"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown research mode {mode!r} (expected one of {', '.join(MODES)})")
+        self.mode = mode
+        self.overrides = load_mode_overrides(mode)
+
+    def agent_config(self, name: str) -> dict:
+        """An agent's config with this mode's overrides applied"""
+        config = {**self.agents_config[name], **self.overrides["agents"].get(name, {})}
+        if self.mode == "quick" and QUICK_MODEL:
+            config["llm"] = QUICK_MODEL
+        return config
+
+    def task_config(self, name: str) -> dict:
+        """A task's config with this mode's overrides applied"""
+        return {**self.tasks_config[name], **self.overrides["tasks"].get(name, {})}
+
+    @before_kickoff
+    def default_inputs(self, inputs):
+        """Research on a similar earlier idea, if the caller found any (see tasks.yaml)"""
+        inputs = dict(inputs or {})
+        inputs.setdefault("prior_research", "")
+        return inputs
+
+    @agent
+    def market_researcher(self) -> Agent:
+        return Agent(
+            config=self.agent_config('market_researcher'), 
+            tools=[search_tool],
+            verbose=VERBOSE,
+        )
+
+    @agent
+    def competitor_researcher(self) -> Agent:
+        return Agent(
+            config=self.agent_config('competitor_researcher'), 
+            # Keep both but agent will limit scrape usage; quick runs do not scrape.
+            # The profile lookup comes first, so known competitors skip the web.
+            tools=[
+                *([lookup_tool] if lookup_tool is not None else []),
+                *([search_tool] if self.mode == "quick" else [search_tool, scrape_tool]),
+            ],
+            verbose=VERBOSE,
+            # No max_iter, to allow thorough research; per-run limits come from RunBudget (budget.py)
+        )
+
     @agent
-    def researcher(self) -> Agent:
+    def trends_researcher(self) -> Agent:
         return Agent(
-            config=self.agents_config['researcher'], 
-            tools=[search_tool, scrape_tool],  # Keep both but agent will limit scrape usage
-            verbose=True,
-            # Removed max_iter to allow more thorough research
+            config=self.agent_config('trends_researcher'), 
+            tools=[search_tool],
+            verbose=VERBOSE,
         )
     
     @agent
     def forecast_analyst(self) -> Agent:
         return Agent(
-            config=self.agents_config['forecast_analyst'], 
-            verbose=True,
-            # Removed max_iter to allow detailed analysis
+            config=self.agent_config('forecast_analyst'), 
+            verbose=VERBOSE,
+            # No max_iter; per-run limits come from RunBudget (budget.py)
         )
 
     @agent
     def report_synthesizer(self) -> Agent:
         return Agent(
-            config=self.agents_config['report_synthesizer'], 
-            verbose=True,
-            # Removed max_iter to allow comprehensive synthesis
+            config=self.agent_config('report_synthesizer'), 
+            verbose=VERBOSE,
+            # No max_iter; per-run limits come from RunBudget (budget.py)
         )
 
     # To learn more about structured task outputs,
     # task dependencies, and task callbacks, check out the documentation:
     # https://docs.crewai.com/concepts/tasks#overview-of-a-task
+    # The three research tasks are independent and run concurrently
+    # (async_execution in tasks.yaml); the forecast waits for all of them.
+    @task
+    def market_sizing_task(self) -> Task:
+        return ResearchTask(
+            config=self.task_config('market_sizing_task'),
+        )
+
     @task
-    def research_task(self) -> Task:
-        return Task(
-            config=self.tasks_config['research_task'], # type: ignore[index]
+    def competitor_task(self) -> Task:
+        return ResearchTask(
+            config=self.task_config('competitor_task'),
         )
 
+    @task
+    def trends_task(self) -> Task:
+        return ResearchTask(
+            config=self.task_config('trends_task'),
+        )
+
+    def research_tasks(self) -> List[Task]:
+        return [self.market_sizing_task(), self.competitor_task(), self.trends_task()]
+
+    # The forecast and synthesis tasks get a digest of their context tasks
+    # within the context_budget set in tasks.yaml (see compaction.py)
     @task
     def forecast_task(self) -> Task:
-        return Task(
-            config=self.tasks_config['forecast_task'], # type: ignore[index]
-            context=[self.research_task()],  # Needs research results
+        return CompactedTask(
+            config=self.task_config('forecast_task'),
+            context=self.research_tasks(),  # Needs research results
+            # The analyst only estimates ForecastParameters; the guardrail sends
+            # invalid ones back with the reason and computes the forecast
+            # itself (see forecasting.py)
+            output_pydantic=ForecastParameters,
+            guardrail=validate_forecast_parameters,
+            guardrail_max_retries=FORECAST_MAX_RETRIES,
         )
 
     @task
     def synthesis_task(self) -> Task:
-        return Task(
-            config=self.tasks_config['synthesis_task'], # type: ignore[index]
-            context=[self.research_task(), self.forecast_task()],  # Needs both
+        return CompactedTask(
+            config=self.task_config('synthesis_task'),
+            context=[*self.research_tasks(), self.forecast_task()],  # Needs both
         )
 
     @crew
@@ -79,6 +216,6 @@ class MarketResearch():
             agents=self.agents, # Automatically created by the @agent decorator
             tasks=self.tasks, # Automatically created by the @task decorator
             process=Process.sequential,
-            verbose=True,
+            verbose=VERBOSE,
             # process=Process.hierarchical, # In case you wanna use that instead https://docs.crewai.com/how-to/Hierarchical/
         )
@@ -0,0 +1,149 @@
+"""
+Deterministic forecast engine.
+
+The forecast analyst only estimates ForecastParameters (models.py) from the
+research; the yearly numbers are computed here, so they are reproducible
+and can be recomputed instantly for other assumptions (POST /forecast). For
+year t = 0..FORECAST_YEARS-1:
+
+    market(t)   = sam * (1 + cagr) ** t
+    adoption(t) = peak_share / (1 + exp(-adoption_steepness * (t - adoption_midpoint)))
+    value(t)    = market(t) * adoption(t) * (1 + price_change) ** t
+
+capped at the TAM grown at the same rate. cagr, peak_share and price_change
+are estimates with a low, base and high value, which give the conservative,
+base and optimistic series. For the Monte Carlo bands each estimate is also
+drawn FORECAST_SAMPLES times from a triangular distribution over
+(low, base, high). All scenarios and samples are computed together as one
+array (rows = scenarios + samples, columns = years); the draws use a fixed
+seed (FORECAST_SEED), so the same parameters always give the same bands.
+"""
+import math
+import os
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+from market_research.models import (
+    FORECAST_YEARS,
+    Estimate,
+    Forecast,
+    ForecastBand,
+    ForecastParameters,
+    ForecastSeries,
+)
+
+FORECAST_SAMPLES = int(os.getenv("FORECAST_SAMPLES", "2000"))
+FORECAST_SEED = int(os.getenv("FORECAST_SEED", "0"))
+
+SCENARIOS = ("conservative", "base", "optimistic")
+# Estimates that vary between scenarios and samples, in array column order
+ESTIMATES = ("cagr", "peak_share", "price_change")
+
+
+def parameter_errors(params: ForecastParameters) -> Optional[str]:
+    """Why the parameters cannot be used, or None"""
+    if not params.title.strip() or not params.unit.strip():
+        return "title and unit must not be empty"
+    # Estimates given out of order are used sorted (see project)
+    cagr, peak_share, price_change = (_sorted(getattr(params, name)) for name in ESTIMATES)
+    numbers = [params.tam, params.sam, params.adoption_midpoint, params.adoption_steepness]
+    for estimate in (cagr, peak_share, price_change):
+        numbers += [estimate.low, estimate.base, estimate.high]
+    if not all(math.isfinite(number) for number in numbers):
+        return "all parameters must be finite numbers"
+    if params.tam <= 0 or params.sam <= 0:
+        return "tam and sam must be positive"
+    if params.sam > params.tam:
+        return f"sam ({params.sam:g}) must not exceed tam ({params.tam:g})"
+    if cagr.low <= -1 or price_change.low <= -1:
+        return "cagr and price_change must be greater than -1 (they are fractions: 0.12 = 12%)"
+    if peak_share.low < 0 or peak_share.high > 1:
+        return "peak_share must be between 0 and 1 (a fraction of the SAM)"
+    if params.adoption_steepness <= 0:
+        return "adoption_steepness must be positive"
+    return None
+
+
+def _sorted(estimate: Estimate) -> Estimate:
+    low, base, high = sorted((estimate.low, estimate.base, estimate.high))
+    return Estimate(low=low, base=base, high=high)
+
+
+def _triangular(u: np.ndarray, low: float, base: float, high: float) -> np.ndarray:
+    """Inverse CDF of the triangular distribution at u (also fine when low == high)"""
+    width = high - low
+    if width <= 0:
+        return np.full_like(u, base)
+    mode = (base - low) / width
+    return np.where(
+        u < mode,
+        low + np.sqrt(u * width * (base - low)),
+        high - np.sqrt((1 - u) * width * (high - base)),
+    )
+
+
+def project(params: ForecastParameters, samples: int = FORECAST_SAMPLES, seed: int = FORECAST_SEED) -> Forecast:
+    """Compute the scenario series and Monte Carlo bands for `params` (assumed valid, see parameter_errors)"""
+    estimates = {name: _sorted(getattr(params, name)) for name in ESTIMATES}
+    draws = np.random.default_rng(seed).random((max(0, samples), len(ESTIMATES)))
+
+    # One column per estimate: the three scenarios, then the samples
+    columns = []
+    for i, name in enumerate(ESTIMATES):
+        estimate = estimates[name]
+        columns.append(np.concatenate((
+            [estimate.low, estimate.base, estimate.high],
+            _triangular(draws[:, i], estimate.low, estimate.base, estimate.high),
+        )))
+    cagr, peak_share, price_change = (column[:, None] for column in columns)
+
+    t = np.arange(FORECAST_YEARS)
+    growth = (1 + cagr) ** t
+    adoption = peak_share / (1 + np.exp(-params.adoption_steepness * (t - params.adoption_midpoint)))
+    values = np.minimum(params.sam * growth * adoption * (1 + price_change) ** t, params.tam * growth)
+
+    years = [params.start_year + i for i in range(FORECAST_YEARS)]
+
+    def series(row) -> list:
+        return [ForecastSeries(year=year, value=round(float(value), 2)) for year, value in zip(years, row)]
+
+    bands = None
+    if samples > 0:
+        p10, p50, p90 = np.percentile(values[len(SCENARIOS):], [10, 50, 90], axis=0)
+        bands = [
+            ForecastBand(year=year, p10=round(float(low), 2), p50=round(float(mid), 2), p90=round(float(high), 2))
+            for year, low, mid, high in zip(years, p10, p50, p90)
+        ]
+    return Forecast(
+        title=params.title,
+        unit=params.unit,
+        series=series(values[1]),
+        scenarios=list(SCENARIOS),
+        conservative=series(values[0]),
+        optimistic=series(values[2]),
+        bands=bands,
+        parameters=params.model_copy(update=estimates),
+    )
+
+
+def validate_forecast_parameters(output) -> Tuple[bool, Any]:
+    """
+    Guardrail for forecast_task. Returns (True, output) when the task produced
+    usable ForecastParameters, otherwise (False, reason) so the forecast
+    analyst retries with the reason.
+
+    The output's raw text becomes the computed forecast, which is what the
+    synthesis reads; the parameters stay on output.pydantic.
+    """
+    params = output.pydantic
+    if not isinstance(params, ForecastParameters):
+        return False, (
+            "Output must be a single JSON object matching the ForecastParameters schema "
+            "(title, unit, start_year, tam, sam, cagr, peak_share, adoption_midpoint, adoption_steepness, price_change)"
+        )
+    error = parameter_errors(params)
+    if error is not None:
+        return False, error
+    output.raw = project(params).model_dump_json(exclude={"parameters"})
+    return True, output
@@ -1,10 +1,13 @@
 #!/usr/bin/env python
 import sys
+import uuid
 import warnings
 
 from datetime import datetime
 
+from market_research.checkpoints import checkpoint_output, get_checkpoint_store, replay_plan, restore_outputs
 from market_research.crew import MarketResearch
+from market_research.scheduler import get_call_scheduler
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
@@ -13,20 +16,88 @@ warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 # Replace with inputs you want to test with, it will automatically
 # interpolate any tasks and agents information
 
-def run():
-    """
-    Run the crew.
-    """
-    inputs = {
+def default_inputs() -> dict:
+    return {
         "startup_idea": "MediMind — an AI-powered clinical assistant that automates documentation and suggests evidence-based treatments inside EHR systems.",
         "topic": "HealthTech / Medical AI / Clinical Workflow Automation",
         "start_year": "2025",
         "unit": "USD"
     }
-    
+
+
+def kickoff_checkpointed(crew, inputs: dict, mode: str = "deep", parent: str = None, done: dict = None):
+    """Kick off the crew, checkpointing each task's output under a new run id (see checkpoints.py)"""
+    store = get_checkpoint_store()
+    run_id = uuid.uuid4().hex
+    # LLM calls and searches keep to LLM_RPM / LLM_TPM / SERPER_RPM (see scheduler.py)
+    scheduler = get_call_scheduler()
+    if scheduler is not None:
+        scheduler.attach(crew, scheduler.ticket(run_id))
+    if store is not None:
+        store.start_run(run_id, inputs, mode, parent=parent, outputs=done)
+        crew.task_callback = lambda output: store.save_task(run_id, output.name, **checkpoint_output(output))
+        print(f"Run id: {run_id}")
+    try:
+        result = crew.kickoff(inputs=inputs)
+    except Exception as e:
+        if store is not None:
+            store.finish_run(run_id, error=str(e))
+            print(f"Resume it with: replay {run_id}")
+        raise
+    if store is not None:
+        store.finish_run(run_id)
+    return result
+
+
+def run():
+    """
+    Run the crew.
+    """
     try:
-        MarketResearch().crew().kickoff(inputs=inputs)
+        kickoff_checkpointed(MarketResearch().crew(), default_inputs())
     except Exception as e:
         raise Exception(f"An error occurred while running the crew: {e}")
 
 
+def train():
+    """
+    Train the crew for a given number of iterations.
+    """
+    try:
+        MarketResearch().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=default_inputs())
+    except Exception as e:
+        raise Exception(f"An error occurred while training the crew: {e}")
+
+
+def replay():
+    """
+    Replay a checkpointed run from a task: replay <run_id> [task_name]
+
+    The task and the tasks that depend on it run again; the others reuse
+    their checkpointed output. Without a task name the run resumes its
+    unfinished tasks (or redoes the synthesis if none are left).
+    """
+    if len(sys.argv) < 2:
+        raise Exception("Usage: replay <run_id> [task_name]")
+    store = get_checkpoint_store()
+    run = store.get_run(sys.argv[1]) if store is not None else None
+    if run is None:
+        raise Exception(f"Research run {sys.argv[1]} not found or expired (checkpoints are kept CHECKPOINT_TTL seconds)")
+    try:
+        crew = MarketResearch(run["mode"]).crew()
+        rerun, done = replay_plan(crew, run, sys.argv[2] if len(sys.argv) > 2 else None)
+        print(f"Rerunning {', '.join(rerun)}")
+        restore_outputs(crew, done)
+        kickoff_checkpointed(crew, run["inputs"], run["mode"], parent=run["run_id"], done=done)
+    except Exception as e:
+        raise Exception(f"An error occurred while replaying the crew: {e}")
+
+
+def test():
+    """
+    Test the crew execution and return the results: test <n_iterations> <eval_llm>
+    """
+    try:
+        MarketResearch().crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=default_inputs())
+    except Exception as e:
+        raise Exception(f"An error occurred while testing the crew: {e}")
@@ -0,0 +1,57 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+FORECAST_YEARS = 5
+
+
+class ForecastSeries(BaseModel):
+    year: int = Field(..., description="Year for the forecast data point")
+    value: float = Field(..., description="Forecast value for the year")
+
+
+class ForecastBand(BaseModel):
+    year: int = Field(..., description="Year of the band")
+    p10: float = Field(..., description="10th percentile of the simulated values")
+    p50: float = Field(..., description="Median of the simulated values")
+    p90: float = Field(..., description="90th percentile of the simulated values")
+
+
+class Estimate(BaseModel):
+    low: float = Field(..., description="Pessimistic value")
+    base: float = Field(..., description="Most likely value")
+    high: float = Field(..., description="Optimistic value")
+
+
+class ForecastParameters(BaseModel):
+    """
+    What the forecast analyst estimates from the research; forecasting.py
+    turns it into the yearly series. Shares and rates are fractions
+    (0.12 = 12%); market sizes are in `unit` for the start year.
+    """
+
+    title: str = Field(..., description="Title of the forecast")
+    unit: str = Field(..., description="Unit of measurement (e.g., 'USD')")
+    start_year: int = Field(..., description="First forecast year")
+    tam: float = Field(..., description="Total addressable market in the start year")
+    sam: float = Field(..., description="Serviceable addressable market in the start year (at most the TAM)")
+    cagr: Estimate = Field(..., description="Yearly growth of the market")
+    peak_share: Estimate = Field(..., description="Share of the SAM the startup can capture once adoption matures")
+    adoption_midpoint: float = Field(3.0, description="Years from the start year until half the peak share is reached")
+    adoption_steepness: float = Field(1.0, description="How fast adoption ramps up around the midpoint (S-curve slope)")
+    price_change: Estimate = Field(
+        default_factory=lambda: Estimate(low=0.0, base=0.0, high=0.0),
+        description="Yearly change in the startup's prices relative to the market",
+    )
+
+
+class Forecast(BaseModel):
+    title: str = Field(..., description="Title of the forecast")
+    unit: str = Field(..., description="Unit of measurement (e.g., 'USD Billions', 'Million Users')")
+    series: List[ForecastSeries] = Field(..., description="List of forecast data points")
+    scenarios: Optional[List[str]] = Field(None, description="Optional list of forecast scenarios")
+    # Computed from `parameters` by forecasting.py; `series` is the base scenario
+    conservative: Optional[List[ForecastSeries]] = Field(None, description="Series with every estimate at its low value")
+    optimistic: Optional[List[ForecastSeries]] = Field(None, description="Series with every estimate at its high value")
+    bands: Optional[List[ForecastBand]] = Field(None, description="Monte Carlo percentile bands per year")
+    parameters: Optional[ForecastParameters] = Field(None, description="Assumptions the series were computed from")
@@ -0,0 +1,379 @@
+"""
+A process-wide scheduler for the crew's LLM and Serper calls.
+
+Concurrent runs share the provider's rate limits, but every agent calls it
+on its own, so under load they hit 429s and each backs off on its own
+schedule. Instead every call takes a slot from the provider's token buckets
+(requests/min and tokens/min) before it goes out:
+
+- calls wait in one queue per provider, interactive runs ahead of batch
+  runs, and within a class the run served least so far goes first, so a
+  long run cannot crowd out a new one
+- a 429 pauses the provider for every run (for its Retry-After, or an
+  exponential backoff) and the call is retried, rather than each agent
+  retrying into the same limit
+- timeouts, connection errors and 5xx responses are retried with a
+  backoff for that call alone
+- the time each call queued is recorded per run and per provider
+
+Each run gets a Ticket (its id and priority class), which attach() hands to
+the run's LLMs and search tools.
+
+    scheduler = get_call_scheduler()
+    ticket = scheduler.attach(crew, scheduler.ticket(run_id, priority="batch"))
+    crew.kickoff(inputs=inputs)
+    ticket.usage()
+"""
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, highest first
+PRIORITIES = ("interactive", "batch")
+
+# Completion tokens assumed for an LLM call until its real usage is known
+COMPLETION_TOKENS_ESTIMATE = 500
+
+
+class RateLimited(Exception):
+    """A call still rate limited (429) after the scheduler's retries"""
+
+
+class TokenBucket:
+    """
+    Refills at `per_minute` units a minute, up to `capacity`. Taking more than was there
+    (when a call's real token usage exceeds its estimate) leaves a debt that
+    later callers wait out.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        # By default a second's worth (at least one unit) can go out at once
+        self.capacity = capacity if capacity is not None else max(1.0, self.rate)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` (capped at the capacity) is available"""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate) if self.rate > 0 else 0.0
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+    def empty(self, now: float) -> None:
+        """Drop what is available (the provider said we are over its limit)"""
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+
+class Ticket:
+    """One run's place in the scheduler: its id, priority class and what it has been served"""
+
+    def __init__(self, run_id: str, priority: str = "interactive"):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r} (expected one of {', '.join(PRIORITIES)})")
+        self.run_id = run_id
+        self.priority = priority
+        self.calls = {}
+        self.waited = {}
+        self.rate_limited = 0
+
+    def usage(self) -> dict:
+        """Calls and queue wait per provider for this run"""
+        return {
+            "priority": self.priority,
+            "queue_wait_seconds": round(sum(self.waited.values()), 3),
+            "rate_limited": self.rate_limited,
+            "providers": {
+                provider: {"calls": calls, "wait_seconds": round(self.waited.get(provider, 0.0), 3)}
+                for provider, calls in self.calls.items()
+            },
+        }
+
+
+class Provider:
+    """Buckets, wait queue and counters for one provider"""
+
+    def __init__(self, name: str, rpm: float = 0, tpm: float = 0):
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm, capacity=tpm / 60.0 * 10) if tpm > 0 else None
+        self.paused_until = 0.0
+        self.backoff_streak = 0
+        self.waiters = []
+        self.calls = 0
+        self.rate_limited = 0
+        self.errors_retried = 0
+        self.wait_seconds = {priority: 0.0 for priority in PRIORITIES}
+        self.max_wait = 0.0
+
+    def wait_time(self, tokens: float, now: float) -> float:
+        waits = [self.paused_until - now]
+        if self.requests is not None:
+            waits.append(self.requests.wait_time(1, now))
+        if self.tokens is not None and tokens:
+            waits.append(self.tokens.wait_time(tokens, now))
+        return max(0.0, *waits)
+
+    @property
+    def limited(self) -> bool:
+        return self.requests is not None or self.tokens is not None
+
+    def take(self, tokens: float, now: float) -> None:
+        if self.requests is not None:
+            self.requests.take(1, now)
+        if self.tokens is not None and tokens:
+            self.tokens.take(tokens, now)
+
+
+class CallScheduler:
+    """
+    Token-bucket limits per provider with a priority queue in front.
+    `limits` is {provider: {"rpm": requests/min, "tpm": tokens/min}}; a
+    limit of 0 (or a provider not listed) is not enforced, but its calls are
+    still counted and 429s from it still pause every run.
+    """
+
+    def __init__(self, limits: Optional[dict] = None, max_retries: int = 3, backoff: float = 1.0):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._providers = {
+            name: Provider(name, limit.get("rpm", 0), limit.get("tpm", 0)) for name, limit in (limits or {}).items()
+        }
+        self._sequence = 0
+        self._cond = threading.Condition()
+
+    def _provider(self, name: str) -> Provider:
+        if name not in self._providers:
+            self._providers[name] = Provider(name)
+        return self._providers[name]
+
+    # Queueing
+
+    def acquire(self, provider: str, ticket: Ticket, tokens: float = 0) -> float:
+        """Wait for a slot for one call (of about `tokens` tokens); returns the seconds waited"""
+        started = time.monotonic()
+        with self._cond:
+            state = self._provider(provider)
+            self._sequence += 1
+            waiter = (PRIORITIES.index(ticket.priority), ticket.calls.get(provider, 0), self._sequence)
+            state.waiters.append(waiter)
+            try:
+                while True:
+                    now = time.monotonic()
+                    # Only the first waiter in line may go; the rest wait for it
+                    wait = state.wait_time(tokens, now) if min(state.waiters) == waiter else None
+                    if wait == 0.0:
+                        break
+                    self._cond.wait(timeout=wait)
+                state.take(tokens, now)
+            finally:
+                state.waiters.remove(waiter)
+                self._cond.notify_all()
+            waited = time.monotonic() - started
+            state.calls += 1
+            state.wait_seconds[ticket.priority] += waited
+            state.max_wait = max(state.max_wait, waited)
+            ticket.calls[provider] = ticket.calls.get(provider, 0) + 1
+            ticket.waited[provider] = ticket.waited.get(provider, 0.0) + waited
+        return waited
+
+    def settle(self, provider: str, estimated: float, actual: float) -> None:
+        """Correct the tokens taken for a call once its real usage is known"""
+        with self._cond:
+            state = self._provider(provider)
+            if state.tokens is not None and actual != estimated:
+                state.tokens.take(actual - estimated, time.monotonic())
+                self._cond.notify_all()
+
+    def rate_limited(self, provider: str, retry_after: Optional[float] = None) -> float:
+        """Pause the provider for every run after a 429; returns the pause in seconds"""
+        with self._cond:
+            state = self._provider(provider)
+            now = time.monotonic()
+            state.rate_limited += 1
+            state.backoff_streak += 1
+            pause = retry_after if retry_after is not None else min(60.0, self.backoff * 2 ** (state.backoff_streak - 1))
+            state.paused_until = max(state.paused_until, now + pause)
+            for bucket in (state.requests, state.tokens):
+                if bucket is not None:
+                    bucket.empty(now)
+            self._cond.notify_all()
+        return pause
+
+    def call(self, provider: str, ticket: Ticket, fn: Callable, tokens: float = 0,
+             used_tokens: Optional[Callable[[], Optional[float]]] = None, retry_errors: bool = True):
+        """
+        Run `fn()` once the provider has a slot for it, retrying (after a
+        provider-wide pause) when it is rate limited, and after a backoff
+        when it fails transiently (unless `retry_errors` is False, for
+        clients that retry those themselves). `used_tokens()`, if given,
+        returns the tokens the call really used.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(provider, ticket, tokens)
+            try:
+                result = fn()
+            except Exception as e:
+                if retry_errors and is_transient_error(e) and attempt < self.max_retries:
+                    delay = min(60.0, self.backoff * 2 ** attempt)
+                    with self._cond:
+                        self._provider(provider).errors_retried += 1
+                    logger.info("%s call for run %s failed (%s); retrying in %.1fs", provider, ticket.run_id, e, delay)
+                    time.sleep(delay)
+                    continue
+                if not is_rate_limit_error(e):
+                    raise
+                ticket.rate_limited += 1
+                pause = self.rate_limited(provider, retry_after_seconds(e))
+                if attempt == self.max_retries:
+                    raise RateLimited(f"{provider} is still rate limited after {self.max_retries} retries: {e}") from e
+                logger.info("%s rate limited run %s; pausing calls for %.1fs", provider, ticket.run_id, pause)
+                continue
+            with self._cond:
+                self._provider(provider).backoff_streak = 0
+            if used_tokens is not None:
+                actual = used_tokens()
+                if actual is not None:
+                    self.settle(provider, tokens, actual)
+            return result
+
+    # Crew wiring
+
+    def ticket(self, run_id: str, priority: str = "interactive") -> Ticket:
+        return Ticket(run_id, priority)
+
+    def attach(self, crew, ticket: Ticket) -> Ticket:
+        """Route the crew's LLM calls and searches through the scheduler under `ticket`; returns it"""
+        for agent in crew.agents:
+            llm = agent.llm
+            if llm is not None and not isinstance(llm, str):
+                # Each run's agents have their own (shallow) copy of the LLM,
+                # so its call can be wrapped for this run alone
+                llm.call = self._scheduled_llm_call(llm, ticket)
+                if self._provider("llm").limited:
+                    # With limits set, 429s are retried here for all runs at
+                    # once, not by the client (transient errors too, see call())
+                    llm.additional_params = {**(getattr(llm, "additional_params", None) or {}), "max_retries": 0}
+            agent.tools = self._ticketed(agent.tools, ticket)
+        for task in crew.tasks:
+            task.tools = self._ticketed(task.tools, ticket)
+        return ticket
+
+    def _scheduled_llm_call(self, llm, ticket: Ticket) -> Callable:
+        call = type(llm).call.__get__(llm)
+
+        def scheduled_call(messages, *args, from_agent=None, **kwargs):
+            estimate = len(str(messages)) // 4 + COMPLETION_TOKENS_ESTIMATE
+            process = getattr(from_agent, "_token_process", None)
+            before = process.get_summary().total_tokens if process is not None else None
+
+            def used_tokens():
+                if before is None:
+                    return None
+                return process.get_summary().total_tokens - before
+
+            return self.call(
+                "llm", ticket, lambda: call(messages, *args, from_agent=from_agent, **kwargs),
+                tokens=estimate, used_tokens=used_tokens,
+                # Without limits the LLM client keeps its own retries (see attach)
+                retry_errors=self._provider("llm").limited,
+            )
+
+        return scheduled_call
+
+    @staticmethod
+    def _ticketed(tools, ticket: Ticket) -> list:
+        return [
+            tool.model_copy(update={"ticket": ticket}) if "ticket" in type(tool).model_fields else tool
+            for tool in tools or []
+        ]
+
+    def metrics(self) -> dict:
+        with self._cond:
+            return {
+                name: {
+                    "calls": state.calls,
+                    "queued": len(state.waiters),
+                    "rate_limited": state.rate_limited,
+                    "errors_retried": state.errors_retried,
+                    "wait_seconds": {priority: round(seconds, 3) for priority, seconds in state.wait_seconds.items()},
+                    "max_wait_seconds": round(state.max_wait, 3),
+                    "rpm": round(state.requests.rate * 60) if state.requests is not None else None,
+                    "tpm": round(state.tokens.rate * 60) if state.tokens is not None else None,
+                }
+                for name, state in self._providers.items()
+            }
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for a 429 from litellm (LLM calls) or requests (Serper)"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == 429
+
+
+def is_transient_error(error: Exception) -> bool:
+    """True for a timeout, connection error or 5xx, from litellm (LLM calls) or requests (Serper)"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status == 408 or 500 <= status < 600
+    # Socket errors, and requests' ConnectionError and Timeout (both OSErrors)
+    return isinstance(error, (TimeoutError, OSError))
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """The Retry-After (in seconds) a 429 came with, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+_call_scheduler: Optional[CallScheduler] = None
+_call_scheduler_lock = threading.Lock()
+
+
+def get_call_scheduler() -> Optional[CallScheduler]:
+    """
+    Process-wide scheduler from LLM_RPM, LLM_TPM and SERPER_RPM, or None
+    when SCHEDULER=off. The limits are split equally between the processes
+    making calls: each web worker (WEB_CONCURRENCY) and, with
+    RESEARCH_EXECUTOR=process, each of their worker processes.
+    """
+    global _call_scheduler
+    if os.getenv("SCHEDULER", "on").lower() == "off":
+        return None
+    with _call_scheduler_lock:
+        if _call_scheduler is None:
+            shares = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+            if os.getenv("RESEARCH_EXECUTOR", "thread").lower() == "process":
+                shares *= max(1, int(os.getenv("RESEARCH_MAX_WORKERS", "2")))
+            _call_scheduler = CallScheduler(
+                {
+                    "llm": {
+                        "rpm": float(os.getenv("LLM_RPM", "0")) / shares,
+                        "tpm": float(os.getenv("LLM_TPM", "0")) / shares,
+                    },
+                    "serper": {"rpm": float(os.getenv("SERPER_RPM", "0")) / shares},
+                },
+                max_retries=int(os.getenv("SCHEDULER_MAX_RETRIES", "3")),
+                backoff=float(os.getenv("SCHEDULER_BACKOFF", "1.0")),
+            )
+        return _call_scheduler
@@ -0,0 +1,281 @@
+import os
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Optional, Tuple, Type
+
+import requests
+from requests.adapters import HTTPAdapter
+from crewai.tools import BaseTool
+from crewai_tools import ScrapeWebsiteTool, SerperDevTool
+from pydantic import BaseModel, Field
+
+from market_research.scheduler import get_call_scheduler
+from market_research.tools.competitor_profiles import get_competitor_profiles, split_names
+from market_research.tools.page_digest import page_digest
+from market_research.tools.tool_cache import (
+    ToolCache,
+    get_tool_cache,
+    normalize_query,
+    normalize_url,
+    scrape_stats,
+    shared_fetches,
+    tool_cache_ttl,
+)
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def http_session() -> requests.Session:
+    """
+    Process-wide HTTP session for the search and scrape tools, so runs reuse
+    pooled keep-alive connections (HTTP_POOL_SIZE per host) instead of
+    opening a new connection for every call.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            pool_size = int(os.getenv("HTTP_POOL_SIZE", "16"))
+            session = requests.Session()
+            # Shared across sites and runs, so never keep cookies between calls
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+class CachedSerperDevTool(SerperDevTool):
+    """
+    SerperDevTool that serves repeated searches from the persistent tool cache.
+
+    Queries are keyed on their normalized text plus the search settings, so
+    near-identical queries from different runs only hit Serper once per TTL
+    (SEARCH_CACHE_TTL, default one day).
+    """
+
+    cache: Optional[ToolCache] = Field(default_factory=get_tool_cache, exclude=True)
+    cache_ttl: int = Field(default_factory=lambda: tool_cache_ttl("search", 86400))
+    # The run's RunBudget, on the per-run copies made by RunBudget.attach
+    budget: Optional[Any] = Field(default=None, exclude=True)
+    # The run's scheduler Ticket, on the per-run copies made by CallScheduler.attach
+    ticket: Optional[Any] = Field(default=None, exclude=True)
+
+    def _run(self, **kwargs: Any) -> Any:
+        if self.budget is not None and not self.budget.take_tool_call():
+            return self.budget.exhausted_message()
+        search_query = kwargs.get("search_query") or kwargs.get("query") or ""
+        search_type = kwargs.get("search_type", self.search_type)
+        key = "|".join([
+            normalize_query(search_query), search_type, str(self.n_results),
+            self.country or "", self.location or "", self.locale or "",
+        ])
+        # Identical searches running at the same time (e.g. across a batch)
+        # share one request
+        return shared_fetches.run("search", key, lambda: self._fetch(key, **kwargs))
+
+    def _fetch(self, key: str, **kwargs: Any) -> Any:
+        if self.cache is None:
+            return super()._run(**kwargs)
+
+        entry = self.cache.get("search", key)
+        if entry is not None and entry["fresh"]:
+            self.cache.record("search", "hits")
+            return entry["value"]
+
+        self.cache.record("search", "misses")
+        result = super()._run(**kwargs)
+        self.cache.set("search", key, result, self.cache_ttl)
+        return result
+
+    def _make_api_request(self, search_query: str, search_type: str) -> dict:
+        # Same request as SerperDevTool, over the shared pooled session
+        payload = {"q": search_query, "num": self.n_results}
+        if self.country != "":
+            payload["gl"] = self.country
+        if self.location != "":
+            payload["location"] = self.location
+        if self.locale != "":
+            payload["hl"] = self.locale
+        headers = {"X-API-KEY": os.environ["SERPER_API_KEY"], "content-type": "application/json"}
+
+        def post():
+            response = http_session().post(self._get_search_url(search_type), headers=headers, json=payload, timeout=10)
+            response.raise_for_status()
+            return response
+
+        # Searches share Serper's rate limit with every other run (see scheduler.py)
+        scheduler = get_call_scheduler()
+        if scheduler is not None and self.ticket is not None:
+            response = scheduler.call("serper", self.ticket, post)
+        else:
+            response = post()
+        results = response.json()
+        if not results:
+            raise ValueError("Empty response from Serper API")
+        return results
+
+
+class CachedScrapeWebsiteTool(ScrapeWebsiteTool):
+    """
+    ScrapeWebsiteTool that returns a compact digest of the page (title, meta
+    description, pricing tables and main text; see page_digest.py) instead
+    of its full text, and serves repeated page fetches from the persistent
+    tool cache (SCRAPE_CACHE_TTL, default one week).
+
+    Pages are streamed over the shared pooled session and cut off after
+    SCRAPE_MAX_BYTES or SCRAPE_TIMEOUT seconds, so a huge or slow page cannot
+    stall the researcher; digests are at most SCRAPE_MAX_CHARS characters.
+
+    Once an entry is stale it is revalidated with If-None-Match /
+    If-Modified-Since when the site sent validators, so unchanged pages cost
+    a 304 instead of a full download and re-parse.
+    """
+
+    cache: Optional[ToolCache] = Field(default_factory=get_tool_cache, exclude=True)
+    cache_ttl: int = Field(default_factory=lambda: tool_cache_ttl("scrape", 604800))
+    budget: Optional[Any] = Field(default=None, exclude=True)
+    max_bytes: int = Field(default_factory=lambda: int(os.getenv("SCRAPE_MAX_BYTES", "1000000")))
+    timeout: float = Field(default_factory=lambda: float(os.getenv("SCRAPE_TIMEOUT", "15")))
+    max_chars: int = Field(default_factory=lambda: int(os.getenv("SCRAPE_MAX_CHARS", "4000")))
+
+    def _run(self, **kwargs: Any) -> Any:
+        if self.budget is not None and not self.budget.take_tool_call():
+            return self.budget.exhausted_message()
+        website_url = kwargs.get("website_url", self.website_url)
+        key = normalize_url(website_url)
+        text = shared_fetches.run("scrape", key, lambda: self._fetch(key, **kwargs))
+        scrape_stats.record_result(text)
+        return text
+
+    def _fetch(self, key: str, **kwargs: Any) -> Any:
+        website_url = kwargs.get("website_url", self.website_url)
+        if self.cache is None:
+            return self._page_text(*self._get(website_url, dict(self.headers or {})))
+
+        entry = self.cache.get("scrape", key)
+        if entry is not None and entry["fresh"]:
+            self.cache.record("scrape", "hits")
+            return entry["value"]
+
+        headers = dict(self.headers or {})
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        page, body = self._get(website_url, headers)
+
+        if page.status_code == 304 and entry is not None:
+            self.cache.record("scrape", "revalidated")
+            self.cache.refresh("scrape", key, self.cache_ttl)
+            return entry["value"]
+
+        self.cache.record("scrape", "misses")
+        text = self._page_text(page, body)
+        if page.ok:
+            # Only successful pages are cached; errors are retried next time
+            self.cache.set(
+                "scrape", key, text, self.cache_ttl,
+                etag=page.headers.get("ETag"),
+                last_modified=page.headers.get("Last-Modified"),
+            )
+        return text
+
+    def _get(self, website_url: str, headers: dict) -> Tuple[requests.Response, bytes]:
+        """Fetch up to max_bytes of the page within timeout seconds; returns the response and the body read"""
+        deadline = time.monotonic() + self.timeout
+        page = http_session().get(
+            website_url,
+            timeout=self.timeout,
+            headers=headers,
+            cookies=self.cookies if self.cookies else {},
+            stream=True,
+        )
+        chunks = []
+        size = 0
+        truncated = False
+        try:
+            content_type = page.headers.get("Content-Type", "text/html").lower()
+            # Skip downloads (PDFs, images, archives) entirely
+            if "html" in content_type or "xml" in content_type or content_type.startswith("text/"):
+                for chunk in page.iter_content(chunk_size=16384):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= self.max_bytes or time.monotonic() > deadline:
+                        truncated = True
+                        break
+        finally:
+            # A fully read response goes back to the pool; a cut-off one is dropped
+            page.close()
+        scrape_stats.record_fetch(size, truncated)
+        return page, b"".join(chunks)[:self.max_bytes]
+
+    def _page_text(self, page: requests.Response, body: bytes) -> str:
+        if not body:
+            content_type = page.headers.get("Content-Type", "unknown")
+            return f"No readable page content at this URL (HTTP {page.status_code}, {content_type})."
+        charset = page.encoding if "charset" in page.headers.get("Content-Type", "").lower() else None
+        return page_digest(body, max_chars=self.max_chars, encoding=charset)
+
+
+class CompetitorLookupInput(BaseModel):
+    """Input schema for CompetitorLookupTool."""
+    market: str = Field("", description="The startup idea or market, to list competitors already profiled for it.")
+    names: str = Field("", description="Comma-separated competitor names or website URLs to look up.")
+
+
+def _age(seconds: float) -> str:
+    days = int(seconds // 86400)
+    if days >= 1:
+        return f"{days} day{'s' if days != 1 else ''} ago"
+    hours = int(seconds // 3600)
+    return f"{hours} hour{'s' if hours != 1 else ''} ago" if hours >= 1 else "today"
+
+
+class CompetitorLookupTool(BaseTool):
+    """
+    Looks competitors up in the cross-run competitor profile index (see
+    competitor_profiles.py) before the researcher spends searches and
+    scrapes on them. A local SQLite lookup, so it does not count against
+    the run's tool call budget.
+    """
+
+    name: str = "Look up competitor profiles"
+    description: str = (
+        "Check the profiles of competitors researched in earlier runs BEFORE searching or scraping. "
+        "Pass the startup idea as `market` to list known competitors in that market, and/or "
+        "comma-separated competitor names or URLs as `names`. Fresh profiles can be used as they are; "
+        "stale and unknown competitors need web research."
+    )
+    args_schema: Type[BaseModel] = CompetitorLookupInput
+    limit: int = Field(default_factory=lambda: int(os.getenv("COMPETITOR_LOOKUP_LIMIT", "8")))
+
+    def _run(self, market: str = "", names: str = "", **kwargs: Any) -> str:
+        profiles = get_competitor_profiles()
+        if profiles is None:
+            return "The competitor profile index is off; research competitors with web search."
+        found, missing = profiles.lookup(split_names(names), market=market, limit=self.limit)
+        fresh = sum(1 for profile in found if not profile["stale"])
+        lines = [f"Found {fresh} fresh profile(s), {len(found) - fresh} stale, {len(missing)} unknown."]
+        for profile in found:
+            age = _age(profile["age_seconds"])
+            state = (
+                f"STALE: researched {age}; verify with a search before relying on it"
+                if profile["stale"] else f"researched {age}"
+            )
+            lines += ["", f"### {profile['name']} — {profile['domain'] or 'no website'} ({state})"]
+            if profile["url"]:
+                lines.append(f"URL: {profile['url']}")
+            if profile["positioning"]:
+                lines.append(profile["positioning"])
+            lines += [f"- {label}: {text}" for label, text in profile["details"].items()]
+        if missing:
+            lines += ["", "No profile yet (research these with web search): " + ", ".join(missing)]
+        if not found and not missing:
+            lines += ["", "No competitors profiled for this market yet; research them with web search."]
+        return "\n".join(lines)
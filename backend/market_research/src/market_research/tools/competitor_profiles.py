@@ -0,0 +1,329 @@
+"""
+Cross-run competitor profile index.
+
+Crowded markets bring up the same competitors run after run (every personal
+finance idea meets YNAB and Rocket Money), and the competitor researcher
+used to search and scrape each of them again. Each finished run's
+competitor entries (name, URL, positioning, strengths, differentiation,
+weaknesses) are stored here by the API, and the researcher's
+CompetitorLookupTool checks this index before any web search or scrape.
+
+Profiles are keyed by canonical name, and reachable through aliases: name
+variants ("Rocket Money Inc", "rocketmoney"), the site's domain and, for
+"name.tld" sites, the domain label. Names that match no alias are resolved
+fuzzily against aliases with the same first two characters. Profiles also
+remember the words of the ideas they were researched for, so the
+researcher can ask "which competitors do we know in this market?" before
+it knows any names.
+
+Each profile carries `researched_at`, the last time a run wrote new content
+for it. A run that only copies a profile from the lookup leaves it
+unchanged, so profiles go stale after COMPETITOR_PROFILE_TTL seconds
+(default 30 days) unless a run researches them again.
+"""
+import difflib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Company suffixes left out of name aliases
+NAME_SUFFIXES = {"inc", "llc", "ltd", "limited", "corp", "corporation", "co", "gmbh", "plc", "app", "hq"}
+# Minimum difflib ratio for a fuzzy alias match
+ALIAS_MATCH_THRESHOLD = 0.85
+
+# Words of an idea that say nothing about its market
+MARKET_STOPWORDS = {
+    "a", "an", "and", "app", "for", "from", "helps", "help", "in", "into", "is", "it", "of", "on", "or",
+    "platform", "powered", "that", "the", "their", "them", "to", "tool", "who", "with", "without", "your",
+}
+WORD_RE = re.compile(r"[a-z0-9]+")
+SPLIT_NAMES_RE = re.compile(r"[,;\n]+")
+
+
+def name_key(name: str) -> str:
+    """Canonical profile key for a company name: "Rocket Money, Inc." -> "rocket money" """
+    text = unicodedata.normalize("NFKC", name).lower()
+    words = WORD_RE.findall(text)
+    while len(words) > 1 and words[-1] in NAME_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def domain_of(url: Optional[str]) -> Optional[str]:
+    """Host of a URL or bare domain without "www.": "https://www.ynab.com/x" -> "ynab.com" """
+    if not url:
+        return None
+    url = url.strip()
+    host = (urlsplit(url if "://" in url else f"https://{url}").hostname or "").lower()
+    host = host[4:] if host.startswith("www.") else host
+    return host if "." in host else None
+
+
+def name_aliases(name: str, domain: Optional[str] = None) -> List[str]:
+    """Alias keys a profile can be found by"""
+    key = name_key(name)
+    aliases = [key, key.replace(" ", "")]
+    if domain:
+        aliases.append(domain)
+        labels = domain.split(".")
+        if len(labels) == 2:
+            aliases.append(labels[0])
+    return list(dict.fromkeys(alias for alias in aliases if len(alias) > 1))
+
+
+def market_terms(text: str) -> List[str]:
+    """Words describing an idea's market, singular: "Budgeting app for freelancers" -> ["budgeting", "freelancer"]"""
+    terms = []
+    for word in WORD_RE.findall(unicodedata.normalize("NFKC", text).lower()):
+        if len(word) < 3 or word in MARKET_STOPWORDS or word.isdigit():
+            continue
+        if word.endswith("s") and not word.endswith("ss") and len(word) > 4:
+            word = word[:-1]
+        terms.append(word)
+    return list(dict.fromkeys(terms))
+
+
+class CompetitorProfiles:
+    """
+    SQLite index of competitor profiles shared across runs.
+
+    `competitor_profiles` holds one row per canonical name,
+    `competitor_aliases` maps alias keys (name variants and domains) to
+    profiles, and `competitor_terms` maps market words to the profiles
+    researched for ideas containing them. Lookups are primary key probes,
+    plus a short alias range scan for fuzzy name matches.
+    """
+
+    def __init__(self, path: str, ttl: int = 2592000):
+        self.path = path
+        self.ttl = ttl
+        self.stats = {"lookups": 0, "fresh": 0, "stale": 0, "misses": 0, "writes": 0, "refreshed": 0}
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS competitor_profiles ("
+                " id INTEGER PRIMARY KEY,"
+                " key TEXT UNIQUE NOT NULL,"
+                " name TEXT NOT NULL,"
+                " domain TEXT,"
+                " url TEXT,"
+                " positioning TEXT NOT NULL,"
+                " details TEXT NOT NULL,"
+                " runs INTEGER NOT NULL,"
+                " researched_at REAL NOT NULL,"
+                " seen_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS competitor_aliases ("
+                " alias TEXT PRIMARY KEY,"
+                " profile_id INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS competitor_terms ("
+                " term TEXT NOT NULL,"
+                " profile_id INTEGER NOT NULL,"
+                " PRIMARY KEY (term, profile_id)) WITHOUT ROWID"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _resolve(self, conn, name: str, domain: Optional[str] = None) -> Optional[int]:
+        """Profile id for a name (or URL/domain): exact key, then aliases, then a fuzzy alias match"""
+        row = conn.execute("SELECT id FROM competitor_profiles WHERE key = ?", (name_key(name),)).fetchone()
+        if row is not None:
+            return row[0]
+        for alias in name_aliases(name, domain):
+            row = conn.execute("SELECT profile_id FROM competitor_aliases WHERE alias = ?", (alias,)).fetchone()
+            if row is not None:
+                return row[0]
+        compact = name_key(name).replace(" ", "")
+        if len(compact) < 4:
+            return None
+        # Only aliases sharing the first two characters are compared: a range
+        # scan of the alias primary key rather than every alias
+        prefix = compact[:2]
+        candidates = conn.execute(
+            "SELECT alias, profile_id FROM competitor_aliases WHERE alias >= ? AND alias < ?",
+            (prefix, prefix + "\uffff"),
+        ).fetchall()
+        best, best_ratio = None, ALIAS_MATCH_THRESHOLD
+        for alias, profile_id in candidates:
+            ratio = difflib.SequenceMatcher(None, compact, alias.replace(" ", "")).ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = profile_id, ratio
+        return best
+
+    def add(self, profiles: Iterable[dict], idea: str = "") -> int:
+        """
+        Store a run's competitor entries (dicts with name, url, positioning
+        and details, as parse_competitor_profiles returns them). An entry
+        matching a known profile by name, alias or domain updates it; its
+        researched_at only moves when its content changed. Returns how
+        many profiles got new content.
+        """
+        now = time.time()
+        terms = market_terms(idea)
+        changed = 0
+        with self._lock, self._connect() as conn:
+            for profile in profiles:
+                name = profile["name"].strip()
+                if not name_key(name):
+                    continue
+                url = profile.get("url") or None
+                domain = domain_of(url)
+                positioning = (profile.get("positioning") or "").strip()
+                details = {label: text for label, text in (profile.get("details") or {}).items() if text}
+                profile_id = self._resolve(conn, name, domain)
+                if profile_id is None:
+                    cursor = conn.execute(
+                        "INSERT INTO competitor_profiles"
+                        " (key, name, domain, url, positioning, details, runs, researched_at, seen_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)",
+                        (name_key(name), name, domain, url, positioning, json.dumps(details), now, now),
+                    )
+                    profile_id = cursor.lastrowid
+                    changed += 1
+                else:
+                    row = conn.execute(
+                        "SELECT url, domain, positioning, details FROM competitor_profiles WHERE id = ?",
+                        (profile_id,),
+                    ).fetchone()
+                    # Missing fields never blank out what is known
+                    merged = {**json.loads(row[3]), **details}
+                    new = (url or row[0], domain or row[1], positioning or row[2], json.dumps(merged))
+                    if new != tuple(row):
+                        conn.execute(
+                            "UPDATE competitor_profiles SET url = ?, domain = ?, positioning = ?, details = ?,"
+                            " runs = runs + 1, researched_at = ?, seen_at = ? WHERE id = ?",
+                            (*new, now, now, profile_id),
+                        )
+                        changed += 1
+                    else:
+                        conn.execute(
+                            "UPDATE competitor_profiles SET runs = runs + 1, seen_at = ? WHERE id = ?",
+                            (now, profile_id),
+                        )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO competitor_aliases (alias, profile_id) VALUES (?, ?)",
+                    [(alias, profile_id) for alias in name_aliases(name, domain)],
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO competitor_terms (term, profile_id) VALUES (?, ?)",
+                    [(term, profile_id) for term in terms],
+                )
+            self.stats["writes"] += 1
+            self.stats["refreshed"] += changed
+        return changed
+
+    def _profiles(self, conn, ids: List[int]) -> List[dict]:
+        now = time.time()
+        found = []
+        for profile_id in ids:
+            row = conn.execute(
+                "SELECT name, domain, url, positioning, details, runs, researched_at FROM competitor_profiles"
+                " WHERE id = ?",
+                (profile_id,),
+            ).fetchone()
+            if row is None:
+                continue
+            age = now - row[6]
+            found.append({
+                "name": row[0],
+                "domain": row[1],
+                "url": row[2],
+                "positioning": row[3],
+                "details": json.loads(row[4]),
+                "runs": row[5],
+                "researched_at": row[6],
+                "age_seconds": age,
+                "stale": age > self.ttl,
+            })
+        return found
+
+    def lookup(self, names: Iterable[str] = (), market: str = "", limit: int = 8) -> Tuple[List[dict], List[str]]:
+        """
+        Profiles for the given names (or URLs/domains), then up to `limit`
+        profiles researched for ideas sharing at least two market words with
+        `market`. Returns (profiles, names without a profile).
+        """
+        ids = []
+        missing = []
+        with self._connect() as conn:
+            for name in names:
+                name = name.strip()
+                if not name:
+                    continue
+                domain = domain_of(name) if "." in name else None
+                profile_id = self._resolve(conn, name, domain)
+                if profile_id is None:
+                    missing.append(name)
+                elif profile_id not in ids:
+                    ids.append(profile_id)
+            terms = market_terms(market)
+            if terms:
+                placeholders = ",".join("?" * len(terms))
+                rows = conn.execute(
+                    f"SELECT t.profile_id, COUNT(*) AS hits FROM competitor_terms t"
+                    f" JOIN competitor_profiles p ON p.id = t.profile_id"
+                    f" WHERE t.term IN ({placeholders}) GROUP BY t.profile_id HAVING hits >= ?"
+                    f" ORDER BY hits DESC, p.runs DESC LIMIT ?",
+                    (*terms, min(2, len(terms)), limit),
+                ).fetchall()
+                ids += [row[0] for row in rows if row[0] not in ids]
+            found = self._profiles(conn, ids)
+        with self._lock:
+            self.stats["lookups"] += 1
+            self.stats["fresh"] += sum(1 for profile in found if not profile["stale"])
+            self.stats["stale"] += sum(1 for profile in found if profile["stale"])
+            self.stats["misses"] += len(missing)
+        return found, missing
+
+    def size(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM competitor_profiles").fetchone()[0]
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        return {**stats, "size": self.size(), "ttl_seconds": self.ttl}
+
+
+def split_names(text: str) -> List[str]:
+    """Competitor names (or URLs) from a comma, semicolon or newline separated list"""
+    return [name.strip() for name in SPLIT_NAMES_RE.split(text or "") if name.strip()]
+
+
+_competitor_profiles: Optional[CompetitorProfiles] = None
+_competitor_profiles_lock = threading.Lock()
+
+
+def get_competitor_profiles() -> Optional[CompetitorProfiles]:
+    """
+    Process-wide competitor profile index from COMPETITOR_PROFILES_PATH, or
+    None when COMPETITOR_PROFILES=off.
+    """
+    global _competitor_profiles
+    if os.getenv("COMPETITOR_PROFILES", "on").lower() == "off":
+        return None
+    with _competitor_profiles_lock:
+        if _competitor_profiles is None:
+            _competitor_profiles = CompetitorProfiles(
+                os.getenv("COMPETITOR_PROFILES_PATH", "scout_competitor_profiles.db"),
+                ttl=int(os.getenv("COMPETITOR_PROFILE_TTL", "2592000")),
+            )
+        return _competitor_profiles
@@ -0,0 +1,165 @@
+"""
+Compact digests of scraped web pages.
+
+A competitor page is mostly navigation, scripts, styles, cookie banners and
+footers; its full text inflates the researcher's prompt for every later
+step. page_digest() keeps what the research uses:
+
+- the title and meta description
+- pricing: tables (and pricing blocks) mentioning prices, plans or billing
+  periods, one row per line
+- the main content: text blocks inside <main>/<article> (else <body>), with
+  navigation, headers, footers, asides, forms and scripts removed and
+  repeated lines dropped
+
+and cuts the result to `max_chars` on a line boundary.
+"""
+import re
+from typing import List, Optional, Union
+
+from bs4 import BeautifulSoup
+
+# Removed before anything is extracted
+DROP_TAGS = (
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "form", "button", "select",
+    "nav", "header", "footer", "aside",
+)
+DROP_ROLES = ("navigation", "banner", "contentinfo", "complementary", "dialog", "search", "alert")
+# Words in class/id names of overlays and chrome that are not semantic tags
+DROP_HINTS = {"cookie", "cookies", "consent", "gdpr", "newsletter", "modal", "popup", "breadcrumb", "breadcrumbs",
+              "share", "social"}
+NAME_PART_RE = re.compile(r"[-_\s]+")
+
+# Elements whose own text is one line of the digest
+BLOCK_TAGS = (
+    "h1", "h2", "h3", "h4", "h5", "h6", "p", "li", "dt", "dd", "blockquote", "pre", "figcaption",
+    "td", "th", "div", "section", "article", "main", "body",
+)
+HEADING_TAGS = ("h1", "h2", "h3")
+
+PRICE_RE = re.compile(
+    r"[$€£¥₹]\s?\d|\d\s?(?:usd|eur|gbp)\b|/\s?(?:mo|month|yr|year|user|seat)\b|"
+    r"\bper (?:month|year|user|seat)\b|\bpricing\b|\bfree trial\b",
+    re.IGNORECASE,
+)
+PRICING_HINT_RE = re.compile(r"pric|plan|tier", re.IGNORECASE)
+# Longer "pricing" blocks are page wrappers rather than pricing cards
+PRICING_BLOCK_MAX_CHARS = 1500
+SPACE_RE = re.compile(r"\s+")
+
+TRUNCATED = "[... truncated]"
+
+
+def _clean(text: str) -> str:
+    return SPACE_RE.sub(" ", text).strip()
+
+
+def _names(element) -> str:
+    """The element's class and id names"""
+    classes = element.get("class") or []
+    if isinstance(classes, str):
+        classes = [classes]
+    return " ".join([*classes, element.get("id") or ""])
+
+
+def _hinted(element) -> bool:
+    return any(part in DROP_HINTS for part in NAME_PART_RE.split(_names(element).lower()))
+
+
+def _meta(soup, *names: str) -> Optional[str]:
+    for name in names:
+        tag = soup.find("meta", attrs={"name": name}) or soup.find("meta", attrs={"property": name})
+        if tag is not None and tag.get("content"):
+            return _clean(tag["content"])
+    return None
+
+
+def _pricing(soup) -> List[str]:
+    """Rows of pricing tables and pricing blocks, removed from the soup so they are not repeated"""
+    lines = []
+    for table in soup.find_all("table"):
+        if not PRICE_RE.search(table.get_text(" ")):
+            continue
+        for row in table.find_all("tr"):
+            cells = [_clean(cell.get_text(" ")) for cell in row.find_all(("th", "td"))]
+            if any(cells):
+                lines.append(" | ".join(cells))
+        table.decompose()
+    # Pricing cards are usually divs with a pricing/plan class rather than tables
+    for block in soup.find_all(lambda tag: tag.name in ("div", "section", "ul") and PRICING_HINT_RE.search(_names(tag))):
+        if block.decomposed:
+            continue
+        text = _clean(block.get_text(" "))
+        if len(text) <= PRICING_BLOCK_MAX_CHARS and PRICE_RE.search(text):
+            lines.append(text)
+            block.decompose()
+    return lines
+
+
+def _main_lines(root) -> List[str]:
+    """Text of the innermost block elements under root, in document order, without repeats"""
+    lines = []
+    seen = set()
+    for block in root.find_all(BLOCK_TAGS):
+        if block.find(BLOCK_TAGS) is not None:
+            continue
+        text = _clean(block.get_text(" "))
+        if len(text) < 3 or text in seen:
+            continue
+        seen.add(text)
+        lines.append(f"## {text}" if block.name in HEADING_TAGS else text)
+    if not lines:
+        # Text straight inside the root, with no block elements around it
+        text = _clean(root.get_text(" "))
+        lines = [text] if text else []
+    return lines
+
+
+def _cut(lines: List[str], max_chars: int) -> str:
+    text = ""
+    for line in lines:
+        if len(text) + len(line) + 1 > max_chars:
+            # Always keep part of the first line that does not fit
+            room = max_chars - len(text) - len(TRUNCATED) - 1
+            if room > 40:
+                text += line[:room].rsplit(" ", 1)[0] + "\n"
+            return text + TRUNCATED
+        text += line + "\n"
+    return text.rstrip("\n")
+
+
+def page_digest(html: Union[str, bytes], max_chars: int = 4000, encoding: Optional[str] = None) -> str:
+    """
+    Title, meta description, pricing and main text of an HTML page, at most
+    about `max_chars` characters. `html` may be bytes, decoded with
+    `encoding` (the response's charset) or detected from the page.
+    """
+    soup = BeautifulSoup(html, "html.parser", from_encoding=encoding if isinstance(html, bytes) else None)
+    title = _clean(soup.title.get_text(" ")) if soup.title is not None else None
+    description = _meta(soup, "description", "og:description", "twitter:description")
+
+    for element in soup.find_all(DROP_TAGS):
+        if element.decomposed:
+            continue
+        # An article's own header (its title) or footer is content, not page chrome
+        if element.name in ("header", "footer") and element.find_parent(("main", "article")) is not None:
+            continue
+        element.decompose()
+    for element in soup.find_all(lambda tag: tag.get("role") in DROP_ROLES or _hinted(tag)):
+        if not element.decomposed:
+            element.decompose()
+
+    pricing = _pricing(soup)
+    root = soup.find("main") or soup.find(attrs={"role": "main"}) or soup.find("article") or soup.body or soup
+    main = _main_lines(root)
+
+    lines = []
+    if title:
+        lines.append(f"Title: {title}")
+    if description:
+        lines.append(f"Description: {description}")
+    if pricing:
+        lines += ["Pricing:", *pricing]
+    if main:
+        lines += ["Content:", *main]
+    return _cut(lines, max_chars)
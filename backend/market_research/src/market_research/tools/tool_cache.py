@@ -0,0 +1,240 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query so near-identical queries share a cache entry"""
+    query = " ".join(str(query).lower().split())
+    return query.strip(" .,;:!?")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL for caching: lowercase scheme and host, drop the fragment,
+    tracking parameters and a trailing slash, and sort the query string.
+    """
+    parts = urlsplit(str(url).strip())
+    scheme = (parts.scheme or "https").lower()
+    netloc = parts.netloc.lower()
+    if netloc.startswith("www."):
+        netloc = netloc[4:]
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in ("gclid", "fbclid", "ref")
+    ))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+class ToolCache:
+    """
+    Persistent cache for tool results, stored in SQLite so it is shared across
+    runs, threads and worker processes.
+
+    Entries are namespaced by tool. Stale entries are kept (until purged) so
+    their HTTP validators (ETag / Last-Modified) can be used for conditional
+    requests. Hit/miss/revalidation counters are kept per tool for this process.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stats = {}
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tool_cache ("
+                " tool TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " fetched_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " PRIMARY KEY (tool, key))"
+            )
+        # Stale entries are only worth keeping for revalidation for so long
+        self.purge(older_than=30 * 86400)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, tool: str, key: str) -> Optional[dict]:
+        """
+        Return the entry for `key` (fresh or stale), or None.
+
+        The entry has `value`, `etag`, `last_modified`, `fetched_at` and a
+        `fresh` flag telling whether it is still within its TTL.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, etag, last_modified, fetched_at, expires_at"
+                " FROM tool_cache WHERE tool = ? AND key = ?",
+                (tool, key),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "value": json.loads(row[0]),
+            "etag": row[1],
+            "last_modified": row[2],
+            "fetched_at": row[3],
+            "fresh": row[4] >= time.time(),
+        }
+
+    def set(self, tool: str, key: str, value: Any, ttl: int,
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tool_cache"
+                " (tool, key, value, etag, last_modified, fetched_at, expires_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (tool, key, json.dumps(value), etag, last_modified, now, now + ttl),
+            )
+
+    def refresh(self, tool: str, key: str, ttl: int) -> None:
+        """Extend a revalidated entry's lifetime without changing its value"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tool_cache SET fetched_at = ?, expires_at = ? WHERE tool = ? AND key = ?",
+                (now, now + ttl, tool, key),
+            )
+
+    def purge(self, older_than: float) -> None:
+        """Drop entries that expired more than `older_than` seconds ago"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM tool_cache WHERE expires_at < ?", (time.time() - older_than,))
+
+    def record(self, tool: str, outcome: str) -> None:
+        """Count a cache outcome (hit, miss or revalidated) for a tool"""
+        with self._lock:
+            counters = self._stats.setdefault(tool, {"hits": 0, "misses": 0, "revalidated": 0})
+            counters[outcome] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {tool: dict(counters) for tool, counters in self._stats.items()}
+
+
+class SharedFetches:
+    """
+    Coalesces concurrent identical tool calls within this process: the first
+    caller for a (tool, key) runs the fetch and any caller arriving while it
+    is in flight waits for and reuses its result (or exception). Works with
+    or without the persistent cache, which covers calls that do not overlap.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._shared = {}
+
+    def run(self, tool: str, key: str, fetch: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get((tool, key))
+            leader = call is None
+            if leader:
+                call = self._calls[(tool, key)] = {"done": threading.Event(), "result": None, "error": None}
+            else:
+                self._shared[tool] = self._shared.get(tool, 0) + 1
+
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fetch()
+            return call["result"]
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[(tool, key)]
+            call["done"].set()
+
+    def metrics(self) -> dict:
+        """Calls per tool that were served by another caller's in-flight fetch"""
+        with self._lock:
+            return dict(self._shared)
+
+
+shared_fetches = SharedFetches()
+
+
+class ScrapeStats:
+    """
+    Bytes downloaded by page fetches and bytes of page digests handed to
+    agents (including cached ones) in this process, so the savings from
+    digesting pages instead of passing their full text can be measured.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.truncated = 0
+        self.bytes_fetched = 0
+        self.results = 0
+        self.bytes_to_model = 0
+
+    def record_fetch(self, size: int, truncated: bool) -> None:
+        with self._lock:
+            self.fetches += 1
+            self.truncated += truncated
+            self.bytes_fetched += size
+
+    def record_result(self, text: str) -> None:
+        with self._lock:
+            self.results += 1
+            self.bytes_to_model += len(text.encode("utf-8"))
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "fetches": self.fetches,
+                "truncated": self.truncated,
+                "bytes_fetched": self.bytes_fetched,
+                "results": self.results,
+                "bytes_to_model": self.bytes_to_model,
+            }
+
+
+scrape_stats = ScrapeStats()
+
+
+def tool_cache_ttl(tool: str, default: int) -> int:
+    """Per-tool TTL from e.g. SEARCH_CACHE_TTL / SCRAPE_CACHE_TTL"""
+    return int(os.getenv(f"{tool.upper()}_CACHE_TTL", str(default)))
+
+
+_tool_cache: Optional[ToolCache] = None
+_tool_cache_lock = threading.Lock()
+
+
+def get_tool_cache() -> Optional[ToolCache]:
+    """
+    Process-wide tool cache from TOOL_CACHE_PATH, or None when TOOL_CACHE=off.
+    """
+    global _tool_cache
+    if os.getenv("TOOL_CACHE", "on").lower() == "off":
+        return None
+    with _tool_cache_lock:
+        if _tool_cache is None:
+            _tool_cache = ToolCache(os.getenv("TOOL_CACHE_PATH", "scout_tool_cache.db"))
+        return _tool_cache
@@ -0,0 +1,423 @@
+"""
+Structured tracing for crew runs.
+
+CrewAI emits events for task, LLM call and tool usage start/finish on its
+event bus. The handlers here turn those into spans on the RunTrace the task
+belongs to (runs are told apart by task and agent ids, so concurrent runs in
+one process do not mix), and add them to process-wide counters that the API
+exposes in Prometheus text format.
+
+Spans follow the OpenTelemetry shape (trace/span/parent ids, start and end
+times, attributes). When TRACING_OTLP_ENDPOINT is set they are also exported
+over OTLP/HTTP through a dedicated tracer provider, so they never end up in
+CrewAI's own telemetry.
+"""
+import os
+import threading
+import time
+import uuid
+from typing import Optional
+
+MAX_ATTRIBUTE_LENGTH = 200
+
+
+class TraceMetrics:
+    """Process-wide counters fed by finished spans"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def add(self, name: str, labels: dict, amount: float = 1) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def record(self, span: dict) -> None:
+        attributes = span["attributes"]
+        status = "error" if span.get("error") else "ok"
+        task = attributes.get("task") or "unknown"
+        if span["kind"] == "task":
+            self.add("scout_task_runs_total", {"task": task, "status": status})
+            self.add("scout_task_seconds_total", {"task": task}, span["duration"])
+            if attributes.get("context_tokens"):
+                self.add("scout_context_tokens_total", {"task": task, "type": "sent"}, attributes["context_tokens"])
+                self.add("scout_context_tokens_total", {"task": task, "type": "original"},
+                         attributes.get("context_original_tokens", attributes["context_tokens"]))
+        elif span["kind"] == "llm":
+            self.add("scout_llm_calls_total", {"task": task, "status": status})
+            self.add("scout_llm_call_seconds_total", {"task": task}, span["duration"])
+            self.add("scout_llm_tokens_total", {"task": task, "type": "prompt"}, attributes.get("prompt_tokens", 0))
+            self.add("scout_llm_tokens_total", {"task": task, "type": "completion"}, attributes.get("completion_tokens", 0))
+        elif span["kind"] == "tool":
+            tool = attributes.get("tool") or "unknown"
+            self.add("scout_tool_calls_total", {"tool": tool, "status": status})
+            self.add("scout_tool_call_seconds_total", {"tool": tool}, span["duration"])
+            self.add("scout_tool_bytes_total", {"tool": tool}, attributes.get("bytes", 0))
+
+    def snapshot(self) -> dict:
+        """Counters as {name: [{labels..., value}]} for the JSON metrics endpoint"""
+        with self._lock:
+            items = list(self._counters.items())
+        result = {}
+        for (name, labels), value in sorted(items):
+            result.setdefault(name, []).append({**dict(labels), "value": round(value, 6)})
+        return result
+
+    def prometheus(self) -> str:
+        """Counters in Prometheus text exposition format"""
+        with self._lock:
+            items = sorted(self._counters.items())
+        lines = []
+        current = None
+        for (name, labels), value in items:
+            if name != current:
+                lines.append(f"# TYPE {name} counter")
+                current = name
+            label_text = ",".join(f'{key}="{_escape_label(val)}"' for key, val in labels)
+            lines.append(f"{name}{{{label_text}}} {value:g}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = TraceMetrics()
+
+
+class RunTrace:
+    """
+    Spans for one crew run.
+
+    Use as a context manager around kickoff, after the crew is built:
+
+        with RunTrace(run_id).attach(crew) as trace:
+            crew.kickoff(inputs=inputs)
+        trace.breakdown()
+    """
+
+    def __init__(self, run_id: Optional[str] = None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.trace_id = uuid.uuid4().hex
+        self.root_id = uuid.uuid4().hex[:16]
+        self.started_at = time.time()
+        self.ended_at: Optional[float] = None
+        self.spans = []
+        self._open = {}
+        self._lock = threading.Lock()
+        self._task_ids = []
+        self._agents = {}
+
+    def attach(self, crew) -> "RunTrace":
+        """Route the events of this crew's tasks and agents to this trace"""
+        _install_handlers()
+        with _registry_lock:
+            for task in crew.tasks:
+                self._task_ids.append(str(task.id))
+                _traces_by_task[str(task.id)] = self
+                if task.agent is not None:
+                    self._agents[str(task.agent.id)] = task.agent
+                    _traces_by_agent[str(task.agent.id)] = self
+        return self
+
+    def __enter__(self) -> "RunTrace":
+        self.started_at = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.finish()
+
+    def finish(self) -> None:
+        with _registry_lock:
+            for task_id in self._task_ids:
+                _traces_by_task.pop(task_id, None)
+            for agent_id in self._agents:
+                _traces_by_agent.pop(agent_id, None)
+        with self._lock:
+            # Anything still open was cut short by a failure
+            for key in list(self._open):
+                self._end_locked(key, error="unfinished")
+            self.ended_at = time.time()
+        _export_otlp(self)
+
+    # Span bookkeeping
+
+    def start_span(self, key: tuple, name: str, kind: str, parent: Optional[tuple] = None, **attributes) -> None:
+        with self._lock:
+            if key in self._open:
+                # A guardrail retry restarts the task; keep the original span
+                self._open[key]["attributes"]["attempts"] = self._open[key]["attributes"].get("attempts", 1) + 1
+                return
+            parent_span = self._open.get(parent) if parent else None
+            self._open[key] = {
+                "name": name,
+                "kind": kind,
+                "trace_id": self.trace_id,
+                "span_id": uuid.uuid4().hex[:16],
+                "parent_id": parent_span["span_id"] if parent_span else self.root_id,
+                "start": time.time(),
+                "end": None,
+                "duration": None,
+                "error": None,
+                "attributes": {k: v for k, v in attributes.items() if v is not None},
+            }
+
+    def end_span(self, key: tuple, error: Optional[str] = None, **attributes) -> None:
+        with self._lock:
+            self._end_locked(key, error, **attributes)
+
+    def _end_locked(self, key: tuple, error: Optional[str] = None, **attributes) -> None:
+        span = self._open.pop(key, None)
+        if span is None:
+            return
+        span["end"] = time.time()
+        span["duration"] = span["end"] - span["start"]
+        span["error"] = error
+        span["attributes"].update({k: v for k, v in attributes.items() if v is not None})
+        span["attributes"] = {k: v for k, v in span["attributes"].items() if not k.startswith("_")}
+        self.spans.append(span)
+        metrics.record(span)
+
+    def token_usage(self, agent_id: str) -> tuple:
+        """Cumulative (prompt, completion) tokens of an agent in this run"""
+        agent = self._agents.get(agent_id)
+        process = getattr(agent, "_token_process", None) if agent is not None else None
+        if process is None:
+            return 0, 0
+        summary = process.get_summary()
+        return summary.prompt_tokens, summary.completion_tokens
+
+    # Reporting
+
+    def breakdown(self, include_spans: bool = True) -> dict:
+        """Per-task totals (time, LLM calls/tokens, tool calls/bytes), plus the spans"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start"])
+        tasks = {}
+        for span in spans:
+            task = span["attributes"].get("task") or "unknown"
+            entry = tasks.setdefault(task, {
+                "seconds": 0.0, "llm_calls": 0, "llm_seconds": 0.0, "prompt_tokens": 0,
+                "completion_tokens": 0, "tool_calls": 0, "tool_seconds": 0.0, "tool_bytes": 0,
+                "context_tokens": 0, "context_original_tokens": 0,
+            })
+            if span["kind"] == "task":
+                entry["seconds"] += span["duration"]
+                entry["context_tokens"] += span["attributes"].get("context_tokens", 0)
+                entry["context_original_tokens"] += span["attributes"].get(
+                    "context_original_tokens", span["attributes"].get("context_tokens", 0)
+                )
+            elif span["kind"] == "llm":
+                entry["llm_calls"] += 1
+                entry["llm_seconds"] += span["duration"]
+                entry["prompt_tokens"] += span["attributes"].get("prompt_tokens", 0)
+                entry["completion_tokens"] += span["attributes"].get("completion_tokens", 0)
+            elif span["kind"] == "tool":
+                entry["tool_calls"] += 1
+                entry["tool_seconds"] += span["duration"]
+                entry["tool_bytes"] += span["attributes"].get("bytes", 0)
+        for entry in tasks.values():
+            for field in ("seconds", "llm_seconds", "tool_seconds"):
+                entry[field] = round(entry[field], 3)
+
+        totals = {
+            field: sum(entry[field] for entry in tasks.values())
+            for field in ("llm_calls", "prompt_tokens", "completion_tokens", "tool_calls", "tool_bytes",
+                          "context_tokens", "context_original_tokens")
+        }
+        ended = self.ended_at or time.time()
+        result = {
+            "run_id": self.run_id,
+            "trace_id": self.trace_id,
+            "seconds": round(ended - self.started_at, 3),
+            "tasks": tasks,
+            "totals": totals,
+        }
+        if include_spans:
+            result["spans"] = spans
+        return result
+
+
+# Event routing
+
+_registry_lock = threading.Lock()
+_traces_by_task = {}
+_traces_by_agent = {}
+_handlers_installed = False
+
+
+def _trace_for(task_id=None, agent_id=None) -> Optional[RunTrace]:
+    with _registry_lock:
+        if task_id is not None and str(task_id) in _traces_by_task:
+            return _traces_by_task[str(task_id)]
+        if agent_id is not None:
+            return _traces_by_agent.get(str(agent_id))
+    return None
+
+
+def _truncate(value) -> str:
+    text = value if isinstance(value, str) else repr(value)
+    return text[:MAX_ATTRIBUTE_LENGTH]
+
+
+def _on_task_started(source, event):
+    task = event.task
+    trace = _trace_for(task_id=getattr(task, "id", None))
+    if trace is not None:
+        # Estimated size of the context handed to the task, and what it was
+        # before compaction (CompactedTask); ~4 characters per token
+        compaction = getattr(task, "compaction", None) or {}
+        trace.start_span(
+            ("task", str(task.id)), f"task {task.name}", "task",
+            task=task.name, agent=_truncate(task.agent.role) if task.agent else None,
+            context_tokens=(len(event.context) + 3) // 4 if event.context else None,
+            context_original_tokens=compaction.get("original_tokens"),
+        )
+
+
+def _on_task_finished(source, event):
+    task = event.task
+    trace = _trace_for(task_id=getattr(task, "id", None))
+    if trace is not None:
+        error = getattr(event, "error", None)
+        trace.end_span(("task", str(task.id)), error=_truncate(error) if error else None)
+
+
+def _on_llm_started(source, event):
+    trace = _trace_for(event.task_id, event.agent_id)
+    if trace is not None:
+        prompt_before, completion_before = trace.token_usage(str(event.agent_id))
+        trace.start_span(
+            ("llm", str(event.agent_id)), "llm call", "llm", parent=("task", str(event.task_id)),
+            task=event.task_name, model=event.model,
+            _prompt_before=prompt_before, _completion_before=completion_before,
+        )
+
+
+def _on_llm_finished(source, event):
+    trace = _trace_for(event.task_id, event.agent_id)
+    if trace is None:
+        return
+    key = ("llm", str(event.agent_id))
+    with trace._lock:
+        span = trace._open.get(key)
+        before = (span["attributes"].pop("_prompt_before", 0), span["attributes"].pop("_completion_before", 0)) if span else (0, 0)
+    # The agent's token counter is updated before the completion event fires
+    prompt_after, completion_after = trace.token_usage(str(event.agent_id))
+    error = getattr(event, "error", None)
+    trace.end_span(
+        key, error=_truncate(error) if error else None,
+        prompt_tokens=max(0, prompt_after - before[0]),
+        completion_tokens=max(0, completion_after - before[1]),
+    )
+
+
+def _on_tool_started(source, event):
+    trace = _trace_for(event.task_id, event.agent_id)
+    if trace is not None:
+        trace.start_span(
+            ("tool", str(event.task_id), event.tool_name), f"tool {event.tool_name}", "tool",
+            parent=("task", str(event.task_id)),
+            task=event.task_name, tool=event.tool_name, query=_truncate(event.tool_args),
+        )
+
+
+def _on_tool_finished(source, event):
+    trace = _trace_for(event.task_id, event.agent_id)
+    if trace is not None:
+        output = getattr(event, "output", None)
+        error = getattr(event, "error", None)
+        trace.end_span(
+            ("tool", str(event.task_id), event.tool_name),
+            error=_truncate(error) if error else None,
+            bytes=len(str(output).encode("utf-8")) if output is not None else 0,
+            from_cache=getattr(event, "from_cache", None),
+        )
+
+
+def _install_handlers() -> None:
+    global _handlers_installed
+    with _registry_lock:
+        if _handlers_installed:
+            return
+        # Imported here so the counters above can be read (e.g. by /metrics)
+        # without loading crewai
+        from crewai.events import crewai_event_bus
+        from crewai.events.types.llm_events import (
+            LLMCallCompletedEvent,
+            LLMCallFailedEvent,
+            LLMCallStartedEvent,
+        )
+        from crewai.events.types.task_events import TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent
+        from crewai.events.types.tool_usage_events import (
+            ToolUsageErrorEvent,
+            ToolUsageFinishedEvent,
+            ToolUsageStartedEvent,
+        )
+
+        crewai_event_bus.register_handler(TaskStartedEvent, _on_task_started)
+        crewai_event_bus.register_handler(TaskCompletedEvent, _on_task_finished)
+        crewai_event_bus.register_handler(TaskFailedEvent, _on_task_finished)
+        crewai_event_bus.register_handler(LLMCallStartedEvent, _on_llm_started)
+        crewai_event_bus.register_handler(LLMCallCompletedEvent, _on_llm_finished)
+        crewai_event_bus.register_handler(LLMCallFailedEvent, _on_llm_finished)
+        crewai_event_bus.register_handler(ToolUsageStartedEvent, _on_tool_started)
+        crewai_event_bus.register_handler(ToolUsageFinishedEvent, _on_tool_finished)
+        crewai_event_bus.register_handler(ToolUsageErrorEvent, _on_tool_finished)
+        _handlers_installed = True
+
+
+# Optional OTLP export
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def _get_tracer():
+    """Tracer on a private provider exporting to TRACING_OTLP_ENDPOINT, or None"""
+    global _tracer
+    endpoint = os.getenv("TRACING_OTLP_ENDPOINT")
+    if not endpoint:
+        return None
+    with _tracer_lock:
+        if _tracer is None:
+            try:
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+                from opentelemetry.sdk.resources import Resource
+                from opentelemetry.sdk.trace import TracerProvider
+                from opentelemetry.sdk.trace.export import BatchSpanProcessor
+            except ImportError:
+                return None
+            provider = TracerProvider(resource=Resource.create({"service.name": "scout-ai-research"}))
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+            _tracer = provider.get_tracer("market_research.tracing")
+        return _tracer
+
+
+def _export_otlp(trace: RunTrace) -> None:
+    tracer = _get_tracer()
+    if tracer is None:
+        return
+    from opentelemetry import trace as otel_trace
+
+    def ns(seconds: float) -> int:
+        return int(seconds * 1e9)
+
+    root = tracer.start_span("research run", start_time=ns(trace.started_at), attributes={"run_id": trace.run_id})
+    exported = {trace.root_id: root}
+    # Parents start before their children, so exporting in start order keeps links intact
+    for span in sorted(trace.spans, key=lambda s: s["start"]):
+        parent = exported.get(span["parent_id"], root)
+        attributes = {k: v for k, v in span["attributes"].items() if isinstance(v, (str, bool, int, float))}
+        otel_span = tracer.start_span(
+            span["name"], context=otel_trace.set_span_in_context(parent),
+            start_time=ns(span["start"]), attributes={"kind": span["kind"], **attributes},
+        )
+        if span["error"]:
+            otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, span["error"]))
+        exported[span["span_id"]] = otel_span
+    # End children before parents
+    for span in sorted(trace.spans, key=lambda s: s["start"], reverse=True):
+        exported[span["span_id"]].end(end_time=ns(span["end"]))
+    root.end(end_time=ns(trace.ended_at or time.time()))
@@ -12,11 +12,22 @@ export const forecastSeriesSchema = z.object({
   value: z.coerce.number().nonnegative(),
 });
 
+export const forecastBandSchema = z.object({
+  year: z.coerce.number().int(),
+  p10: z.coerce.number(),
+  p50: z.coerce.number(),
+  p90: z.coerce.number(),
+});
+
 export const forecastSchema = z.object({
   title: z.string(),
   unit: z.string(),
   series: z.array(forecastSeriesSchema).min(1, "Forecast must include at least one data point"),
   scenarios: z.array(z.string()).optional(),
+  conservative: z.array(forecastSeriesSchema).nullish(),
+  optimistic: z.array(forecastSeriesSchema).nullish(),
+  bands: z.array(forecastBandSchema).nullish(),
+  parameters: z.record(z.string(), z.unknown()).nullish(),
 });
 
 export const researchResponseSchema = z.object({
@@ -26,8 +37,35 @@ export const researchResponseSchema = z.object({
   sources: z.array(z.string()),
 });
 
+export const archivedReportSummarySchema = z.object({
+  id: z.number().int(),
+  run_id: z.string().nullish(),
+  startup_idea: z.string(),
+  mode: z.enum(["quick", "deep"]),
+  competitors: z.array(z.string()),
+  degraded: z.string().nullish(),
+  created_at: z.string(),
+  snippet: z.string().nullish(),
+});
+
+export const reportPageSchema = z.object({
+  reports: z.array(archivedReportSummarySchema),
+  next_before: z.number().int().nullish(),
+});
+
+export const archivedReportSchema = z.object({
+  id: z.number().int(),
+  startup_idea: z.string(),
+  created_at: z.string(),
+  result: researchResponseSchema,
+});
+
 // Infer TypeScript types from schemas
 export type ForecastSeries = z.infer<typeof forecastSeriesSchema>;
+export type ForecastBand = z.infer<typeof forecastBandSchema>;
 export type Forecast = z.infer<typeof forecastSchema>;
 export type ResearchResponse = z.infer<typeof researchResponseSchema>;
+export type ArchivedReportSummary = z.infer<typeof archivedReportSummarySchema>;
+export type ReportPage = z.infer<typeof reportPageSchema>;
+export type ArchivedReport = z.infer<typeof archivedReportSchema>;
 
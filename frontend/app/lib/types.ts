@@ -5,11 +5,23 @@ export interface ForecastSeries {
   value: number;
 }
 
+export interface ForecastBand {
+  year: number;
+  p10: number;
+  p50: number;
+  p90: number;
+}
+
 export interface Forecast {
   title: string;
   unit: string;
   series: ForecastSeries[];
   scenarios?: string[];
+  // Computed by the backend from the analyst's parameters; series is the base case
+  conservative?: ForecastSeries[] | null;
+  optimistic?: ForecastSeries[] | null;
+  bands?: ForecastBand[] | null;
+  parameters?: Record<string, unknown> | null;
 }
 
 export interface ResearchResponse {
@@ -19,6 +31,30 @@ export interface ResearchResponse {
   sources: string[];
 }
 
+// Past reports from the backend's report archive (/reports)
+export interface ArchivedReportSummary {
+  id: number;
+  run_id?: string | null;
+  startup_idea: string;
+  mode: 'quick' | 'deep';
+  competitors: string[];
+  degraded?: string | null;
+  created_at: string;
+  snippet?: string | null; // Summary excerpt with matched words in **bold** (text searches only)
+}
+
+export interface ReportPage {
+  reports: ArchivedReportSummary[];
+  next_before?: number | null; // Cursor for the next page; null on the last page
+}
+
+export interface ArchivedReport {
+  id: number;
+  startup_idea: string;
+  created_at: string;
+  result: ResearchResponse;
+}
+
 export interface StartupIdea {
   startup_idea: string;
 }
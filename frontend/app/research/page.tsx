@@ -4,9 +4,9 @@ import { useState, useRef, useEffect } from "react";
 import type * as React from "react";
 import Navbar from "../components/Navbar";
 import ReactMarkdown from "react-markdown";
-import { startupIdeaSchema, researchResponseSchema } from "../lib/schemas";
-import type { ResearchResponse, Forecast } from "../lib/types";
-import { ZodError } from "zod";
+import { startupIdeaSchema, researchResponseSchema, reportPageSchema, archivedReportSchema } from "../lib/schemas";
+import type { ResearchResponse, Forecast, ForecastSeries, ArchivedReportSummary, ReportPage } from "../lib/types";
+import { ZodError, type ZodType } from "zod";
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from "recharts";
 
 // ============================================================================
@@ -22,6 +22,13 @@ interface Message {
   forecastSummary?: string; // Optional forecast summary text to display after chart
 }
 
+// What the history panel lists: every archived report, or those matching
+// the search text and/or a competitor
+interface HistoryFilter {
+  q: string;
+  competitor: string | null;
+}
+
 // ============================================================================
 // HELPER FUNCTIONS
 // ============================================================================
@@ -210,6 +217,32 @@ function formatResearchResponse(data: ResearchResponse): { formatted: string; fo
   return { formatted, forecastSummary };
 }
 
+/**
+ * GETs an API path and validates the JSON body against a schema
+ */
+async function getValidated<T>(path: string, schema: ZodType<T>): Promise<T> {
+  const res = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}${path}`);
+  if (!res.ok) {
+    throw new Error(`API error: ${res.status}`);
+  }
+  return schema.parse(await res.json());
+}
+
+/**
+ * Fetches a page of past reports from the backend's report archive.
+ * These are stored results, so listing or searching them never runs research.
+ * @param filter - Search text and competitor (both empty lists everything)
+ * @param before - Cursor from the previous page's next_before
+ */
+async function fetchReportPage(filter: HistoryFilter, before?: number): Promise<ReportPage> {
+  const params = new URLSearchParams({ limit: "20" });
+  if (filter.q.trim()) params.set("q", filter.q.trim());
+  if (filter.competitor) params.set("competitor", filter.competitor);
+  const searching = params.has("q") || params.has("competitor");
+  if (before !== undefined) params.set("before", String(before));
+  return getValidated(`/reports${searching ? "/search" : ""}?${params}`, reportPageSchema);
+}
+
 /**
  * Custom styles for ReactMarkdown components
  * This makes the markdown look nice in our dark theme
@@ -313,6 +346,18 @@ function ForecastChart({ forecast, forecastSummary }: { forecast: Forecast; fore
   forecastTitle = forecastTitle.replace(/CHART\s+DATA[^:]*:?\s*/gi, '');
   forecastTitle = forecastTitle.replace(/\{[\s\S]*?\}/g, '');
 
+  // One row per year with the base value and, when the backend computed
+  // them, the conservative and optimistic scenarios
+  const valueByYear = (points?: ForecastSeries[] | null) =>
+    new Map((points || []).map((point) => [point.year, point.value]));
+  const conservative = valueByYear(forecast.conservative);
+  const optimistic = valueByYear(forecast.optimistic);
+  const chartData = forecast.series.map((point) => ({
+    ...point,
+    conservative: conservative.get(point.year),
+    optimistic: optimistic.get(point.year),
+  }));
+
   return (
     <div className="mt-4 pt-4 border-t border-gray-700">
       <h4 className="text-sm font-semibold text-gray-200 mb-3">
@@ -320,7 +365,7 @@ function ForecastChart({ forecast, forecastSummary }: { forecast: Forecast; fore
       </h4>
       <div className="w-full" style={{ height: '300px' }}>
         <ResponsiveContainer width="100%" height="100%">
-          <LineChart data={forecast.series} margin={{ top: 5, right: 20, left: 10, bottom: 5 }}>
+          <LineChart data={chartData} margin={{ top: 5, right: 20, left: 10, bottom: 5 }}>
             <CartesianGrid strokeDasharray="3 3" stroke="#374151" />
             <XAxis dataKey="year" stroke="#9CA3AF" style={{ fontSize: '12px' }} />
             <YAxis 
@@ -357,8 +402,14 @@ function ForecastChart({ forecast, forecastSummary }: { forecast: Forecast; fore
               strokeWidth={2}
               dot={{ fill: '#3B82F6', r: 4 }}
               activeDot={{ r: 6 }}
-              name={forecast.unit}
+              name={forecast.conservative ? `Base (${forecast.unit})` : forecast.unit}
             />
+            {forecast.conservative && (
+              <Line type="monotone" dataKey="conservative" stroke="#F59E0B" strokeDasharray="5 5" dot={false} name="Conservative" />
+            )}
+            {forecast.optimistic && (
+              <Line type="monotone" dataKey="optimistic" stroke="#10B981" strokeDasharray="5 5" dot={false} name="Optimistic" />
+            )}
           </LineChart>
         </ResponsiveContainer>
       </div>
@@ -430,6 +481,143 @@ function MessageBubble({ message }: { message: Message }) {
   );
 }
 
+// ============================================================================
+// COMPONENT: HistoryPanel
+// ============================================================================
+
+/**
+ * Shows a search excerpt, highlighting the words the backend marked with **
+ */
+function Highlighted({ text }: { text: string }) {
+  // Heading markers from the summary's markdown are noise in a one-line excerpt
+  const parts = text.replace(/(^|\n)#+\s*/g, '$1').split('**');
+  return (
+    <>
+      {parts.map((part, idx) =>
+        idx % 2 === 1 ? (
+          <mark key={idx} className="bg-blue-500/30 text-white rounded px-0.5">{part}</mark>
+        ) : (
+          <span key={idx}>{part}</span>
+        )
+      )}
+    </>
+  );
+}
+
+/**
+ * Lists past reports from the report archive, newest first, with search.
+ * Clicking a report opens it in the chat; clicking a competitor lists the
+ * reports that mention it.
+ */
+function HistoryPanel({
+  reports,
+  hasMore,
+  filter,
+  error,
+  onSearch,
+  onCompetitor,
+  onOpen,
+  onLoadMore,
+}: {
+  reports: ArchivedReportSummary[];
+  hasMore: boolean;
+  filter: HistoryFilter;
+  error: string | null;
+  onSearch: (q: string) => void;
+  onCompetitor: (competitor: string | null) => void;
+  onOpen: (id: number) => void;
+  onLoadMore: () => void;
+}) {
+  const [query, setQuery] = useState(filter.q);
+
+  return (
+    <aside className="flex flex-col lg:w-80 h-[40vh] lg:h-[75vh] rounded-2xl border border-gray-500 bg-[#0A0A0A]">
+      <div className="px-4 pt-4 pb-3 border-b border-gray-700">
+        <h2 className="text-sm font-semibold text-gray-200 mb-2">Past reports</h2>
+        <form
+          onSubmit={(e) => {
+            e.preventDefault();
+            onSearch(query);
+          }}
+        >
+          <input
+            type="search"
+            value={query}
+            onChange={(e) => setQuery(e.target.value)}
+            placeholder='Search, e.g. "rocket money"'
+            className="w-full px-3 py-2 bg-[#111111] border border-gray-700 text-sm text-white placeholder-gray-500 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent"
+          />
+        </form>
+        {filter.competitor && (
+          <button
+            onClick={() => onCompetitor(null)}
+            className="mt-2 text-xs px-2 py-1 rounded-full bg-blue-600/30 text-blue-200 border border-blue-500/40"
+          >
+            Competitor: {filter.competitor} ✕
+          </button>
+        )}
+      </div>
+
+      <div className="flex-1 overflow-y-auto px-2 py-2 custom-scrollbar">
+        {error && <p className="text-red-300 text-xs px-2 py-2">{error}</p>}
+        {!error && reports.length === 0 && (
+          <p className="text-gray-500 text-sm px-2 py-4 text-center">
+            {filter.q || filter.competitor ? "No matching reports" : "Your reports will appear here"}
+          </p>
+        )}
+        <ul className="space-y-1">
+          {reports.map((report) => (
+            <li key={report.id}>
+              <div
+                role="button"
+                tabIndex={0}
+                onClick={() => onOpen(report.id)}
+                onKeyDown={(e) => {
+                  if (e.key === 'Enter') onOpen(report.id);
+                }}
+                className="w-full text-left px-3 py-2 rounded-lg hover:bg-gray-800 cursor-pointer"
+              >
+                <p className="text-sm text-gray-100 line-clamp-2">{report.startup_idea}</p>
+                <p className="text-xs text-gray-500 mt-0.5">
+                  {new Date(report.created_at).toLocaleDateString()} · {report.mode}
+                  {report.degraded ? " · partial" : ""}
+                </p>
+                {report.snippet && (
+                  <p className="text-xs text-gray-400 mt-1 line-clamp-3">
+                    <Highlighted text={report.snippet} />
+                  </p>
+                )}
+                {report.competitors.length > 0 && (
+                  <div className="flex flex-wrap gap-1 mt-1">
+                    {report.competitors.slice(0, 3).map((competitor) => (
+                      <button
+                        key={competitor}
+                        onClick={(e) => {
+                          // Filter by the competitor rather than opening the report
+                          e.stopPropagation();
+                          onCompetitor(competitor);
+                        }}
+                        className="text-[11px] px-1.5 py-0.5 rounded bg-gray-800 text-gray-300 border border-gray-700 hover:border-gray-500"
+                      >
+                        {competitor}
+                      </button>
+                    ))}
+                  </div>
+                )}
+              </div>
+            </li>
+          ))}
+        </ul>
+        {hasMore && (
+          <button onClick={onLoadMore} className="w-full mt-2 py-2 text-xs text-gray-400 hover:text-gray-200">
+            Load more
+          </button>
+        )}
+      </div>
+    </aside>
+  );
+}
+
 // ============================================================================
 // COMPONENT: LoadingIndicator
 // ============================================================================
@@ -469,6 +657,77 @@ export default function ResearchPage() {
   const [error, setError] = useState<string | null>(null); // Error message
   const textareaRef = useRef<HTMLTextAreaElement>(null); // Ref for auto-resizing textarea
 
+  // Past reports, read from the backend's report archive
+  const [history, setHistory] = useState<ArchivedReportSummary[]>([]);
+  const [historyNext, setHistoryNext] = useState<number | null>(null); // Cursor for "Load more"
+  const [historyFilter, setHistoryFilter] = useState<HistoryFilter>({ q: "", competitor: null });
+  const [historyError, setHistoryError] = useState<string | null>(null);
+  const [historyVersion, setHistoryVersion] = useState(0); // Bumped to reload after a new report
+
+  // ========== REPORT HISTORY ==========
+
+  /**
+   * Loads the first page of past reports whenever the search changes
+   * (and after each new report)
+   */
+  useEffect(() => {
+    let stale = false; // A newer search replaced this one
+    fetchReportPage(historyFilter)
+      .then((page) => {
+        if (stale) return;
+        setHistory(page.reports);
+        setHistoryNext(page.next_before ?? null);
+        setHistoryError(null);
+      })
+      .catch((err) => {
+        if (stale) return;
+        setHistoryError(`Could not load past reports: ${err instanceof Error ? err.message : 'Unknown error'}`);
+      });
+    return () => {
+      stale = true;
+    };
+  }, [historyFilter, historyVersion]);
+
+  /**
+   * Appends the next page of past reports
+   */
+  const loadMoreHistory = async () => {
+    if (historyNext === null) return;
+    try {
+      const page = await fetchReportPage(historyFilter, historyNext);
+      setHistory(prev => [...prev, ...page.reports]);
+      setHistoryNext(page.next_before ?? null);
+    } catch (err) {
+      setHistoryError(`Could not load past reports: ${err instanceof Error ? err.message : 'Unknown error'}`);
+    }
+  };
+
+  /**
+   * Shows an archived report in the chat without running research again
+   */
+  const openReport = async (reportId: number) => {
+    setError(null);
+    try {
+      const report = await getValidated(`/reports/${reportId}`, archivedReportSchema);
+      const { formatted, forecastSummary } = formatResearchResponse(report.result);
+      const timestamp = new Date(report.created_at);
+      setMessages(prev => [
+        ...prev,
+        { id: `report-${reportId}-${Date.now()}`, type: 'user', content: report.startup_idea, timestamp },
+        {
+          id: `report-${reportId}-${Date.now()}-result`,
+          type: 'assistant',
+          content: `🗂️ *Archived report from ${timestamp.toLocaleString()}*\n\n${formatted}`,
+          timestamp,
+          forecast: report.result.forecast || undefined,
+          forecastSummary: forecastSummary || undefined,
+        },
+      ]);
+    } catch (err) {
+      setError(`Could not open the report: ${err instanceof Error ? err.message : 'Unknown error'}`);
+    }
+  };
+
   // ========== AUTO-RESIZE TEXTAREA ==========
   
   /**
@@ -595,6 +854,9 @@ export default function ResearchPage() {
       // Add assistant message to chat
       setMessages(prev => [...prev, assistantMessage]);
       
+      // The new report is archived, so refresh the history list
+      setHistoryVersion(version => version + 1);
+      
     } catch (err) {
       // Handle errors with better messaging
       if (err instanceof Error) {
@@ -633,8 +895,21 @@ export default function ResearchPage() {
           </p>
         </div>
 
+        <div className="flex flex-col lg:flex-row gap-4 w-[95%] max-w-7xl mx-auto">
+        {/* Past reports */}
+        <HistoryPanel
+          reports={history}
+          hasMore={historyNext !== null}
+          filter={historyFilter}
+          error={historyError}
+          onSearch={(q) => setHistoryFilter(prev => ({ ...prev, q }))}
+          onCompetitor={(competitor) => setHistoryFilter(prev => ({ ...prev, competitor }))}
+          onOpen={openReport}
+          onLoadMore={loadMoreHistory}
+        />
+
         {/* Chat Container */}
-        <div className="flex flex-col h-[75vh] rounded-2xl border border-gray-500 bg-[#0A0A0A] w-[95%] max-w-7xl mx-auto">
+        <div className="flex flex-col h-[75vh] flex-1 min-w-0 rounded-2xl border border-gray-500 bg-[#0A0A0A]">
           {/* Messages Area */}
           <div className="flex-1 overflow-y-auto px-6 py-6 custom-scrollbar">
             <div className="space-y-6 w-full">
@@ -714,6 +989,7 @@ export default function ResearchPage() {
               </form>
           </div>
         </div>
+        </div>
       </main>
     </div>
   );